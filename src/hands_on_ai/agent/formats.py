@@ -183,26 +183,17 @@ def run_instructor_agent(
     """
     try:
         import instructor
-        from openai import OpenAI
         from .schemas import AgentResponse, ToolCall, FinalAnswer
-        from ..config import get_server_url, get_api_key
+        from ..clients import get_openai_client
     except ImportError as e:
         # Fallback to old implementation if dependencies not available
         log.warning(f"Instructor not available, falling back to basic JSON: {e}")
         return run_json_agent_fallback(prompt, tools, model, max_iterations, verbose)
     
-    # Create instructor client with OpenAI-compatible endpoints
+    # Wrap the shared OpenAI-compatible client with Instructor
     try:
-        server_url = get_server_url()
-        # Add /v1 suffix for OpenAI-compatible endpoints
-        if not server_url.endswith('/v1'):
-            server_url = server_url.rstrip('/') + '/v1'
-            
         client = instructor.from_openai(
-            OpenAI(
-                base_url=server_url,
-                api_key=get_api_key() or "ollama"
-            ),
+            get_openai_client(),
             mode=instructor.Mode.JSON_SCHEMA  # Use JSON_SCHEMA for Ollama models
         )
     except Exception as e:
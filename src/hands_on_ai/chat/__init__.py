@@ -2,7 +2,8 @@
 Chat module - Simple chatbot with system prompts.
 """
 
-from .get_response import get_response
+from .get_response import get_response, stream_response, stream_tokens, aget_response, astream_response
+from .batch import get_responses, aget_responses, BatchResult
 from .personalities import (
     friendly_bot,
     sarcastic_bot,
@@ -22,6 +23,13 @@ from .personalities import (
 # 🧠 Core interface
 __all__ = [
     "get_response",
+    "stream_response",
+    "stream_tokens",
+    "aget_response",
+    "astream_response",
+    "get_responses",
+    "aget_responses",
+    "BatchResult",
     "friendly_bot",
     "sarcastic_bot",
     "pirate_bot",
@@ -0,0 +1,185 @@
+"""
+Bulk prompt running for the chat module.
+
+get_responses() sends many independent prompts with a bounded number of
+requests in flight, over the shared client's connection pool, so a batch
+runs as fast as the server can serve concurrent requests instead of one
+prompt at a time. Results come back in prompt order, and a failed prompt
+records its error instead of stopping the batch.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Union
+from ..config import get_batch_concurrency, get_model, get_temperature
+from ..clients import get_openai_client, get_async_openai_client
+from .get_response import _warm_up, _awarm_up, _complete, _acomplete, _cached
+
+DEFAULT_SYSTEM = "You are a helpful assistant."
+
+Prompt = Union[str, Dict[str, Any]]
+
+
+class BatchResult(NamedTuple):
+    """The outcome of one prompt in a batch."""
+    response: Optional[str]
+    error: Optional[str]
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        """Whether the prompt got a response."""
+        return self.error is None
+
+
+def _request(item: Prompt, model: str, system: str) -> tuple:
+    """Get the (prompt, model, system) of a batch item, applying the batch defaults."""
+    if isinstance(item, str):
+        return item, model, system
+    return item.get("prompt"), item.get("model") or model, item.get("system") or system
+
+
+def _check_prompt(prompt) -> None:
+    """Reject a missing, non-text or blank prompt."""
+    if not isinstance(prompt, str) or not prompt.strip():
+        raise ValueError("Missing or empty prompt")
+
+
+def get_responses(
+    prompts: List[Prompt],
+    model: str = None,
+    system: str = DEFAULT_SYSTEM,
+    concurrency: int = None,
+    retries: int = 2,
+    on_result: Callable[[int, int, int, BatchResult], None] = None,
+    temperature: float = None,
+    cache: bool = None
+) -> List[BatchResult]:
+    """
+    Send many independent prompts to the LLM concurrently.
+
+    Args:
+        prompts: Prompt strings, or dicts with a "prompt" and optional
+            "system" and "model" overriding the batch defaults
+        model: LLM model to use (defaults to config setting)
+        system: System message for every prompt
+        concurrency: Requests kept in flight at once (default from config)
+        retries: Attempts per prompt before recording its error (at least 1)
+        on_result: Optional callback(done, total, index, result), called
+            as each prompt finishes, in completion order
+        temperature: Sampling temperature (default: from config, else the server's)
+        cache: Use the response cache (see get_response); None follows config
+
+    Returns:
+        list: One BatchResult per prompt, in prompt order
+
+    Raises:
+        ValueError: If retries is less than 1
+    """
+    if retries < 1:
+        raise ValueError("retries must be at least 1")
+    concurrency = max(1, concurrency or get_batch_concurrency())
+    model = model or get_model()
+    if temperature is None:
+        temperature = get_temperature()
+    client = get_openai_client()
+    results = [None] * len(prompts)
+    # Fully cached batches never touch a model, so each model is only warmed
+    # up on its first miss; the lock holds other misses back until it has loaded
+    warm_lock = threading.Lock()
+    warmed = set()
+
+    def warm_up(item_model):
+        if item_model in warmed:
+            return
+        with warm_lock:
+            if item_model not in warmed:
+                _warm_up(item_model)
+                warmed.add(item_model)
+
+    def run(item):
+        start = time.perf_counter()
+        try:
+            prompt, item_model, item_system = _request(item, model, system)
+            _check_prompt(prompt)
+            response, save = _cached(cache, temperature, item_model, item_system, prompt)
+            if response is None:
+                warm_up(item_model)
+                response = _complete(client, prompt, item_model, item_system, "default", retries,
+                                     quiet=True, temperature=temperature)
+                save(response)
+            return BatchResult(response, None, time.perf_counter() - start)
+        except Exception as e:
+            return BatchResult(None, str(e) or type(e).__name__, time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="chat-batch") as executor:
+        futures = {executor.submit(run, item): i for i, item in enumerate(prompts)}
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            results[index] = future.result()
+            if on_result is not None:
+                on_result(done, len(prompts), index, results[index])
+    return results
+
+
+async def aget_responses(
+    prompts: List[Prompt],
+    model: str = None,
+    system: str = DEFAULT_SYSTEM,
+    concurrency: int = None,
+    retries: int = 2,
+    on_result: Callable[[int, int, int, BatchResult], None] = None,
+    temperature: float = None,
+    cache: bool = None
+) -> List[BatchResult]:
+    """
+    Async version of get_responses(), for use on an asyncio event loop.
+
+    Takes the same arguments and returns the same results, without
+    starting any threads.
+    """
+    if retries < 1:
+        raise ValueError("retries must be at least 1")
+    concurrency = max(1, concurrency or get_batch_concurrency())
+    model = model or get_model()
+    if temperature is None:
+        temperature = get_temperature()
+    client = get_async_openai_client()
+    limit = asyncio.Semaphore(concurrency)
+    results = [None] * len(prompts)
+    done = 0
+    warm_lock = asyncio.Lock()
+    warmed = set()
+
+    async def warm_up(item_model):
+        if item_model in warmed:
+            return
+        async with warm_lock:
+            if item_model not in warmed:
+                await _awarm_up(item_model)
+                warmed.add(item_model)
+
+    async def run(index, item):
+        nonlocal done
+        async with limit:
+            start = time.perf_counter()
+            try:
+                prompt, item_model, item_system = _request(item, model, system)
+                _check_prompt(prompt)
+                response, save = _cached(cache, temperature, item_model, item_system, prompt)
+                if response is None:
+                    await warm_up(item_model)
+                    response = await _acomplete(client, prompt, item_model, item_system, "default", retries,
+                                                quiet=True, temperature=temperature)
+                    save(response)
+                results[index] = BatchResult(response, None, time.perf_counter() - start)
+            except Exception as e:
+                results[index] = BatchResult(None, str(e) or type(e).__name__, time.perf_counter() - start)
+        done += 1
+        if on_result is not None:
+            on_result(done, len(prompts), index, results[index])
+
+    await asyncio.gather(*(run(i, item) for i, item in enumerate(prompts)))
+    return results
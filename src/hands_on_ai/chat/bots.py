@@ -2,8 +2,12 @@
 Bot personality discovery and retrieval.
 """
 
+import asyncio
 import inspect
+import queue
+import threading
 from . import personalities
+from .get_response import stream_tokens
 
 
 def list_available_bots():
@@ -53,4 +57,74 @@ def get_bot_description(bot_func):
     """
     if not bot_func.__doc__:
         return "No description."
-    return next((line.strip() for line in bot_func.__doc__.splitlines() if line.strip()), "No description.")
\ No newline at end of file
+    return next((line.strip() for line in bot_func.__doc__.splitlines() if line.strip()), "No description.")
+
+
+def _run_streaming(bot_func, prompt, put, done):
+    """Run a bot once, passing each streamed piece of its response to put(), then done."""
+    streamed = False
+
+    def on_token(token):
+        nonlocal streamed
+        streamed = True
+        put(token)
+
+    try:
+        with stream_tokens(on_token):
+            response = bot_func(prompt)
+        if not streamed:
+            put(response)
+    except Exception as e:
+        put(f"❌ Error: {e}")
+    finally:
+        put(done)
+
+
+def stream_bot(bot_func, prompt):
+    """
+    Run a bot and yield its response as it is generated.
+
+    The bot runs in a background thread with its get_response() calls
+    streamed through stream_tokens(); bots that don't call get_response()
+    yield their whole response at the end.
+
+    Args:
+        bot_func (function): Bot function
+        prompt (str): Prompt to send to the bot
+
+    Yields:
+        str: Pieces of the bot's response
+    """
+    tokens = queue.Queue()
+    done = object()
+    threading.Thread(target=_run_streaming, args=(bot_func, prompt, tokens.put, done), daemon=True).start()
+    while (token := tokens.get()) is not done:
+        yield token
+
+
+async def astream_bot(bot_func, prompt):
+    """
+    Async version of stream_bot(), for use on an asyncio event loop.
+
+    The bot runs once in a worker thread, exactly as if called directly,
+    and the pieces its get_response() calls stream are handed back to the
+    event loop as they arrive, so the loop is never blocked.
+
+    Args:
+        bot_func (function): Bot function
+        prompt (str): Prompt to send to the bot
+
+    Yields:
+        str: Pieces of the bot's response
+    """
+    loop = asyncio.get_running_loop()
+    tokens = asyncio.Queue()
+    done = object()
+
+    def put(token):
+        loop.call_soon_threadsafe(tokens.put_nowait, token)
+
+    worker = asyncio.ensure_future(asyncio.to_thread(_run_streaming, bot_func, prompt, put, done))
+    while (token := await tokens.get()) is not done:
+        yield token
+    await worker
@@ -2,9 +2,11 @@
 Ask command for the chat CLI.
 """
 
+import sys
 import typer
 from rich import print
 from ..bots import get_bot
+from ..get_response import stream_tokens
 
 app = typer.Typer(help="Send a single prompt to a bot")
 
@@ -19,4 +21,19 @@ def ask(
     if not bot:
         print(f"[red]❌ Bot '{personality}' not found. Try 'chat bots' for options.[/red]")
         raise typer.Exit(1)
-    print(bot(prompt))
\ No newline at end of file
+
+    # Print the answer as it is generated; bots that don't call
+    # get_response() just return theirs
+    streamed = False
+
+    def show_token(token):
+        nonlocal streamed
+        streamed = True
+        sys.stdout.write(token)
+        sys.stdout.flush()
+
+    with stream_tokens(show_token):
+        response = bot(prompt)
+    if not streamed:
+        sys.stdout.write(response)
+    sys.stdout.write("\n")
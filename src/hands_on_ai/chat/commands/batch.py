@@ -0,0 +1,130 @@
+"""
+Batch command for the chat CLI - runs a JSONL file of prompts.
+"""
+
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+import typer
+from rich.console import Console
+from rich.progress import Progress, BarColumn, MofNCompleteColumn, TimeRemainingColumn
+from ..batch import get_responses, DEFAULT_SYSTEM
+
+app = typer.Typer(help="Send a JSONL file of prompts concurrently")
+
+
+def _read_items(lines):
+    """
+    Parse JSONL input into batch items.
+
+    Each line is a JSON object with a "prompt" (and optional "system" and
+    "model") or a JSON string. Lines that aren't valid JSON, or hold any
+    other JSON value, become items with an "error" so they are reported in
+    place instead of aborting.
+    """
+    items = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            items.append({"line": number, "error": f"Invalid JSON: {e}"})
+            continue
+        if isinstance(item, str):
+            items.append({"prompt": item})
+        elif isinstance(item, dict):
+            items.append(item)
+        else:
+            items.append({"line": number, "error": "expected object or string"})
+    return items
+
+
+@app.callback(invoke_without_command=True)
+def batch(
+    input_file: str = typer.Argument(..., help="JSONL file of prompts ('-' for stdin)"),
+    output_file: str = typer.Option(None, "--output", "-o", help="JSONL file for the results (default: stdout)"),
+    concurrency: int = typer.Option(None, "--concurrency", "-n", help="Prompts in flight at once (default: from config)"),
+    model: str = typer.Option(None, help="Model to use (default: from config)"),
+    system: str = typer.Option(DEFAULT_SYSTEM, help="System prompt for lines that don't set their own"),
+    retries: int = typer.Option(2, help="Attempts per prompt before recording its error"),
+    temperature: float = typer.Option(None, help="Sampling temperature (default: from config, else the server's; 0 makes responses cacheable)"),
+    cache: bool = typer.Option(None, "--cache/--no-cache", help="Use the response cache for temperature 0 (default: from config)"),
+):
+    """
+    Send a JSONL file of prompts concurrently.
+
+    Each input line is {"prompt": ...} (optionally with "system" and
+    "model") or a JSON string. Each output line repeats the input fields
+    and adds "response" and "error", in input order.
+    """
+    console = Console(stderr=True)
+    if retries < 1:
+        console.print("[red]❌ --retries must be at least 1[/red]")
+        raise typer.Exit(1)
+    try:
+        if input_file == "-":
+            items = _read_items(sys.stdin)
+        else:
+            with open(input_file, encoding="utf-8") as f:
+                items = _read_items(f)
+    except OSError as e:
+        console.print(f"[red]❌ Could not read {input_file}: {e}[/red]")
+        raise typer.Exit(1)
+    if not items:
+        console.print("[yellow]⚠️ No prompts found.[/yellow]")
+        return
+
+    # Lines that failed to parse are reported as they are; the rest are sent
+    invalid = {i for i, item in enumerate(items) if "error" in item and "prompt" not in item}
+    pending = [i for i in range(len(items)) if i not in invalid]
+    out = open(output_file, "w", encoding="utf-8") if output_file else sys.stdout
+    finished = {}
+    next_index = 0
+    errors = len(invalid)
+
+    def write_ready():
+        """Write results in input order as soon as the earlier ones are done."""
+        nonlocal next_index
+        while next_index < len(items) and (next_index in invalid or next_index in finished):
+            record = dict(items[next_index])
+            if next_index in finished:
+                result = finished.pop(next_index)
+                record.update(response=result.response, error=result.error, seconds=round(result.seconds, 3))
+            else:
+                record.setdefault("response", None)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            next_index += 1
+        out.flush()
+
+    start = time.perf_counter()
+    try:
+        with Progress("{task.description}", BarColumn(), MofNCompleteColumn(), TimeRemainingColumn(),
+                      console=console) as progress:
+            task = progress.add_task("💬 Prompts", total=len(pending))
+
+            def on_result(done, total, index, result):
+                nonlocal errors
+                finished[pending[index]] = result
+                if not result.ok:
+                    errors += 1
+                write_ready()
+                progress.update(task, completed=done)
+
+            write_ready()
+            # Keep model warm-up messages out of results written to stdout
+            with redirect_stdout(sys.stderr):
+                get_responses([items[i] for i in pending], model=model, system=system,
+                              concurrency=concurrency, retries=retries, on_result=on_result,
+                              temperature=temperature, cache=cache)
+            write_ready()
+    finally:
+        if output_file:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    console.print(f"✅ {len(items) - errors} responses, {errors} errors in {elapsed:.1f}s "
+                  f"({len(pending) / elapsed:.1f} prompts/s)")
+    if output_file:
+        console.print(f"💾 Results written to {output_file}")
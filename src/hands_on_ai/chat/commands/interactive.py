@@ -2,10 +2,12 @@
 Interactive command for the chat CLI.
 """
 
+import sys
 import typer
 from rich import print
 import requests
 from ..bots import get_bot
+from ..get_response import stream_tokens
 from ...config import get_server_url
 
 app = typer.Typer(help="Start interactive REPL")
@@ -86,5 +88,20 @@ def interactive():
             else:
                 print(f"[red]⚠️ Unknown command: /{command}[/red]")
         else:
-            response = bot(user_input)
-            print(f"🤖 {response}\n")
\ No newline at end of file
+            # Show the answer as it is generated; the prefix waits for the
+            # first token so model warm-up messages print on their own line
+            started = False
+
+            def show_token(token):
+                nonlocal started
+                if not started:
+                    sys.stdout.write("🤖 ")
+                    started = True
+                sys.stdout.write(token)
+                sys.stdout.flush()
+
+            with stream_tokens(show_token):
+                response = bot(user_input)
+            if not started:
+                sys.stdout.write(f"🤖 {response}")
+            print("\n")
\ No newline at end of file
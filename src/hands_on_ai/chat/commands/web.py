@@ -3,7 +3,7 @@ Web command for the chat CLI - provides a web interface.
 """
 
 import typer
-from ..bots import list_available_bots, get_bot_description
+from ..bots import list_available_bots, get_bot_description, astream_bot
 
 app = typer.Typer(help="Launch web interface for Chat")
 
@@ -18,13 +18,13 @@ def web(
     try:
         from fasthtml.common import (fast_app, Titled, Article, Form, Div, 
                                     Label, Select, Option, Input, Button, 
-                                    Style, Script, serve)
+                                    Style, Script, StreamingResponse, serve)
     except ImportError:
         try:
             # Alternative import path if the package is installed as python-fasthtml
             from python_fasthtml.common import (fast_app, Titled, Article, Form, Div, 
                                               Label, Select, Option, Input, Button, 
-                                              Style, Script, serve)
+                                              Style, Script, StreamingResponse, serve)
         except ImportError:
             print("❌ FastHTML is required for the web interface.")
             print("Please install it with: pip install python-fasthtml")
@@ -127,21 +127,27 @@ def web(
                             headers: {'Content-Type': 'application/x-www-form-urlencoded'},
                             body: `prompt=${encodeURIComponent(prompt)}&bot=${encodeURIComponent(bot)}`
                         })
-                        .then(response => response.text())
-                        .then(html => {
-                            // Add the response to the chat history
-                            const parser = new DOMParser();
-                            const doc = parser.parseFromString(html, 'text/html');
-                            const botMessage = doc.body.firstChild;
-                            document.getElementById('chat-history').appendChild(botMessage);
-                            
-                            // Scroll to bottom
-                            document.getElementById('chat-history').scrollTop = 
-                                document.getElementById('chat-history').scrollHeight;
+                        .then(async response => {
+                            // Add an empty bot message and fill it in as the answer streams
+                            const chatHistory = document.getElementById('chat-history');
+                            const botMessage = document.createElement('div');
+                            botMessage.classList.add('message', 'bot-message');
+                            chatHistory.appendChild(botMessage);
                             
                             // Clear the input
                             document.getElementById('prompt').value = '';
                             document.getElementById('prompt').focus();
+                            
+                            const reader = response.body.getReader();
+                            const decoder = new TextDecoder();
+                            while (true) {
+                                const { done, value } = await reader.read();
+                                if (done) break;
+                                botMessage.textContent += decoder.decode(value, { stream: true });
+                                
+                                // Scroll to bottom
+                                chatHistory.scrollTop = chatHistory.scrollHeight;
+                            }
                         });
                     });
                     
@@ -159,13 +165,13 @@ def web(
         )
     
     @rt("/chat")
-    def post(prompt: str, bot: str):
+    async def post(prompt: str, bot: str):
         bot_func = all_bots.get(bot)
         if not bot_func:
-            return Div("Bot not found", cls="message bot-message")
+            return StreamingResponse(iter(["Bot not found"]), media_type="text/plain; charset=utf-8")
         
-        response = bot_func(prompt)
-        return Div(response, cls="message bot-message")
+        # Send the answer as plain text while it is generated, on the event loop
+        return StreamingResponse(astream_bot(bot_func, prompt), media_type="text/plain; charset=utf-8")
     
     # Run the server
     display_host = "localhost" if host == "127.0.0.1" else host
@@ -3,15 +3,268 @@ Core response functionality for the chat module.
 """
 
 import requests
+import asyncio
 import random
 import time
-from openai import OpenAI
-from ..config import get_server_url, get_api_key, load_fallbacks, log
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Iterator
+from ..config import load_fallbacks, load_config, get_temperature, log
+from ..clients import get_openai_client, get_async_openai_client
+from .response_cache import get_response_cache, request_key, is_deterministic
 
 # Global model cache
 _last_model: str | None = None
 # Load fallbacks from the chat module
 _fallbacks = load_fallbacks(module="chat")
+# Token callback installed by stream_tokens()
+_on_token: ContextVar[Callable[[str], None] | None] = ContextVar("on_token", default=None)
+
+# Seconds to pause after switching models and between retries
+WARMUP_DELAY = 1.2
+RETRY_DELAY = 1.0
+
+NO_RESPONSE = "⚠️ No response from model."
+
+
+@contextmanager
+def stream_tokens(on_token: Callable[[str], None]):
+    """
+    Stream every get_response() call made inside the block to a callback.
+
+    Bots wrap get_response() with a fixed system prompt and take only the
+    prompt, so this lets callers such as the chat REPL show a bot's answer
+    as it is generated without changing the bot.
+
+    Args:
+        on_token (callable): Called with each piece of text as it arrives
+
+    Example:
+        with stream_tokens(lambda token: print(token, end="", flush=True)):
+            pirate_bot("Tell me a story")
+    """
+    reset = _on_token.set(on_token)
+    try:
+        yield
+    finally:
+        _on_token.reset(reset)
+
+
+def _select_model(model: str | None) -> tuple[str, bool]:
+    """Resolve the model; announce and report a switch to a different model."""
+    global _last_model
+
+    # Get model from config if not specified
+    if model is None:
+        from ..config import get_model
+        model = get_model()
+
+    # Handle model switching
+    if model == _last_model:
+        return model, False
+    warmups = [
+        f"🧠 Loading model '{model}' into RAM... give me a sec...",
+        f"💾 Spinning up the AI core for '{model}'...",
+        f"⏳ Summoning the knowledge spirits... '{model}' booting...",
+        f"🤖 Thinking really hard with '{model}'...",
+        f"⚙️ Switching to model: {model} ... (may take a few seconds)"
+    ]
+    msg = random.choice(warmups)
+    print(msg)
+    log.debug(f"Model switch: {msg}")
+    _last_model = model
+    return model, True
+
+
+def _warm_up(model: str | None) -> str:
+    """Resolve the model, pausing after a switch to a different model."""
+    model, switched = _select_model(model)
+    if switched:
+        time.sleep(WARMUP_DELAY)
+    return model
+
+
+async def _awarm_up(model: str | None) -> str:
+    """Async version of _warm_up()."""
+    model, switched = _select_model(model)
+    if switched:
+        await asyncio.sleep(WARMUP_DELAY)
+    return model
+
+
+def _retry_message(attempt: int, retries: int, personality: str, error: Exception, quiet: bool = False) -> bool:
+    """Log a failed attempt and show a fallback line; return True if another attempt is left."""
+    log.warning(f"Error during request (attempt {attempt}): {error}")
+    if attempt < retries:
+        if not quiet:
+            fallback = _fallbacks.get(personality, _fallbacks.get("default", ["Retrying..."]))
+            print(random.choice(fallback))
+        return True
+    return False
+
+
+def _complete(client, prompt: str, model: str, system: str, personality: str, retries: int,
+              quiet: bool = False, temperature: float = None) -> str:
+    """Request one completion, retrying failures; raises the last error."""
+    for attempt in range(1, retries + 1):
+        try:
+            # Make OpenAI-compatible request
+            response = client.chat.completions.create(
+                model=model,
+                messages=_messages(system, prompt),
+                timeout=10,
+                **_sampling(temperature)
+            )
+            return response.choices[0].message.content or NO_RESPONSE
+
+        except Exception as e:
+            if not _retry_message(attempt, retries, personality, e, quiet):
+                raise
+            time.sleep(RETRY_DELAY)
+
+
+async def _acomplete(client, prompt: str, model: str, system: str, personality: str, retries: int,
+                     quiet: bool = False, temperature: float = None) -> str:
+    """Async version of _complete()."""
+    for attempt in range(1, retries + 1):
+        try:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=_messages(system, prompt),
+                timeout=10,
+                **_sampling(temperature)
+            )
+            return response.choices[0].message.content or NO_RESPONSE
+
+        except Exception as e:
+            if not _retry_message(attempt, retries, personality, e, quiet):
+                raise
+            await asyncio.sleep(RETRY_DELAY)
+
+
+def _messages(system: str, prompt: str) -> list:
+    """Build the chat messages for a prompt."""
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _sampling(temperature: float | None) -> dict:
+    """Sampling parameters to send; unset ones are left to the server's defaults."""
+    # float() so 0 and 0.0 give the same response cache key
+    return {} if temperature is None else {"temperature": float(temperature)}
+
+
+def _no_save(response: str) -> None:
+    pass
+
+
+def _cached(cache: bool | None, temperature: float | None, model: str | None, system: str,
+            prompt: str) -> tuple[str | None, Callable[[str], None]]:
+    """
+    Look a request up in the response cache.
+
+    Only deterministic requests (temperature 0) are cached, when the cache
+    is enabled in config or by cache=True.
+
+    Returns:
+        tuple: (cached response or None, function storing a new response)
+    """
+    if cache is False or not is_deterministic(temperature) or not prompt.strip():
+        return None, _no_save
+    # Read the config once: a cache hit should cost far less than reading it twice
+    config = load_config()
+    response_cache = get_response_cache(cache, config)
+    if response_cache is None:
+        return None, _no_save
+    model = model or config["model"]
+    key = request_key(model, _messages(system, prompt), _sampling(temperature))
+
+    def save(response):
+        if response and response != NO_RESPONSE:
+            response_cache.put(key, response)
+
+    return response_cache.get(key), save
+
+
+def stream_response(
+    prompt: str,
+    model: str = None,
+    system: str = "You are a helpful assistant.",
+    personality: str = "friendly",
+    retries: int = 2,
+    temperature: float = None,
+    cache: bool = None
+) -> Iterator[str]:
+    """
+    Send a prompt to the LLM and yield the response as it is generated.
+
+    Takes the same arguments as get_response(). Failed requests are retried
+    until the first token arrives; after that an error ends the stream with
+    an error message, since the text already yielded cannot be taken back.
+    Joining everything yielded gives the string get_response() would return.
+
+    Args:
+        prompt (str): The text prompt to send to the model
+        model (str): LLM model to use (defaults to config setting)
+        system (str): System message defining bot behavior
+        personality (str): Used for fallback character during retries
+        retries (int): Number of times to retry on error
+        temperature (float): Sampling temperature (default: from config, else the server's)
+        cache (bool): Use the response cache for this call; None follows
+            the response_cache config setting. Only temperature 0 is cached
+
+    Yields:
+        str: Pieces of the AI response (or an error message)
+    """
+    if temperature is None:
+        temperature = get_temperature()
+    cached, save = _cached(cache, temperature, model, system, prompt)
+    if cached is not None:
+        yield cached
+        return
+
+    model = _warm_up(model)
+
+    # Check for empty prompt
+    if not prompt.strip():
+        yield "⚠️ Empty prompt."
+        return
+
+    # Shared client: keeps its connections alive across calls and retries
+    client = get_openai_client()
+    log.debug(f"Using OpenAI-compatible server URL: {client.base_url}")
+
+    for attempt in range(1, retries + 1):
+        tokens = []
+        try:
+            response = client.chat.completions.create(
+                model=model,
+                messages=_messages(system, prompt),
+                stream=True,
+                timeout=10,
+                **_sampling(temperature)
+            )
+            with response:
+                for chunk in response:
+                    token = chunk.choices[0].delta.content if chunk.choices else None
+                    if token:
+                        tokens.append(token)
+                        yield token
+            if not tokens:
+                yield NO_RESPONSE
+            save("".join(tokens))
+            return
+        except Exception as e:
+            if tokens:
+                log.warning(f"Error during streamed response: {e}")
+                yield f"\n❌ Error: {str(e)}"
+                return
+            if not _retry_message(attempt, retries, personality, e):
+                yield f"❌ Error: {str(e)}"
+            else:
+                time.sleep(RETRY_DELAY)
 
 
 def get_response(
@@ -20,7 +273,10 @@ def get_response(
     system: str = "You are a helpful assistant.",
     personality: str = "friendly",
     stream: bool = False,
-    retries: int = 2
+    retries: int = 2,
+    on_token: Callable[[str], None] = None,
+    temperature: float = None,
+    cache: bool = None
 ) -> str:
     """
     Send a prompt to the LLM and retrieve the model's response.
@@ -35,83 +291,187 @@ def get_response(
         personality (str): Used for fallback character during retries
         stream (bool): Whether to request streaming output (default False)
         retries (int): Number of times to retry on error
+        on_token (callable): Called with each piece of the response as it
+            arrives; implies stream (default: the stream_tokens() callback, if any)
+        temperature (float): Sampling temperature (default: from config, else the server's)
+        cache (bool): Use the response cache for this call; None follows
+            the response_cache config setting. Only temperature 0 is cached
 
     Returns:
         str: AI response or error message
     """
-    global _last_model
-    
-    # Get model from config if not specified
-    if model is None:
-        from ..config import get_model
-        model = get_model()
+    if temperature is None:
+        temperature = get_temperature()
+    if on_token is None:
+        on_token = _on_token.get()
+    if stream or on_token is not None:
+        tokens = []
+        for token in stream_response(prompt, model=model, system=system, personality=personality,
+                                     retries=retries, temperature=temperature, cache=cache):
+            if on_token is not None:
+                on_token(token)
+            tokens.append(token)
+        return "".join(tokens)
 
-    # Handle model switching
-    if model != _last_model:
-        warmups = [
-            f"🧠 Loading model '{model}' into RAM... give me a sec...",
-            f"💾 Spinning up the AI core for '{model}'...",
-            f"⏳ Summoning the knowledge spirits... '{model}' booting...",
-            f"🤖 Thinking really hard with '{model}'...",
-            f"⚙️ Switching to model: {model} ... (may take a few seconds)"
-        ]
-        msg = random.choice(warmups)
-        print(msg)
-        log.debug(f"Model switch: {msg}")
-        time.sleep(1.2)
-        _last_model = model
+    cached, save = _cached(cache, temperature, model, system, prompt)
+    if cached is not None:
+        return cached
+
+    model = _warm_up(model)
 
     # Check for empty prompt
     if not prompt.strip():
         return "⚠️ Empty prompt."
 
-    # Get server URL and configure OpenAI client
-    server_url = get_server_url()
-    
-    # Add /v1 suffix for OpenAI-compatible endpoints
-    if not server_url.endswith('/v1'):
-        server_url = server_url.rstrip('/') + '/v1'
-    
-    log.debug(f"Using OpenAI-compatible server URL: {server_url}")
+    # Shared client: keeps its connections alive across calls and retries
+    client = get_openai_client()
+    log.debug(f"Using OpenAI-compatible server URL: {client.base_url}")
 
     # Try to get a response
+    try:
+        response = _complete(client, prompt, model, system, personality, retries, temperature=temperature)
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+    save(response)
+    return response
+
+
+async def astream_response(
+    prompt: str,
+    model: str = None,
+    system: str = "You are a helpful assistant.",
+    personality: str = "friendly",
+    retries: int = 2,
+    temperature: float = None,
+    cache: bool = None
+) -> AsyncIterator[str]:
+    """
+    Async version of stream_response(), for use on an asyncio event loop.
+
+    Waiting on the model never blocks the loop, so one loop can serve many
+    conversations at once.
+
+    Args:
+        prompt (str): The text prompt to send to the model
+        model (str): LLM model to use (defaults to config setting)
+        system (str): System message defining bot behavior
+        personality (str): Used for fallback character during retries
+        retries (int): Number of times to retry on error
+        temperature (float): Sampling temperature (default: from config, else the server's)
+        cache (bool): Use the response cache for this call; None follows
+            the response_cache config setting. Only temperature 0 is cached
+
+    Yields:
+        str: Pieces of the AI response (or an error message)
+    """
+    if temperature is None:
+        temperature = get_temperature()
+    cached, save = _cached(cache, temperature, model, system, prompt)
+    if cached is not None:
+        yield cached
+        return
+
+    model = await _awarm_up(model)
+
+    # Check for empty prompt
+    if not prompt.strip():
+        yield "⚠️ Empty prompt."
+        return
+
+    client = get_async_openai_client()
+
     for attempt in range(1, retries + 1):
+        tokens = []
         try:
-            # Create OpenAI client
-            client = OpenAI(
-                base_url=server_url,
-                api_key=get_api_key() or "hands-on-ai"
-            )
-            
-            # Make OpenAI-compatible request
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model=model,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": prompt}
-                ],
-                stream=stream,
-                timeout=10
+                messages=_messages(system, prompt),
+                stream=True,
+                timeout=10,
+                **_sampling(temperature)
             )
-            
-            # Handle streaming vs non-streaming response
-            if stream:
-                # For streaming, collect all chunks
-                content = ""
-                for chunk in response:
-                    if chunk.choices[0].delta.content:
-                        content += chunk.choices[0].delta.content
-                return content if content else "⚠️ No response from model."
-            else:
-                # For non-streaming, get the content directly
-                return response.choices[0].message.content or "⚠️ No response from model."
-                
+            async with response:
+                async for chunk in response:
+                    token = chunk.choices[0].delta.content if chunk.choices else None
+                    if token:
+                        tokens.append(token)
+                        yield token
+            if not tokens:
+                yield NO_RESPONSE
+            save("".join(tokens))
+            return
         except Exception as e:
-            log.warning(f"Error during request (attempt {attempt}): {e}")
-            if attempt < retries:
-                fallback = _fallbacks.get(personality, _fallbacks.get("default", ["Retrying..."]))
-                msg = random.choice(fallback)
-                print(msg)
-                time.sleep(1.0)
+            if tokens:
+                log.warning(f"Error during streamed response: {e}")
+                yield f"\n❌ Error: {str(e)}"
+                return
+            if not _retry_message(attempt, retries, personality, e):
+                yield f"❌ Error: {str(e)}"
             else:
-                return f"❌ Error: {str(e)}"
\ No newline at end of file
+                await asyncio.sleep(RETRY_DELAY)
+
+
+async def aget_response(
+    prompt: str,
+    model: str = None,
+    system: str = "You are a helpful assistant.",
+    personality: str = "friendly",
+    stream: bool = False,
+    retries: int = 2,
+    on_token: Callable[[str], None] = None,
+    temperature: float = None,
+    cache: bool = None
+) -> str:
+    """
+    Async version of get_response(), for use on an asyncio event loop.
+
+    Takes the same arguments and returns the same responses, including
+    retries and fallback messages, but never blocks the loop.
+
+    Args:
+        prompt (str): The text prompt to send to the model
+        model (str): LLM model to use (defaults to config setting)
+        system (str): System message defining bot behavior
+        personality (str): Used for fallback character during retries
+        stream (bool): Whether to request streaming output (default False)
+        retries (int): Number of times to retry on error
+        on_token (callable): Called with each piece of the response as it
+            arrives; implies stream (default: the stream_tokens() callback, if any)
+        temperature (float): Sampling temperature (default: from config, else the server's)
+        cache (bool): Use the response cache for this call; None follows
+            the response_cache config setting. Only temperature 0 is cached
+
+    Returns:
+        str: AI response or error message
+    """
+    if temperature is None:
+        temperature = get_temperature()
+    if on_token is None:
+        on_token = _on_token.get()
+    if stream or on_token is not None:
+        tokens = []
+        async for token in astream_response(prompt, model=model, system=system, personality=personality,
+                                            retries=retries, temperature=temperature, cache=cache):
+            if on_token is not None:
+                on_token(token)
+            tokens.append(token)
+        return "".join(tokens)
+
+    cached, save = _cached(cache, temperature, model, system, prompt)
+    if cached is not None:
+        return cached
+
+    model = await _awarm_up(model)
+
+    # Check for empty prompt
+    if not prompt.strip():
+        return "⚠️ Empty prompt."
+
+    client = get_async_openai_client()
+
+    try:
+        response = await _acomplete(client, prompt, model, system, personality, retries, temperature=temperature)
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+    save(response)
+    return response
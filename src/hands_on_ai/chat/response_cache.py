@@ -0,0 +1,188 @@
+"""
+Persistent LLM response cache for the chat module.
+
+Responses are stored in SQLite under the config directory, keyed by a
+SHA-256 hash of the model, messages and sampling parameters, so repeating
+a deterministic request (temperature 0) returns the stored answer instead
+of generating it again. Entries expire after a TTL and the least recently
+used are evicted beyond a size cap.
+
+The cache is off unless the `response_cache` config key is true or a call
+passes cache=True. Calls that don't pass a temperature use the
+`temperature` config key, so setting it to 0 makes the chat CLIs, bots
+and batches cacheable.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from ..config import CONFIG_DIR, load_config, log
+
+DEFAULT_CACHE_PATH = CONFIG_DIR / "response_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+# Database path -> shared ResponseCache
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def request_key(model, messages, params=None):
+    """
+    Hash a chat request for use as a cache key.
+
+    Args:
+        model: Model name
+        messages: Chat messages sent to the model
+        params: Sampling parameters sent with the request
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    payload = json.dumps({"model": model, "messages": messages, "params": params or {}},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(temperature):
+    """Check whether requests with this temperature always give the same response."""
+    return temperature is not None and temperature == 0
+
+
+class ResponseCache:
+    """
+    SQLite-backed store of LLM responses with a TTL and LRU eviction.
+
+    Hit and miss counts are kept for the lifetime of the object.
+    """
+
+    def __init__(self, path=None, max_entries=None, ttl=None):
+        """
+        Args:
+            path: SQLite database file (default: ~/.hands-on-ai/response_cache.sqlite3)
+            max_entries: Entries kept before least recently used are evicted
+            ttl: Seconds a response stays valid (0 = never expires)
+        """
+        self.path = path or DEFAULT_CACHE_PATH
+        self.max_entries = max_entries or DEFAULT_MAX_ENTRIES
+        self.ttl = DEFAULT_TTL if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Losing the last few writes in a power cut is fine for a cache, and
+        # skipping the fsync keeps hits (which record their use) fast
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key: Request key from request_key()
+
+        Returns:
+            str or None: The response, or None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response):
+        """
+        Store a response and evict the least recently used beyond max_entries.
+
+        Args:
+            key: Request key from request_key()
+            response: Response text
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN"
+                    " (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                log.debug(f"Evicted {count - self.max_entries} responses from cache")
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counts and the number of stored entries."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def get_response_cache(enabled=None, config=None):
+    """
+    Get the shared response cache, or None if it is not in use.
+
+    Controlled by the `response_cache` (on/off), `response_cache_ttl` and
+    `response_cache_max_entries` config keys.
+
+    Args:
+        enabled: True or False to override the `response_cache` setting
+        config: Already loaded config, to save reading it again
+
+    Returns:
+        ResponseCache or None
+    """
+    if enabled is False:
+        return None
+    config = config or load_config()
+    if enabled is None and not config.get("response_cache", False):
+        return None
+    max_entries = config.get("response_cache_max_entries", DEFAULT_MAX_ENTRIES)
+    ttl = config.get("response_cache_ttl", DEFAULT_TTL)
+    with _caches_lock:
+        cache = _caches.get(DEFAULT_CACHE_PATH)
+        if cache is None:
+            try:
+                cache = ResponseCache(DEFAULT_CACHE_PATH, max_entries, ttl)
+            except sqlite3.Error as e:
+                log.warning(f"Response cache unavailable: {e}")
+                return None
+            _caches[DEFAULT_CACHE_PATH] = cache
+        cache.max_entries = max_entries
+        cache.ttl = ttl
+        return cache
@@ -0,0 +1,112 @@
+"""
+Shared OpenAI-compatible API clients.
+
+Every LLM call in the package goes through get_openai_client(), which
+keeps one client per (base URL, API key, timeout) for the life of the
+process. Each client owns a keep-alive connection pool, so repeated calls
+skip connection and TLS set-up, and OpenAI clients are thread-safe, so
+one client is shared by every caller.
+
+get_async_openai_client() does the same for asyncio code. An async
+client's connections belong to the event loop that opened them, so there
+is one async client per event loop as well.
+"""
+
+import asyncio
+import threading
+import weakref
+from .config import load_config, DEFAULT_TIMEOUT
+
+# Placeholder key for local servers such as Ollama, which ignore it
+PLACEHOLDER_API_KEY = "hands-on-ai"
+
+# (base URL, API key, timeout) -> OpenAI client
+_clients = {}
+# Event loop -> {(base URL, API key, timeout) -> AsyncOpenAI client}
+_async_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def openai_base_url(server_url):
+    """Get the OpenAI-compatible API base URL (ending in /v1) for a server URL."""
+    server_url = server_url.rstrip("/")
+    return server_url if server_url.endswith("/v1") else server_url + "/v1"
+
+
+def _client_key(server_url, api_key, timeout):
+    """Fill in settings from config and build the (base URL, API key, timeout) cache key."""
+    if server_url is None or api_key is None or timeout is None:
+        config = load_config()
+        server_url = server_url or config["server"]
+        api_key = api_key if api_key is not None else config.get("api_key", "")
+        timeout = timeout or config.get("timeout", DEFAULT_TIMEOUT)
+    return (openai_base_url(server_url), api_key or PLACEHOLDER_API_KEY, float(timeout))
+
+
+def get_openai_client(server_url=None, api_key=None, timeout=None):
+    """
+    Get the shared OpenAI client for a server.
+
+    Args:
+        server_url: Server URL, with or without /v1 (default from config)
+        api_key: API key (default from config, or a placeholder for local servers)
+        timeout: Default request timeout in seconds (default from config)
+
+    Returns:
+        openai.OpenAI: Client reused across calls with the same settings
+    """
+    key = _client_key(server_url, api_key, timeout)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            # Imported here: the openai package takes over a second to import,
+            # which every CLI command would otherwise pay at start-up
+            from openai import OpenAI
+
+            client = OpenAI(base_url=key[0], api_key=key[1], timeout=key[2])
+            _clients[key] = client
+        return client
+
+
+def get_async_openai_client(server_url=None, api_key=None, timeout=None):
+    """
+    Get the shared AsyncOpenAI client for a server and the running event loop.
+
+    Must be called from a coroutine.
+
+    Args:
+        server_url: Server URL, with or without /v1 (default from config)
+        api_key: API key (default from config, or a placeholder for local servers)
+        timeout: Default request timeout in seconds (default from config)
+
+    Returns:
+        openai.AsyncOpenAI: Client reused across calls on this event loop
+    """
+    key = _client_key(server_url, api_key, timeout)
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            from openai import AsyncOpenAI
+
+            client = AsyncOpenAI(base_url=key[0], api_key=key[1], timeout=key[2])
+            clients[key] = client
+        return client
+
+
+def close_clients():
+    """Close every shared client and its connections."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+async def aclose_clients():
+    """Close every shared async client of the running event loop."""
+    with _clients_lock:
+        clients = list(_async_clients.pop(asyncio.get_running_loop(), {}).values())
+    for client in clients:
+        await client.close()
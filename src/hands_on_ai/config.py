@@ -13,6 +13,15 @@ DEFAULT_SERVER = "http://localhost:11434"
 DEFAULT_MODEL = "llama3"
 DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
 DEFAULT_CHUNK_SIZE = 500
+DEFAULT_CHUNK_OVERLAP = 0
+DEFAULT_RETRIEVAL_MODE = "dense"
+DEFAULT_EMBEDDING_BATCH_SIZE = 32
+DEFAULT_EMBEDDING_WORKERS = 4
+DEFAULT_EMBEDDING_RETRIES = 3
+DEFAULT_PARSE_WORKERS = 1
+DEFAULT_DEDUP_MAX_DISTANCE = 3
+DEFAULT_BATCH_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 60
 CONFIG_DIR = Path.home() / ".hands-on-ai"
 CONFIG_PATH = CONFIG_DIR / "config.json"
 
@@ -52,6 +61,18 @@ def load_default_config():
             "model": DEFAULT_MODEL,
             "embedding_model": DEFAULT_EMBEDDING_MODEL,
             "chunk_size": DEFAULT_CHUNK_SIZE,
+            "chunk_overlap": DEFAULT_CHUNK_OVERLAP,
+            "retrieval_mode": DEFAULT_RETRIEVAL_MODE,
+            "embedding_batch_size": DEFAULT_EMBEDDING_BATCH_SIZE,
+            "embedding_workers": DEFAULT_EMBEDDING_WORKERS,
+            "embedding_retries": DEFAULT_EMBEDDING_RETRIES,
+            "embedding_cache": True,
+            "parse_workers": DEFAULT_PARSE_WORKERS,
+            "dedup_max_distance": DEFAULT_DEDUP_MAX_DISTANCE,
+            "batch_concurrency": DEFAULT_BATCH_CONCURRENCY,
+            "temperature": None,
+            "response_cache": False,
+            "timeout": DEFAULT_TIMEOUT,
         }
 
 
@@ -159,6 +180,56 @@ def get_chunk_size():
     return load_config()["chunk_size"]
 
 
+def get_chunk_overlap():
+    """Get the number of words shared by consecutive chunks from config."""
+    return load_config().get("chunk_overlap", DEFAULT_CHUNK_OVERLAP)
+
+
+def get_retrieval_mode():
+    """Get the default RAG retrieval mode ("dense", "hybrid" or "lexical") from config."""
+    return load_config().get("retrieval_mode", DEFAULT_RETRIEVAL_MODE)
+
+
+def get_embedding_batch_size():
+    """Get the number of chunks sent per embedding request from config."""
+    return load_config().get("embedding_batch_size", DEFAULT_EMBEDDING_BATCH_SIZE)
+
+
+def get_embedding_workers():
+    """Get the number of concurrent embedding requests from config."""
+    return load_config().get("embedding_workers", DEFAULT_EMBEDDING_WORKERS)
+
+
+def get_embedding_retries():
+    """Get the number of retries for a failed embedding request from config."""
+    return load_config().get("embedding_retries", DEFAULT_EMBEDDING_RETRIES)
+
+
+def get_parse_workers():
+    """Get the number of processes used to parse documents from config (0 = all cores)."""
+    return load_config().get("parse_workers", DEFAULT_PARSE_WORKERS)
+
+
+def get_dedup_max_distance():
+    """Get the SimHash bit distance under which indexed chunks count as near-duplicates."""
+    return load_config().get("dedup_max_distance", DEFAULT_DEDUP_MAX_DISTANCE)
+
+
+def get_batch_concurrency():
+    """Get the number of prompts a chat batch keeps in flight at once from config."""
+    return load_config().get("batch_concurrency", DEFAULT_BATCH_CONCURRENCY)
+
+
+def get_temperature():
+    """Get the default sampling temperature from config (None leaves it to the server)."""
+    return load_config().get("temperature")
+
+
+def get_timeout():
+    """Get the request timeout in seconds from config."""
+    return load_config().get("timeout", DEFAULT_TIMEOUT)
+
+
 def get_api_key():
     """Get the API key from config if available."""
     return load_config().get("api_key", "")
\ No newline at end of file
@@ -12,8 +12,8 @@ This module provides centralized functionality for working with LLM models:
 import requests
 import re
 from typing import Dict, List, Any, Optional, Tuple
-from openai import OpenAI
-from .config import get_server_url, get_api_key, log
+from .config import log
+from .clients import get_openai_client
 
 def normalize_model_name(model_name: str) -> str:
     """
@@ -50,40 +50,26 @@ def get_model_info(model_name: str) -> Optional[Dict[str, Any]]:
     if normalized_name != original_name:
         model_variations.append(normalized_name)
     
-    server_url = get_server_url()
-    
-    # Add /v1 suffix for OpenAI-compatible endpoints
-    if not server_url.endswith('/v1'):
-        server_url = server_url.rstrip('/') + '/v1'
-    
-    # Try each variation
+    # List the server's models once and check every variation against them
+    try:
+        models_response = get_openai_client().models.list()
+    except Exception as e:
+        log.debug(f"Error accessing model API for {model_name}: {e}")
+        return None
+
+    models_by_id = {model.id: model for model in models_response.data}
     for model_variant in model_variations:
         log.debug(f"Checking model: {model_variant}")
-        
-        try:
-            # Create OpenAI client
-            client = OpenAI(
-                base_url=server_url,
-                api_key=get_api_key() or "hands-on-ai"
-            )
-            
-            # Get list of models and check if our model exists
-            models_response = client.models.list()
-            
-            for model in models_response.data:
-                if model.id == model_variant:
-                    log.debug(f"Found model: {model_variant}")
-                    # Return basic model info in expected format
-                    return {
-                        "name": model.id,
-                        "parameters": {},  # Not available in OpenAI format
-                        "template": "",    # Not available in OpenAI format
-                        "created": getattr(model, 'created', 0)
-                    }
-            
-        except Exception as e:
-            log.debug(f"Error accessing model API for {model_variant}: {e}")
-            continue
+        model = models_by_id.get(model_variant)
+        if model is not None:
+            log.debug(f"Found model: {model_variant}")
+            # Return basic model info in expected format
+            return {
+                "name": model.id,
+                "parameters": {},  # Not available in OpenAI format
+                "template": "",    # Not available in OpenAI format
+                "created": getattr(model, 'created', 0)
+            }
     
     # No matching model found
     log.debug(f"Model not found: {model_name}")
@@ -108,21 +94,9 @@ def list_models() -> List[Dict[str, Any]]:
     Returns:
         List[Dict]: List of model information dictionaries
     """
-    server_url = get_server_url()
-    
-    # Add /v1 suffix for OpenAI-compatible endpoints
-    if not server_url.endswith('/v1'):
-        server_url = server_url.rstrip('/') + '/v1'
-    
     try:
-        # Create OpenAI client
-        client = OpenAI(
-            base_url=server_url,
-            api_key=get_api_key() or "hands-on-ai"
-        )
-        
         # Use OpenAI-compatible models endpoint
-        models_response = client.models.list()
+        models_response = get_openai_client().models.list()
         
         # Convert to the expected format
         models = []
@@ -5,23 +5,61 @@ RAG module - Retrieval-Augmented Generation for document Q&A.
 from .utils import (
     load_text_file,
     chunk_text,
+    chunk_spans,
     get_embeddings,
+    embed_queries,
+    normalize_vectors,
     save_index_with_sources,
     load_index_with_sources,
+    load_index_cached,
+    clear_index_cache,
     get_top_k,
+    get_top_k_many,
+    default_index_path,
     get_sample_docs_path,
     list_sample_docs,
     copy_sample_docs
 )
+from .vectors import top_k_indices
+from .store import IndexStore, IndexWriter
+from .shards import ShardedIndex, register_shard, remove_shard
+from .embeddings import EmbeddingClient, get_embedding_client
+from .embedding_cache import EmbeddingCache, get_embedding_cache
+from .query_cache import QueryCache, get_query_cache
+from .server import RetrievalClient, get_retrieval_client
 
 # Core RAG functions
 __all__ = [
     "load_text_file",
     "chunk_text",
+    "chunk_spans",
     "get_embeddings",
+    "embed_queries",
+    "normalize_vectors",
+    "top_k_indices",
     "save_index_with_sources",
     "load_index_with_sources",
+    "load_index_cached",
+    "clear_index_cache",
     "get_top_k",
+    "get_top_k_many",
+    "default_index_path",
+    # Index storage
+    "IndexStore",
+    "IndexWriter",
+    "ShardedIndex",
+    "register_shard",
+    "remove_shard",
+    # Embedding client
+    "EmbeddingClient",
+    "get_embedding_client",
+    "EmbeddingCache",
+    "get_embedding_cache",
+    "QueryCache",
+    "get_query_cache",
+    # Retrieval server client
+    "RetrievalClient",
+    "get_retrieval_client",
     # Sample document utilities
     "get_sample_docs_path",
     "list_sample_docs",
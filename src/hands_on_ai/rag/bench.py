@@ -0,0 +1,402 @@
+"""
+Benchmarks for the RAG indexing and query paths.
+
+`rag bench` indexes corpora of several sizes and reports per-stage
+indexing throughput and query latency percentiles as JSON-friendly dicts.
+By default the corpus is synthetic and embeddings come from a local fake
+server returning deterministic vectors, so the numbers measure this
+package (parsing, chunking, batching, storage, search) rather than an
+embedding model. Point it at a real server to size embedding hardware.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import json
+import os
+import platform
+import tempfile
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from .. import __version__
+from ..config import get_chunk_size, get_embedding_model
+from .pipeline import run_index_pipeline
+from .store import IndexWriter, IndexStore
+from .utils import RETRIEVAL_MODES, get_embeddings
+
+DEFAULT_SIZES = (100, 1000)
+DEFAULT_DOCUMENT_WORDS = 1000
+DEFAULT_QUERIES = 200
+DEFAULT_DIM = 768
+
+# Synthetic vocabulary size; word frequencies follow Zipf's law like real text
+VOCABULARY_SIZE = 20000
+ZIPF_EXPONENT = 1.07
+SENTENCE_WORDS = 15
+
+# Words per sampled query
+QUERY_WORDS = (3, 8)
+
+
+def _vocabulary(rng):
+    """Random pronounceable-ish words, most frequent first."""
+    letters = np.array(list("etaoinshrdlucmfwypvbgkqjxz"))
+    lengths = rng.integers(2, 10, size=VOCABULARY_SIZE)
+    return ["".join(rng.choice(letters, size=n)) for n in lengths]
+
+
+def generate_corpus(directory, documents, words_per_document=DEFAULT_DOCUMENT_WORDS, seed=0):
+    """
+    Write a synthetic text corpus.
+
+    Args:
+        directory: Directory to write doc00000.txt, doc00001.txt, ... into
+        documents: Number of documents
+        words_per_document: Words in each document
+        seed: Random seed; the same seed always gives the same corpus
+
+    Returns:
+        list: Paths of the written documents
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(_vocabulary(rng))
+    weights = 1.0 / np.arange(1, VOCABULARY_SIZE + 1) ** ZIPF_EXPONENT
+    weights /= weights.sum()
+    paths = []
+    for d in range(documents):
+        words = vocabulary[rng.choice(VOCABULARY_SIZE, size=words_per_document, p=weights)]
+        sentences = [" ".join(words[i:i + SENTENCE_WORDS]).capitalize() + "."
+                     for i in range(0, len(words), SENTENCE_WORDS)]
+        path = directory / f"doc{d:05d}.txt"
+        path.write_text(" ".join(sentences), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def fake_embedding(text, dim=DEFAULT_DIM):
+    """Deterministic pseudo-random embedding of a text."""
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    return np.random.default_rng(seed).standard_normal(dim, dtype=np.float32)
+
+
+class FakeEmbeddingServer:
+    """
+    Local embedding server for benchmarks.
+
+    Serves Ollama's /api/embed and the OpenAI-compatible /v1/embeddings on
+    a background thread, answering with fake_embedding() vectors after an
+    optional simulated latency per request.
+    """
+
+    def __init__(self, dim=DEFAULT_DIM, latency=0.0, host="127.0.0.1", port=0):
+        """
+        Args:
+            dim: Embedding dimensions
+            latency: Seconds to wait before answering each request
+            host, port: Address to listen on (port 0 picks a free port)
+        """
+        self.dim = dim
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                texts = body.get("input", [])
+                texts = [texts] if isinstance(texts, str) else texts
+                vectors = [fake_embedding(text, server.dim).tolist() for text in texts]
+                if self.path == "/api/embed":
+                    payload = {"embeddings": vectors}
+                elif self.path == "/v1/embeddings":
+                    payload = {"data": [{"index": i, "embedding": v} for i, v in enumerate(vectors)]}
+                else:
+                    self.send_error(404)
+                    return
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def start(self):
+        """Start answering requests on a daemon thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-embed", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server and release its port."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def latency_stats(seconds):
+    """
+    Summarise latencies.
+
+    Args:
+        seconds: List of latencies in seconds
+
+    Returns:
+        dict: Mean, p50, p90, p99 and max in milliseconds
+    """
+    if not seconds:
+        return {}
+    ms = np.asarray(seconds) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {"mean_ms": float(ms.mean()), "p50_ms": float(p50), "p90_ms": float(p90),
+            "p99_ms": float(p99), "max_ms": float(ms.max())}
+
+
+def _rate(amount, seconds):
+    return amount / seconds if seconds > 0 else None
+
+
+def _directory_bytes(path):
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def sample_queries(store, n, seed=0):
+    """
+    Draw queries from random windows of indexed chunks.
+
+    Args:
+        store: IndexStore to sample from
+        n: Number of queries
+        seed: Random seed
+
+    Returns:
+        list: Query strings
+    """
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in rng.integers(0, len(store), size=n):
+        words = store.chunk(int(i)).split()
+        size = int(rng.integers(*QUERY_WORDS, endpoint=True))
+        start = int(rng.integers(0, max(len(words) - size, 0) + 1))
+        queries.append(" ".join(words[start:start + size]) or "query")
+    return queries
+
+
+def bench_queries(store, queries, k=3, modes=RETRIEVAL_MODES, server_url=None, model=None, nprobe=None):
+    """
+    Time queries against an open index.
+
+    Dense and hybrid latencies include embedding the query; the `embed`
+    entry shows that part alone. `batch` times one search_many() call over
+    every query with precomputed embeddings.
+
+    Args:
+        store: IndexStore to search
+        queries: Query strings
+        k: Results per query
+        modes: Retrieval modes to time
+        server_url: Embedding server (default from config)
+        model: Embedding model
+        nprobe: IVF clusters to probe
+
+    Returns:
+        dict: Mode -> latency_stats(), plus embed and batch entries
+    """
+    def embed(query):
+        return get_embeddings([query], model=model, use_cache=False, server_url=server_url)[0]
+
+    # Warm up connections, caches and lazily loaded structures
+    warm_vector = embed(queries[0])
+    for mode in modes:
+        if mode == "dense":
+            store.search(warm_vector, k, nprobe=nprobe)
+        elif mode == "lexical":
+            store.lexical_search(queries[0], k)
+        else:
+            store.hybrid_search(queries[0], warm_vector, k, nprobe=nprobe)
+
+    timings = {name: [] for name in ("embed", *modes)}
+    vectors = []
+    for query in queries:
+        start = time.perf_counter()
+        vector = embed(query)
+        embed_seconds = time.perf_counter() - start
+        timings["embed"].append(embed_seconds)
+        vectors.append(vector)
+        for mode in modes:
+            start = time.perf_counter()
+            if mode == "dense":
+                store.search(vector, k, nprobe=nprobe)
+            elif mode == "lexical":
+                store.lexical_search(query, k)
+            else:
+                store.hybrid_search(query, vector, k, nprobe=nprobe)
+            elapsed = time.perf_counter() - start
+            timings[mode].append(elapsed if mode == "lexical" else elapsed + embed_seconds)
+
+    results = {name: latency_stats(values) for name, values in timings.items()}
+    start = time.perf_counter()
+    store.search_many(np.array(vectors), k, nprobe=nprobe)
+    elapsed = time.perf_counter() - start
+    results["batch"] = {"queries": len(queries), "seconds": elapsed, "queries_per_second": _rate(len(queries), elapsed)}
+    return results
+
+
+def bench_index(files, path, chunk_size, server_url=None, model=None, parse_workers=None, batch_size=None,
+                embed_workers=None, overlap=0, dedup=True, ivf=False, quantization=None):
+    """
+    Build an index from files and time each stage.
+
+    The embedding cache is bypassed so every chunk is really embedded.
+
+    Returns:
+        dict: Chunk counts, total and per-stage seconds and throughput,
+        and the index size on disk
+    """
+    corpus_bytes = sum(Path(f).stat().st_size for f in files)
+    start = time.perf_counter()
+    with IndexWriter(path, model=model) as writer:
+        stats = run_index_pipeline(
+            files, writer, chunk_size, batch_size=batch_size, workers=embed_workers, use_cache=False,
+            model=model, parse_workers=parse_workers, overlap=overlap, dedup=dedup, server_url=server_url,
+        )
+        committed = time.perf_counter()
+        writer.commit(ivf_clusters=0 if ivf else None, quantization=quantization)
+    end = time.perf_counter()
+    chunks = stats["chunks"]
+    return {
+        "files": stats["files"],
+        "failed": stats["failed"],
+        "bytes": corpus_bytes,
+        "chunks": chunks,
+        "duplicates": stats["duplicates"],
+        "seconds": end - start,
+        "chunks_per_second": _rate(chunks, end - start),
+        "stages": {
+            "parse": {"seconds": stats["parse_seconds"], "mb_per_second": _rate(corpus_bytes / 1e6, stats["parse_seconds"])},
+            "chunk": {"seconds": stats["chunk_seconds"], "mb_per_second": _rate(corpus_bytes / 1e6, stats["chunk_seconds"])},
+            "dedup": {"seconds": stats["dedup_seconds"],
+                      "chunks_per_second": _rate(chunks + stats["duplicates"], stats["dedup_seconds"])},
+            "embed": {"seconds": stats["embed_seconds"], "chunks_per_second": _rate(chunks, stats["embed_seconds"])},
+            "write": {"seconds": stats["write_seconds"], "chunks_per_second": _rate(chunks, stats["write_seconds"])},
+            "commit": {"seconds": end - committed},
+        },
+        "disk_bytes": _directory_bytes(path),
+    }
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, files=None, words_per_document=DEFAULT_DOCUMENT_WORDS, chunk_size=None,
+                  queries=DEFAULT_QUERIES, k=3, modes=RETRIEVAL_MODES, dim=DEFAULT_DIM, latency=0.0,
+                  server_url=None, model=None, parse_workers=None, batch_size=None, embed_workers=None,
+                  overlap=0, dedup=True, ivf=False, quantization=None, seed=0, work_dir=None, on_run=None):
+    """
+    Benchmark indexing and querying at several corpus sizes.
+
+    Args:
+        sizes: Corpus sizes to test, in documents
+        files: Existing documents to use instead of a synthetic corpus;
+            each size indexes the first `size` of them
+        words_per_document: Words per synthetic document
+        chunk_size: Words per chunk (default from config)
+        queries: Queries timed per size
+        k: Results per query
+        modes: Retrieval modes to time
+        dim: Dimensions of the fake embeddings
+        latency: Simulated seconds per fake embedding request
+        server_url: Use this embedding server instead of a fake one
+        model: Embedding model (default from config)
+        parse_workers, batch_size, embed_workers, overlap, dedup: Indexing
+            settings, as for run_index_pipeline()
+        ivf, quantization: Build IVF / quantised indexes as well
+        seed: Random seed for the corpus and queries
+        work_dir: Directory for corpora and indexes (default: a temporary
+            directory that is removed afterwards)
+        on_run: Optional callback(result) called after each size
+
+    Returns:
+        dict: Environment, settings and one result per size
+    """
+    chunk_size = chunk_size or get_chunk_size()
+    model = model or get_embedding_model()
+    sizes = sorted(set(sizes))
+    temp_dir = None
+    if work_dir is None:
+        temp_dir = tempfile.TemporaryDirectory(prefix="rag-bench-")
+        work_dir = temp_dir.name
+    work_dir = Path(work_dir)
+    fake_server = None if server_url else FakeEmbeddingServer(dim=dim, latency=latency).start()
+
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "corpus": "files" if files is not None else "synthetic",
+            "words_per_document": None if files is not None else words_per_document,
+            "chunk_size": chunk_size, "overlap": overlap, "dedup": dedup, "queries": queries, "k": k,
+            "embedding": server_url or "fake", "model": model, "dim": None if server_url else dim,
+            "latency_ms": None if server_url else latency * 1000,
+            "parse_workers": parse_workers, "batch_size": batch_size, "embed_workers": embed_workers,
+            "ivf": ivf, "quantization": quantization, "seed": seed,
+        },
+        "runs": [],
+    }
+    try:
+        if files is None:
+            files = generate_corpus(work_dir / "corpus", sizes[-1], words_per_document, seed=seed)
+        url = server_url or fake_server.url
+        for size in sizes:
+            subset = files[:size]
+            index_path = work_dir / f"index-{len(subset)}"
+            result = {"documents": len(subset)}
+            result["index"] = bench_index(
+                subset, index_path, chunk_size, server_url=url, model=model, parse_workers=parse_workers,
+                batch_size=batch_size, embed_workers=embed_workers, overlap=overlap, dedup=dedup,
+                ivf=ivf, quantization=quantization,
+            )
+            start = time.perf_counter()
+            store = IndexStore.open(index_path)
+            result["open_seconds"] = time.perf_counter() - start
+            if len(store) and queries:
+                result["queries"] = bench_queries(store, sample_queries(store, queries, seed=seed), k=k,
+                                                  modes=modes, server_url=url, model=model)
+            del store
+            report["runs"].append(result)
+            if on_run:
+                on_run(result)
+            if len(subset) < size:
+                break
+    finally:
+        if fake_server is not None:
+            fake_server.stop()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+    return report
@@ -0,0 +1,198 @@
+"""
+BM25 lexical search for RAG indexes.
+
+Chunks are tokenised into lowercase words and stored as an inverted index:
+a term dictionary plus array-backed postings, so a query only touches the
+postings of its own terms. Lexical search needs no embedding server and
+catches exact keywords (course codes, error messages) that dense vectors
+can miss.
+
+Files in an index directory:
+
+- bm25_terms.json    terms, in term-id order
+- bm25_offsets.npy   postings of term t are at offsets[t]:offsets[t + 1]
+- bm25_docs.npy      int32 chunk id of each posting
+- bm25_tfs.npy       uint16 term frequency of each posting
+- bm25_lengths.npy   int32 token count of each chunk
+"""
+
+from collections import Counter
+import json
+import re
+import numpy as np
+
+TOKEN = re.compile(r"\w+")
+
+# Standard BM25 parameters: term-frequency saturation and length normalisation
+K1 = 1.2
+B = 0.75
+
+# Chunks tokenised before their postings are packed into arrays
+BUILD_BLOCK_SIZE = 4096
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens."""
+    return TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """Term dictionary and postings arrays for BM25 scoring."""
+
+    def __init__(self, terms, offsets, docs, tfs, lengths, k1=K1, b=B):
+        self.terms = terms
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.lengths = lengths
+        self.k1 = k1
+        self.b = b
+        self.avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        # Per-chunk length normalisation, the same for every query
+        self._norm = (k1 * (1 - b + b * lengths / max(self.avg_length, 1e-9))).astype(np.float32)
+        self._term_ids = None
+
+    @classmethod
+    def build(cls, chunks, k1=K1, b=B):
+        """
+        Build an inverted index from chunk texts.
+
+        Args:
+            chunks: Iterable of chunk texts, in chunk-id order
+            k1, b: BM25 parameters
+
+        Returns:
+            BM25Index
+        """
+        vocabulary = {}
+        blocks = []
+        lengths = []
+        term_ids, doc_ids, tfs = [], [], []
+
+        def pack():
+            blocks.append((
+                np.array(term_ids, dtype=np.int32),
+                np.array(doc_ids, dtype=np.int32),
+                np.minimum(np.array(tfs, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16),
+            ))
+            term_ids.clear()
+            doc_ids.clear()
+            tfs.clear()
+
+        for doc_id, chunk in enumerate(chunks):
+            tokens = tokenize(chunk)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+            if (doc_id + 1) % BUILD_BLOCK_SIZE == 0:
+                pack()
+        pack()
+
+        all_terms = np.concatenate([block[0] for block in blocks])
+        # A stable sort keeps each term's postings in chunk order
+        order = np.argsort(all_terms, kind="stable")
+        counts = np.bincount(all_terms, minlength=len(vocabulary))
+        return cls(
+            terms=list(vocabulary),
+            offsets=np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            docs=np.concatenate([block[1] for block in blocks])[order],
+            tfs=np.concatenate([block[2] for block in blocks])[order],
+            lengths=np.array(lengths, dtype=np.int32),
+            k1=k1,
+            b=b,
+        )
+
+    def info(self):
+        """Describe the index for the index header."""
+        return {"terms": len(self.terms), "postings": len(self.docs), "k1": self.k1, "b": self.b}
+
+    def save(self, path):
+        with open(path / "bm25_terms.json", "w", encoding="utf-8") as f:
+            json.dump(self.terms, f)
+        np.save(path / "bm25_offsets.npy", self.offsets)
+        np.save(path / "bm25_docs.npy", self.docs)
+        np.save(path / "bm25_tfs.npy", self.tfs)
+        np.save(path / "bm25_lengths.npy", self.lengths)
+
+    @classmethod
+    def load(cls, path, info):
+        with open(path / "bm25_terms.json", encoding="utf-8") as f:
+            terms = json.load(f)
+        return cls(
+            terms=terms,
+            offsets=np.load(path / "bm25_offsets.npy", mmap_mode="r"),
+            docs=np.load(path / "bm25_docs.npy", mmap_mode="r"),
+            tfs=np.load(path / "bm25_tfs.npy", mmap_mode="r"),
+            lengths=np.load(path / "bm25_lengths.npy"),
+            k1=info.get("k1", K1),
+            b=info.get("b", B),
+        )
+
+    def term_id(self, term):
+        """Look up a term's id, or None if it never occurs."""
+        if self._term_ids is None:
+            self._term_ids = {term: i for i, term in enumerate(self.terms)}
+        return self._term_ids.get(term)
+
+    def document_frequency(self, term):
+        """Count the chunks a term occurs in."""
+        term_id = self.term_id(term)
+        if term_id is None:
+            return 0
+        return int(self.offsets[term_id + 1] - self.offsets[term_id])
+
+    def scores(self, query, collection=None):
+        """
+        Score every chunk against a query.
+
+        Args:
+            query: Query text
+            collection: Optional collection_stats() of a larger collection
+                this index is part of (e.g. every shard of a sharded index),
+                used for IDF and length normalisation so that scores are
+                comparable across its parts
+
+        Returns:
+            ndarray: float32 BM25 score per chunk (0 where no term matches)
+        """
+        n = len(self.lengths)
+        scores = np.zeros(n, dtype=np.float32)
+        if n == 0:
+            return scores
+        total, frequencies, norm = n, None, self._norm
+        if collection is not None:
+            total, frequencies, avg_length = collection
+            norm = (self.k1 * (1 - self.b + self.b * self.lengths / max(avg_length, 1e-9))).astype(np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.term_id(term)
+            if term_id is None:
+                continue
+            start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+            docs = np.asarray(self.docs[start:end])
+            tfs = np.asarray(self.tfs[start:end], dtype=np.float32)
+            df = len(docs) if frequencies is None else frequencies[term]
+            idf = np.log1p((total - df + 0.5) / (df + 0.5))
+            # Each chunk appears at most once per term, so plain fancy indexing is safe
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm[docs])
+        return scores
+
+
+def collection_stats(indexes, query):
+    """
+    Combine the BM25 statistics of several indexes for one query.
+
+    Args:
+        indexes: BM25Index of each part of the collection
+        query: Query text
+
+    Returns:
+        tuple: (chunk count, term -> document frequency, average chunk
+        length) to pass to BM25Index.scores()
+    """
+    total = sum(len(index.lengths) for index in indexes)
+    tokens = sum(int(index.lengths.sum()) for index in indexes)
+    frequencies = {term: sum(index.document_frequency(term) for index in indexes)
+                   for term in set(tokenize(query))}
+    return total, frequencies, tokens / total if total else 0.0
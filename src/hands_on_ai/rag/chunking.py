@@ -0,0 +1,93 @@
+"""
+Offset-based text chunking.
+
+Chunks are described as (start, end) character spans into the original
+text instead of re-joined word lists, so chunking a large document makes
+one pass over it without copying it, and every chunk can be traced back to
+its position in the source.
+"""
+
+from functools import lru_cache
+import re
+
+WORD = re.compile(r"\S+")
+
+# A sentence ends with . ! or ?, optionally followed by closing quotes or brackets
+SENTENCE_END = re.compile(r"[.!?][\"'”’)\]]*(?=\s|$)")
+
+
+@lru_cache(maxsize=32)
+def _chunk_pattern(chunk_size, overlap):
+    """
+    Match up to chunk_size whitespace-separated words in one regex call.
+
+    Group 1 covers the first chunk_size - overlap words, so the next chunk
+    starts where it ends without scanning the overlap twice.
+    """
+    return re.compile(r"(\S+(?:\s+\S+){0,%d})(?:\s+\S+){0,%d}" % (chunk_size - overlap - 1, overlap))
+
+
+@lru_cache(maxsize=32)
+def _skip_pattern(n_words):
+    """Match n_words words and the whitespace after them."""
+    return re.compile(r"(?:\S+\s+){%d}" % n_words)
+
+
+def _skip_words(text, pos, n_words):
+    """Return the offset of the word n_words after the word starting at pos."""
+    if n_words <= 0:
+        return pos
+    match = _skip_pattern(n_words).match(text, pos)
+    return match.end() if match else len(text)
+
+
+def iter_chunk_spans(text, chunk_size, overlap=0, sentence_aware=False):
+    """
+    Split text into chunks of up to chunk_size words, as character spans.
+
+    Args:
+        text: Text to chunk
+        chunk_size: Maximum words per chunk
+        overlap: Words repeated from the end of one chunk at the start of
+            the next
+        sentence_aware: End a chunk after the last sentence that finishes
+            in its second half, rather than mid-sentence
+
+    Yields:
+        tuple: (start, end) character offsets; text[start:end] is the chunk
+
+    Raises:
+        ValueError: If chunk_size or overlap is out of range
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    if not 0 <= overlap < chunk_size:
+        raise ValueError(f"overlap must be between 0 and chunk_size - 1, got {overlap}")
+
+    chunk_pattern = _chunk_pattern(chunk_size, overlap)
+    pos = 0
+    while True:
+        match = chunk_pattern.search(text, pos)
+        if match is None:
+            return
+        start, end = match.span()
+        is_last = WORD.search(text, end) is None
+        next_pos = match.end(1)
+
+        if sentence_aware and not is_last:
+            middle = _skip_words(text, start, chunk_size // 2)
+            sentence = None
+            for sentence in SENTENCE_END.finditer(text, middle, end):
+                pass
+            if sentence is not None and sentence.end() < end:
+                end = sentence.end()
+                if overlap:
+                    n_words = chunk_size // 2 + len(WORD.findall(text, middle, end))
+                    next_pos = _skip_words(text, start, max(n_words - overlap, 1))
+                else:
+                    next_pos = end
+
+        yield start, end
+        if is_last:
+            return
+        pos = next_pos
@@ -3,7 +3,7 @@ CLI for the rag module.
 """
 
 import typer
-from .commands import index, ask, interactive, web
+from .commands import index, ask, interactive, web, bench, serve
 
 app = typer.Typer(help="RAG - Retrieval-Augmented Generation")
 
@@ -12,17 +12,20 @@ app.add_typer(index.app, name="index", help="Build a RAG index from files")
 app.add_typer(ask.app, name="ask", help="Ask questions using indexed documents")
 app.add_typer(interactive.app, name="interactive", help="Run interactive RAG chat")
 app.add_typer(web.app, name="web", help="Launch web interface for RAG")
+app.add_typer(bench.app, name="bench", help="Benchmark indexing and query performance")
+app.add_typer(serve.app, name="serve", help="Keep indexes loaded for fast rag ask / interactive queries")
 
 # Default command - show help
 @app.callback(invoke_without_command=True)
-def main():
+def main(ctx: typer.Context):
     """
     RAG module - Retrieval-Augmented Generation.
     
     Use 'rag index' to index documents and 'rag ask' to query them.
     """
-    import typer
-    typer.echo("Use 'rag --help' for available commands.")
+    # Keep subcommand output (e.g. `rag bench --json`) clean
+    if ctx.invoked_subcommand is None:
+        typer.echo("Use 'rag --help' for available commands.")
 
 
 if __name__ == "__main__":
@@ -2,14 +2,17 @@
 Ask command for the rag CLI - queries indexed documents.
 """
 
+from typing import List
 import typer
 from rich import print
 from rich.panel import Panel
 from rich.console import Console
+from rich.live import Live
 from pathlib import Path
-from ...config import CONFIG_DIR, get_model
-from ...chat import get_response
-from ..utils import get_top_k
+from ...config import get_model, log
+from ...chat import get_response, stream_response
+from ..utils import get_top_k, default_index_path, build_rag_prompt, RAG_SYSTEM_PROMPT
+from ..server import get_retrieval_client
 
 app = typer.Typer(help="Ask questions using indexed documents")
 
@@ -17,15 +20,21 @@ app = typer.Typer(help="Ask questions using indexed documents")
 @app.callback(invoke_without_command=True)
 def ask(
     query: str = typer.Argument(..., help="Question to ask"),
-    index_path: str = typer.Option(None, help="Path to index file (default: ~/.hands-on-ai/index.npz)"),
+    index_path: str = typer.Option(None, help="Path to index (default: ~/.hands-on-ai/index)"),
     show_context: bool = typer.Option(False, "--context", "-c", help="Show retrieved context"),
     show_scores: bool = typer.Option(False, "--scores", "-s", help="Show similarity scores"),
     k: int = typer.Option(3, help="Number of chunks to retrieve"),
+    nprobe: int = typer.Option(None, help="IVF clusters to search: higher is more accurate, lower is faster (0 = exhaustive)"),
+    mode: str = typer.Option(None, help="Retrieval mode: dense, hybrid or lexical (default: from config)"),
+    include: List[str] = typer.Option(None, "--include", help="Only search sources matching this glob (repeatable), e.g. '*.pdf'"),
+    exclude: List[str] = typer.Option(None, "--exclude", help="Skip sources matching this glob (repeatable)"),
+    use_server: bool = typer.Option(True, "--server/--no-server", help="Use a running 'rag serve' daemon if there is one"),
+    stream: bool = typer.Option(True, "--stream/--no-stream", help="Show the answer as it is generated"),
 ):
     """Ask a question using indexed documents."""
     # Determine the index path
     if index_path is None:
-        index_path = str(CONFIG_DIR / "index.npz")
+        index_path = str(default_index_path())
     
     index_path = Path(index_path)
     if not index_path.exists():
@@ -37,15 +46,32 @@ def ask(
     console = Console()
     console.print(f"🔍 Searching for: [bold cyan]{query}[/bold cyan]")
     
-    try:
-        if show_scores:
-            context, scores = get_top_k(query, index_path, k=k, return_scores=True)
-        else:
-            context = get_top_k(query, index_path, k=k)
-            scores = None
-    except Exception as e:
-        print(f"[red]❌ Error retrieving context: {e}[/red]")
-        raise typer.Exit(1)
+    options = dict(k=k, nprobe=nprobe, mode=mode, include=include, exclude=exclude)
+    context = answer = None
+    client = get_retrieval_client(index_path) if use_server else None
+    if client is not None:
+        # The daemon has the index loaded; let it answer too when it can,
+        # unless the answer is to be streamed here as it is generated
+        try:
+            if client.answers and not stream:
+                console.print("🤖 [bold]Generating answer...[/bold]")
+                answer, context, scores = client.ask(query, index_path, model=get_model(), **options)
+            else:
+                context, scores = client.get_top_k(query, index_path, return_scores=True, **options)
+        except ConnectionError as e:
+            log.debug(f"{e}; searching locally")
+        except Exception as e:
+            print(f"[red]❌ Error retrieving context: {e}[/red]")
+            raise typer.Exit(1)
+
+    if context is None:
+        try:
+            context, scores = get_top_k(query, index_path, return_scores=True, **options)
+        except Exception as e:
+            print(f"[red]❌ Error retrieving context: {e}[/red]")
+            raise typer.Exit(1)
+    if not show_scores:
+        scores = None
     
     # Show retrieved context if requested
     if show_context:
@@ -55,22 +81,26 @@ def ask(
             console.print(f"\n[bold cyan]Source {i+1}: {source}{score_text}[/bold cyan]")
             console.print(Panel(chunk[:500] + "..." if len(chunk) > 500 else chunk))
     
-    # Build prompt with context
-    prompt = f"Question: {query}\n\nContext:\n"
-    for chunk, source in context:
-        prompt += f"- {chunk}\n"
-    prompt += "\nAnswer the question based on the provided context. If the context doesn't contain the answer, say so."
-    
+    if answer is not None:
+        console.print(Panel(answer, title="Answer", border_style="green"))
+        return
+
     # Get response
     try:
         model = get_model()
         console.print("\n🤖 [bold]Generating answer...[/bold]")
-        response = get_response(
-            prompt,
-            system="You are a helpful assistant that answers questions based only on the provided context.",
-            model=model
-        )
-        console.print(Panel(response, title="Answer", border_style="green"))
+        prompt = build_rag_prompt(query, context)
+        if stream:
+            # Redraw the answer panel as tokens arrive
+            with Live(Panel("", title="Answer", border_style="green"), console=console,
+                      refresh_per_second=15, vertical_overflow="visible") as live:
+                response = ""
+                for token in stream_response(prompt, system=RAG_SYSTEM_PROMPT, model=model):
+                    response += token
+                    live.update(Panel(response, title="Answer", border_style="green"))
+        else:
+            response = get_response(prompt, system=RAG_SYSTEM_PROMPT, model=model)
+            console.print(Panel(response, title="Answer", border_style="green"))
     except Exception as e:
         print(f"[red]❌ Error generating response: {e}[/red]")
         raise typer.Exit(1)
\ No newline at end of file
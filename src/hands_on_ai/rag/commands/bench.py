@@ -0,0 +1,119 @@
+"""
+Bench command for the rag CLI - measures indexing and query performance.
+"""
+
+import json
+from pathlib import Path
+import typer
+from rich import print
+from rich.table import Table
+from rich.console import Console
+from ..bench import run_benchmark, DEFAULT_DOCUMENT_WORDS, DEFAULT_QUERIES, DEFAULT_DIM
+from ..utils import RETRIEVAL_MODES
+from .index import find_files
+
+app = typer.Typer(help="Benchmark RAG indexing and query performance")
+
+
+def _format_rate(value, unit):
+    return f"{value:,.1f} {unit}" if value else "-"
+
+
+def print_run(console, run):
+    """Print one corpus size's results as tables."""
+    index = run["index"]
+    table = Table(title=f"{run['documents']} documents, {index['chunks']} chunks "
+                        f"({index['bytes'] / 1e6:.1f} MB) indexed in {index['seconds']:.2f}s")
+    table.add_column("Stage")
+    table.add_column("Seconds", justify="right")
+    table.add_column("Throughput", justify="right")
+    for name, stage in index["stages"].items():
+        if "mb_per_second" in stage:
+            rate = _format_rate(stage["mb_per_second"], "MB/s")
+        else:
+            rate = _format_rate(stage.get("chunks_per_second"), "chunks/s")
+        table.add_row(name, f"{stage['seconds']:.3f}", rate)
+    console.print(table)
+
+    queries = run.get("queries")
+    if not queries:
+        return
+    table = Table(title=f"Query latency (index opened in {run['open_seconds'] * 1000:.1f} ms)")
+    for column in ("Mode", "p50 ms", "p90 ms", "p99 ms", "Mean ms"):
+        table.add_column(column, justify="left" if column == "Mode" else "right")
+    for mode, stats in queries.items():
+        if mode != "batch":
+            table.add_row(mode, *(f"{stats[key]:.2f}" for key in ("p50_ms", "p90_ms", "p99_ms", "mean_ms")))
+    console.print(table)
+    batch = queries["batch"]
+    console.print(f"📦 Batched dense search: {_format_rate(batch['queries_per_second'], 'queries/s')}\n")
+
+
+@app.callback(invoke_without_command=True)
+def bench(
+    sizes: str = typer.Option("100,1000", help="Comma-separated corpus sizes, in documents"),
+    corpus: str = typer.Option(None, help="Benchmark the documents in this directory instead of a synthetic corpus"),
+    words: int = typer.Option(DEFAULT_DOCUMENT_WORDS, help="Words per synthetic document"),
+    chunk_size: int = typer.Option(None, help="Words per chunk (default: from config)"),
+    queries: int = typer.Option(DEFAULT_QUERIES, help="Queries timed per corpus size (0 skips query timing)"),
+    k: int = typer.Option(3, help="Chunks retrieved per query"),
+    modes: str = typer.Option(",".join(RETRIEVAL_MODES), help="Comma-separated retrieval modes to time"),
+    dim: int = typer.Option(DEFAULT_DIM, help="Dimensions of the fake embeddings"),
+    latency: float = typer.Option(0.0, help="Simulated milliseconds per fake embedding request"),
+    server: str = typer.Option(None, help="Embed with this server instead of the built-in fake one"),
+    workers: int = typer.Option(None, help="Document parser processes (default: from config)"),
+    embed_workers: int = typer.Option(None, help="Concurrent embedding requests (default: from config)"),
+    batch_size: int = typer.Option(None, help="Chunks per embedding request (default: from config)"),
+    ivf: bool = typer.Option(False, "--ivf", help="Also build an IVF index"),
+    quantize: str = typer.Option(None, help="Also store quantised vectors: sq8 or pq"),
+    seed: int = typer.Option(0, help="Random seed for the corpus and queries"),
+    json_output: bool = typer.Option(False, "--json", help="Print machine-readable JSON instead of tables"),
+    output_file: str = typer.Option(None, help="Also write the JSON report to this file"),
+    work_dir: str = typer.Option(None, help="Keep corpora and indexes in this directory (default: a temporary one)"),
+):
+    """Benchmark indexing throughput and query latency."""
+    try:
+        size_list = [int(size) for size in sizes.split(",") if size.strip()]
+    except ValueError:
+        print(f"[red]❌ Invalid --sizes: {sizes}[/red]")
+        raise typer.Exit(1)
+    mode_list = [mode.strip() for mode in modes.split(",") if mode.strip()]
+    unknown = [mode for mode in mode_list if mode not in RETRIEVAL_MODES]
+    if not size_list or min(size_list) < 1 or unknown:
+        print(f"[red]❌ Sizes must be positive and modes one of {', '.join(RETRIEVAL_MODES)}[/red]")
+        raise typer.Exit(1)
+    if quantize not in (None, "sq8", "pq"):
+        print("[red]❌ --quantize must be sq8 or pq[/red]")
+        raise typer.Exit(1)
+
+    files = None
+    if corpus:
+        corpus_path = Path(corpus)
+        if not corpus_path.exists():
+            print(f"[red]❌ Path not found: {corpus_path}[/red]")
+            raise typer.Exit(1)
+        files = find_files(corpus_path)
+        if not files:
+            print(f"[yellow]⚠️ No supported files found in {corpus_path}[/yellow]")
+            raise typer.Exit(1)
+
+    console = Console(stderr=json_output, quiet=json_output)
+    console.print(f"⏱️ Benchmarking {', '.join(map(str, sorted(set(size_list))))} documents "
+                  f"against {server or 'a local fake embedding server'}...\n")
+    try:
+        report = run_benchmark(
+            sizes=size_list, files=files, words_per_document=words, chunk_size=chunk_size, queries=queries,
+            k=k, modes=mode_list, dim=dim, latency=latency / 1000, server_url=server, parse_workers=workers,
+            batch_size=batch_size, embed_workers=embed_workers, ivf=ivf, quantization=quantize, seed=seed,
+            work_dir=work_dir, on_run=lambda run: print_run(console, run),
+        )
+    except Exception as e:
+        print(f"[red]❌ Benchmark failed: {e}[/red]")
+        raise typer.Exit(1)
+
+    report_json = json.dumps(report, indent=2)
+    if output_file:
+        Path(output_file).write_text(report_json, encoding="utf-8")
+        console.print(f"📝 Report saved to: {output_file}")
+    if json_output:
+        typer.echo(report_json)
@@ -6,99 +6,318 @@ import typer
 from rich import print
 from pathlib import Path
 import os
+import shutil
 import time
-from ...config import CONFIG_DIR, get_chunk_size, log
-from ..utils import load_text_file, chunk_text, get_embeddings, save_index_with_sources
+from ...config import CONFIG_DIR, get_chunk_size, get_chunk_overlap, get_embedding_model, log
+from ..utils import load_index_manifest, file_fingerprint, manifest_key, clear_index_cache
+from ..store import IndexStore, open_writer
+from ..quantize import check_quantization
+from ..embedding_cache import get_embedding_cache
+from ..pipeline import run_index_pipeline, copy_unchanged
+from ..shards import is_sharded, shard_path, register_shard, remove_shard
 
 app = typer.Typer(help="Build a RAG index from files")
 
+SUPPORTED_EXTENSIONS = [".txt", ".md", ".docx", ".pdf"]
+
+
+def find_files(input_path):
+    """
+    List the indexable files at a path.
+
+    Args:
+        input_path: File or directory to index
+
+    Returns:
+        list: Paths of supported files, sorted
+    """
+    if input_path.is_file():
+        return [input_path]
+    files = []
+    for ext in SUPPORTED_EXTENSIONS:
+        files.extend(input_path.glob(f"**/*{ext}"))
+    # A stable order lets an interrupted build resume where it stopped
+    return sorted(files)
+
+
+def remove_index(output_file, index_root, shard=None):
+    """
+    Delete an index, or one shard of a sharded index, with no files left in it.
+
+    Args:
+        output_file: Index directory or .npz file
+        index_root: Sharded index directory when shard is given
+        shard: Shard name, or None for a standalone index
+    """
+    if shard:
+        remove_shard(index_root, shard)
+    elif Path(output_file).is_dir():
+        shutil.rmtree(output_file)
+    else:
+        os.remove(output_file)
+    clear_index_cache(index_root)
+
+
+def plan_update(files, manifest):
+    """
+    Compare files on disk with an index manifest.
+
+    Files whose size and mtime match the manifest are unchanged without
+    hashing; otherwise the content hash decides.
+
+    Args:
+        files: Paths currently at the input location
+        manifest: manifest_key() -> file_fingerprint() from the existing index
+
+    Returns:
+        tuple: (changed, unchanged, deleted) where changed holds added or
+        modified paths, unchanged maps manifest key -> fingerprint (with the
+        "source" name its chunks are stored under) and deleted holds
+        manifest keys no longer on disk
+    """
+    changed = []
+    unchanged = {}
+    matched = set()
+    for file_path in files:
+        key = manifest_key(file_path)
+        # Manifests from before keys were resolved use the path as given
+        found = key if key in manifest else str(file_path)
+        previous = manifest.get(found)
+        if previous is None:
+            changed.append(file_path)
+            continue
+        matched.add(found)
+        source = previous.get("source", found)
+        current = file_fingerprint(file_path, content_hash=False)
+        if previous["size"] == current["size"] and previous["mtime"] == current["mtime"]:
+            unchanged[key] = dict(previous, source=source)
+            continue
+        current = file_fingerprint(file_path)
+        if previous.get("sha256") == current["sha256"]:
+            unchanged[key] = dict(current, source=source)
+        else:
+            changed.append(file_path)
+    deleted = [key for key in manifest if key not in matched]
+    return changed, unchanged, deleted
+
+
+def stale_checkpoint_files(files, manifest):
+    """
+    Find files a resumed build recorded as indexed that have changed since.
+
+    Args:
+        files: Paths currently at the input location
+        manifest: The resumed writer's manifest
+
+    Returns:
+        list: Paths modified and manifest keys deleted since the checkpoint
+    """
+    checkpointed = [path for path in files if manifest_key(path) in manifest]
+    changed, _, deleted = plan_update(checkpointed, manifest)
+    return changed + deleted
+
 
 @app.callback(invoke_without_command=True)
 def index(
     input_path: str = typer.Argument(..., help="File or directory to index"),
-    output_file: str = typer.Option(None, help="Output index file (default: ~/.hands-on-ai/index.npz)"),
+    output_file: str = typer.Option(None, help="Output index directory, or a .npz file (default: ~/.hands-on-ai/index)"),
     chunk_size: int = typer.Option(None, help="Words per chunk (default: from config)"),
+    overlap: int = typer.Option(None, help="Words shared by consecutive chunks (default: from config)"),
+    sentences: bool = typer.Option(False, "--sentences/--no-sentences", help="Prefer to end chunks at sentence boundaries"),
     force: bool = typer.Option(False, help="Overwrite existing index"),
+    update: bool = typer.Option(False, help="Only re-index files added, changed or deleted since the last run"),
+    batch_size: int = typer.Option(None, help="Chunks per embedding request (default: from config)"),
+    embed_workers: int = typer.Option(None, help="Concurrent embedding requests (default: from config)"),
+    workers: int = typer.Option(None, help="Processes used to parse documents, 0 for all cores (default: from config)"),
+    cache: bool = typer.Option(True, "--cache/--no-cache", help="Reuse cached embeddings for unchanged chunks"),
+    ivf: bool = typer.Option(False, help="Also build an IVF index for fast approximate search on large corpora"),
+    ivf_clusters: int = typer.Option(None, help="IVF clusters (default: about 4 x sqrt(chunks))"),
+    nprobe: int = typer.Option(None, help="IVF clusters searched per query by default (default: 10% of clusters)"),
+    quantize: str = typer.Option(None, help="Also store quantised vectors to cut query memory: 'sq8' (int8) or 'pq' (product quantisation)"),
+    pq_subspaces: int = typer.Option(None, help="Subspaces for --quantize pq (default: one per 8 dimensions)"),
+    bm25: bool = typer.Option(True, "--bm25/--no-bm25", help="Also build a BM25 keyword index for hybrid and lexical search"),
+    dedup: bool = typer.Option(True, "--dedup/--no-dedup", help="Embed near-duplicate chunks (repeated handouts, boilerplate) only once"),
+    resume: bool = typer.Option(True, "--resume/--no-resume", help="Resume an interrupted build of the same index"),
+    shard: str = typer.Option(None, help="Build (or replace) this named shard of a sharded index, leaving other shards untouched"),
 ):
     """Build a RAG index from files."""
     # Determine the output path
     if output_file is None:
         CONFIG_DIR.mkdir(exist_ok=True)
-        output_file = str(CONFIG_DIR / "index.npz")
-    
+        output_file = str(CONFIG_DIR / "index")
+
+    # A shard is an ordinary index inside the sharded index directory
+    index_root = output_file
+    if shard:
+        if Path(output_file).suffix == ".npz" or (Path(output_file) / "header.json").exists():
+            print(f"[red]❌ {output_file} is not a sharded index; choose a new directory for --shard[/red]")
+            raise typer.Exit(1)
+        try:
+            output_file = str(shard_path(index_root, shard))
+        except ValueError as e:
+            print(f"[red]❌ {e}[/red]")
+            raise typer.Exit(1)
+    elif update and is_sharded(output_file):
+        print(f"[red]❌ {output_file} is a sharded index; use --shard NAME to update one shard[/red]")
+        raise typer.Exit(1)
+
     # Check if output file already exists
-    if os.path.exists(output_file) and not force:
-        print(f"[yellow]⚠️ Index file {output_file} already exists. Use --force to overwrite.[/yellow]")
+    if os.path.exists(output_file) and not (force or update):
+        print(f"[yellow]⚠️ Index file {output_file} already exists. Use --force to overwrite or --update to refresh it.[/yellow]")
         raise typer.Exit(1)
-    
+
     # Get default chunk size from config if not specified
     if chunk_size is None:
         chunk_size = get_chunk_size()
-    
+    if overlap is None:
+        overlap = get_chunk_overlap()
+    if not 0 <= overlap < chunk_size:
+        print(f"[red]❌ --overlap must be at least 0 and less than the chunk size ({chunk_size})[/red]")
+        raise typer.Exit(1)
+    try:
+        check_quantization(quantize, pq_subspaces)
+    except ValueError as e:
+        print(f"[red]❌ {e}[/red]")
+        raise typer.Exit(1)
+    if Path(output_file).suffix == ".npz":
+        # The legacy single-file format stores exact vectors only
+        options = {"--ivf": ivf or None, "--ivf-clusters": ivf_clusters, "--nprobe": nprobe,
+                   "--quantize": quantize, "--pq-subspaces": pq_subspaces}
+        unsupported = [name for name, value in options.items() if value is not None]
+        if unsupported:
+            print(f"[red]❌ {', '.join(unsupported)} can't be used with a .npz file; use an index directory[/red]")
+            raise typer.Exit(1)
+
     # Process the input file(s)
     input_path = Path(input_path)
     if not input_path.exists():
         print(f"[red]❌ Path not found: {input_path}[/red]")
         raise typer.Exit(1)
-    
+
     start_time = time.time()
-    chunks = []
-    sources = []
-    
-    # Process a single file
     if input_path.is_file():
         print(f"📄 Loading file: {input_path}")
-        try:
-            text = load_text_file(input_path)
-            file_chunks = chunk_text(text, chunk_size)
-            chunks.extend(file_chunks)
-            sources.extend([str(input_path)] * len(file_chunks))
-            print(f"  ✓ Generated {len(file_chunks)} chunks")
-        except Exception as e:
-            print(f"[red]❌ Error processing {input_path}: {e}[/red]")
-    
-    # Process a directory of files
-    elif input_path.is_dir():
+    else:
         print(f"📂 Processing directory: {input_path}")
-        
-        # Find all supported files
-        supported_extensions = [".txt", ".md", ".docx", ".pdf"]
-        files = []
-        for ext in supported_extensions:
-            files.extend(input_path.glob(f"**/*{ext}"))
-        
-        if not files:
-            print(f"[yellow]⚠️ No supported files found in {input_path}[/yellow]")
+    files = find_files(input_path)
+
+    # Work out which files need (re-)indexing
+    manifest = load_index_manifest(output_file) if update and os.path.exists(output_file) else None
+    # With --update, an empty directory means every indexed file was deleted
+    if not files and manifest is None:
+        print(f"[yellow]⚠️ No supported files found in {input_path}[/yellow]")
+        raise typer.Exit(1)
+    if update and manifest is None and os.path.exists(output_file):
+        print("[yellow]⚠️ Existing index has no file manifest, rebuilding it from scratch.[/yellow]")
+
+    previous = None
+    unchanged = {}
+    if manifest is not None:
+        to_index, unchanged, deleted = plan_update(files, manifest)
+        print(f"🔄 {len(to_index)} added or changed, {len(unchanged)} unchanged, {len(deleted)} deleted")
+        if not to_index and not deleted:
+            print("✅ Index is already up to date")
+            return
+        # Keep the existing IVF and quantisation settings unless new ones were given
+        previous = IndexStore.open(output_file)
+        if "ivf" in previous.header and not (ivf or ivf_clusters):
+            ivf, ivf_clusters = True, previous.header["ivf"]["clusters"]
+            nprobe = nprobe or previous.header["ivf"]["nprobe"]
+        if "quantization" in previous.header and not quantize:
+            quantize = previous.header["quantization"]["type"]
+            pq_subspaces = pq_subspaces or previous.header["quantization"]["subspaces"]
+        try:
+            check_quantization(quantize, pq_subspaces, previous.header["dim"])
+        except ValueError as e:
+            print(f"[red]❌ {e}[/red]")
             raise typer.Exit(1)
-        
-        # Process each file
+    else:
+        to_index = files
         print(f"Found {len(files)} files to process")
-        for i, file_path in enumerate(files):
-            try:
-                print(f"[{i+1}/{len(files)}] Processing: {file_path}")
-                text = load_text_file(file_path)
-                file_chunks = chunk_text(text, chunk_size)
-                chunks.extend(file_chunks)
-                sources.extend([str(file_path)] * len(file_chunks))
-                print(f"  ✓ Generated {len(file_chunks)} chunks")
-            except Exception as e:
-                print(f"[red]❌ Error processing {file_path}: {e}[/red]")
-                log.exception(f"Error processing {file_path}")
-    
-    # Generate embeddings and save the index
-    if not chunks:
-        print("[red]❌ No chunks generated, nothing to index[/red]")
-        raise typer.Exit(1)
-    
-    total_chunks = len(chunks)
-    print(f"\n🧠 Generating embeddings for {total_chunks} chunks...")
+
+    def report(position, path, n_chunks, error):
+        print(f"[{position}/{len(pending)}] Processing: {path}")
+        if error is None:
+            print(f"  ✓ Generated {n_chunks} chunks")
+        else:
+            print(f"[red]❌ Error processing {path}: {error}[/red]")
+
+    model = get_embedding_model()
+    settings = {
+        "input": str(input_path.resolve()), "chunk_size": chunk_size, "overlap": overlap,
+        "sentences": sentences, "dedup": dedup, "update": manifest is not None,
+    }
+    embedding_cache = get_embedding_cache() if cache else None
+    hits_before = embedding_cache.hits if embedding_cache else 0
+
     try:
-        vectors = get_embeddings(chunks)
-        save_index_with_sources(vectors, chunks, sources, output_file)
-        elapsed = time.time() - start_time
-        print(f"✅ Index created with {total_chunks} chunks in {elapsed:.1f}s")
-        print(f"📦 Saved to: {output_file}")
-    except Exception as e:
-        print(f"[red]❌ Error generating embeddings: {e}[/red]")
-        log.exception("Error generating embeddings")
-        raise typer.Exit(1)
\ No newline at end of file
+        writer = open_writer(output_file, model=model, resumable=resume, settings=settings,
+                             quantization=quantize, pq_subspaces=pq_subspaces)
+    except ValueError as e:
+        print(f"[red]❌ {e}[/red]")
+        raise typer.Exit(1)
+    if writer.resumed:
+        stale = stale_checkpoint_files(files, writer.manifest)
+        if stale:
+            # Chunks already written can't be taken back out of the partial
+            # index, so start again; the embedding cache keeps the rest cheap
+            print(f"[yellow]⚠️ {len(stale)} files changed since the interrupted build, starting it again[/yellow]")
+            writer.abort()
+            writer = open_writer(output_file, model=model, resumable=resume, settings=settings,
+                                 quantization=quantize, pq_subspaces=pq_subspaces)
+    with writer:
+        if writer.resumed:
+            print(f"⏯️ Resuming interrupted build: {len(writer.manifest)} files already indexed")
+        if previous is not None and not set(unchanged) <= set(writer.manifest):
+            copied = copy_unchanged(previous, writer, unchanged)
+            print(f"📋 Kept {copied} chunks from unchanged files")
+        pending = [path for path in to_index if manifest_key(path) not in writer.manifest]
+
+        print(f"\n🧠 Chunking and embedding {len(pending)} files...")
+        try:
+            stats = run_index_pipeline(
+                pending, writer, chunk_size, batch_size=batch_size, workers=embed_workers,
+                use_cache=cache, model=model, parse_workers=workers, overlap=overlap,
+                sentence_aware=sentences, dedup=dedup, on_document=report,
+            )
+        except Exception as e:
+            print(f"[red]❌ Error generating embeddings: {e}[/red]")
+            log.exception("Error generating embeddings")
+            if writer.resumable:
+                print("Progress has been saved; re-run the same command to resume.")
+            raise typer.Exit(1)
+
+        if stats["duplicates"]:
+            print(f"🧹 Skipped {stats['duplicates']} near-duplicate chunks")
+        if embedding_cache:
+            hits = embedding_cache.hits - hits_before
+            print(f"♻️ Reused {hits} cached embeddings, computed {stats['chunks'] - hits}")
+
+        if writer.count == 0:
+            writer.abort()
+            if manifest is not None:
+                remove_index(output_file, index_root, shard)
+                print(f"🗑️ No indexed files remain, removed {output_file}")
+                return
+            print("[red]❌ No chunks generated, nothing to index[/red]")
+            raise typer.Exit(1)
+
+        if ivf or ivf_clusters:
+            print("🗂️ Building IVF index...")
+        try:
+            writer.commit(
+                ivf_clusters=(ivf_clusters or 0) if (ivf or ivf_clusters) else None, nprobe=nprobe, bm25=bm25,
+            )
+        except Exception as e:
+            print(f"[red]❌ Error saving index: {e}[/red]")
+            log.exception("Error saving index")
+            if writer.resumable:
+                print("Progress has been saved; re-run the same command to resume.")
+            raise typer.Exit(1)
+
+    if shard:
+        register_shard(index_root, shard)
+    clear_index_cache(index_root)
+    elapsed = time.time() - start_time
+    print(f"✅ Index created with {writer.count} chunks in {elapsed:.1f}s")
+    print(f"📦 Saved to: {output_file}")
@@ -2,26 +2,42 @@
 Interactive command for the rag CLI - provides a REPL interface.
 """
 
+from typing import List
 import typer
 from rich import print
 from pathlib import Path
-from ...config import CONFIG_DIR
+from ..utils import default_index_path
+from ..query_cache import get_query_cache
+from ..server import get_retrieval_client
 from .ask import ask
 
 app = typer.Typer(help="Run interactive RAG chat")
 
 
+def _print_cache_stats():
+    """Report how many questions were answered from the query-embedding cache."""
+    cache = get_query_cache()
+    if cache and cache.hits + cache.misses:
+        stats = cache.stats()
+        print(f"♻️ Query cache: {stats['hits']} of {stats['hits'] + stats['misses']} questions reused ({stats['hit_rate']:.0%})")
+
+
 @app.callback(invoke_without_command=True)
 def interactive(
-    index_path: str = typer.Option(None, help="Path to index file (default: ~/.hands-on-ai/index.npz)"),
+    index_path: str = typer.Option(None, help="Path to index (default: ~/.hands-on-ai/index)"),
     show_context: bool = typer.Option(False, "--context", "-c", help="Show retrieved context"),
     show_scores: bool = typer.Option(False, "--scores", "-s", help="Show similarity scores"),
     k: int = typer.Option(3, help="Number of chunks to retrieve"),
+    nprobe: int = typer.Option(None, help="IVF clusters to search: higher is more accurate, lower is faster (0 = exhaustive)"),
+    mode: str = typer.Option(None, help="Retrieval mode: dense, hybrid or lexical (default: from config)"),
+    include: List[str] = typer.Option(None, "--include", help="Only search sources matching this glob (repeatable), e.g. '*.pdf'"),
+    exclude: List[str] = typer.Option(None, "--exclude", help="Skip sources matching this glob (repeatable)"),
+    use_server: bool = typer.Option(True, "--server/--no-server", help="Use a running 'rag serve' daemon if there is one"),
 ):
     """Run interactive RAG chat."""
     # Determine the index path
     if index_path is None:
-        index_path = str(CONFIG_DIR / "index.npz")
+        index_path = str(default_index_path())
     
     index_path = Path(index_path)
     if not index_path.exists():
@@ -31,6 +47,9 @@ def interactive(
     
     print("\n🔍 [bold]RAG Interactive Mode[/bold] - Ask questions about your documents")
     print(f"Using index: {index_path}")
+    client = get_retrieval_client(index_path) if use_server else None
+    if client is not None:
+        print(f"⚡ Using retrieval server at {client.address}")
     print("Type 'exit' to quit.\n")
     
     while True:
@@ -38,6 +57,7 @@ def interactive(
             user_input = input("💬 Question: ").strip()
         except (EOFError, KeyboardInterrupt):
             print("\n👋 Exiting RAG Interactive Mode.")
+            _print_cache_stats()
             break
         
         if not user_input:
@@ -45,7 +65,8 @@ def interactive(
         
         if user_input.lower() in ["exit", "quit", "q"]:
             print("👋 Goodbye!")
+            _print_cache_stats()
             break
         
         # Use the ask command to handle the query
-        ask(user_input, str(index_path), show_context, show_scores, k)
\ No newline at end of file
+        ask(user_input, str(index_path), show_context, show_scores, k, nprobe, mode, include, exclude, use_server, True)
\ No newline at end of file
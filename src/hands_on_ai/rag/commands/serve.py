@@ -0,0 +1,60 @@
+"""
+Serve command for the rag CLI - keeps indexes resident for fast queries.
+"""
+
+from typing import List
+import signal
+import socket
+import sys
+import typer
+from rich import print
+from pathlib import Path
+from ..utils import default_index_path
+from ..server import RetrievalServer, DEFAULT_HOST, DEFAULT_PORT
+
+app = typer.Typer(help="Run a retrieval daemon that rag ask and rag interactive use automatically")
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+@app.callback(invoke_without_command=True)
+def serve(
+    index_path: List[str] = typer.Option(None, "--index-path", help="Index to serve (repeatable; default: ~/.hands-on-ai/index)"),
+    host: str = typer.Option(DEFAULT_HOST, help="Address to listen on"),
+    port: int = typer.Option(DEFAULT_PORT, help="Port to listen on"),
+    socket_path: str = typer.Option(None, "--socket", help="Listen on this Unix socket instead of a TCP port"),
+    answers: bool = typer.Option(True, "--answers/--no-answers", help="Also generate answers over the /ask endpoint"),
+):
+    """Keep indexes loaded and answer retrieval requests."""
+    paths = index_path or [str(default_index_path())]
+    for path in paths:
+        if not Path(path).exists() and not Path(path + ".npz").exists():
+            print(f"[red]❌ Index file not found: {path}[/red]")
+            print("Run 'rag index <directory>' first to create an index.")
+            raise typer.Exit(1)
+    if socket_path and not hasattr(socket, "AF_UNIX"):
+        print("[red]❌ Unix sockets are not supported on this platform; use --port[/red]")
+        raise typer.Exit(1)
+
+    try:
+        server = RetrievalServer(paths, host=host, port=port, socket_path=socket_path, answers=answers)
+    except OSError as e:
+        print(f"[red]❌ Could not listen on {socket_path or f'{host}:{port}'}: {e}[/red]")
+        raise typer.Exit(1)
+    except Exception as e:
+        print(f"[red]❌ Error loading index: {e}[/red]")
+        raise typer.Exit(1)
+
+    for path, count in server.indexes.items():
+        print(f"📚 Loaded {path} ({count} chunks)")
+    print(f"🚀 Serving on {server.address} - rag ask and rag interactive will use it automatically")
+    print("Press Ctrl+C to stop.")
+    sys.stdout.flush()
+    # Stop cleanly (removing the state file) when a service manager sends SIGTERM
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Retrieval server stopped.")
@@ -3,12 +3,15 @@ Web command for the rag CLI - provides a web interface using FastHTML.
 """
 
 import typer
+import asyncio
+import html
 import os
 import tempfile
 from pathlib import Path
-from ...config import CONFIG_DIR, log
-from ..utils import load_text_file, chunk_text, get_embeddings, save_index_with_sources, get_top_k
-from ...chat import get_response
+from ...config import log
+from ..utils import (load_text_file, chunk_text, get_embeddings, save_index_with_sources, get_top_k,
+                     default_index_path)
+from ...chat import astream_response
 
 app = typer.Typer(help="Launch web interface for RAG")
 
@@ -18,17 +21,18 @@ def web(
     port: int = typer.Option(8001, help="Port to run the web server on"),
     host: str = typer.Option("127.0.0.1", "--host", help="Host to bind to"),
     public: bool = typer.Option(False, "--public", help="Make the interface accessible from other devices (binds to 0.0.0.0)"),
-    index_path: str = typer.Option(None, help="Path to index file (default: ~/.hands-on-ai/index.npz)"),
+    index_path: str = typer.Option(None, help="Path to index (default: ~/.hands-on-ai/index)"),
 ):
     """Launch web interface for RAG using FastHTML."""
     try:
         from fasthtml.common import (fast_app, Titled, Article, Form, Div, P, H1, H2, H3, H4,
-                                    Input, Button, Hr, Style, serve)
+                                    Input, Button, Hr, Style, Script, StreamingResponse, to_xml, serve)
     except ImportError:
         try:
             # Alternative import path if the package is installed as python-fasthtml
             from python_fasthtml.common import (fast_app, Titled, Article, Form, Div, P, H1, H2, H3, H4,
-                                              Input, Button, Hr, Style, serve)
+                                              Input, Button, Hr, Style, Script, StreamingResponse, to_xml,
+                                              serve)
         except ImportError:
             print("❌ FastHTML is required for the web interface.")
             print("Please install it with: pip install python-fasthtml")
@@ -41,7 +45,7 @@ def web(
 
     # Determine the index path
     if index_path is None:
-        index_path = str(CONFIG_DIR / "index.npz")
+        index_path = str(default_index_path())
     
     index_dir = Path(index_path).parent
     index_dir.mkdir(exist_ok=True)
@@ -73,10 +77,10 @@ def web(
             text = load_text_file(Path(temp_path))
             chunks = chunk_text(text)
             sources = [file.filename] * len(chunks)
-            vectors = get_embeddings(chunks)
+            vectors = await asyncio.to_thread(get_embeddings, chunks)
             
             # Save or update the index
-            save_index_with_sources(vectors, chunks, sources, index_path)
+            await asyncio.to_thread(save_index_with_sources, vectors, chunks, sources, index_path)
             
             # Clean up
             os.unlink(temp_path)
@@ -95,8 +99,8 @@ def web(
     @rt("/ask")
     async def ask_post(question: str):
         try:
-            # Get context
-            context_items, scores = get_top_k(question, index_path, k=3, return_scores=True)
+            # Get context (off the event loop: the search and embedding call block)
+            context_items, scores = await asyncio.to_thread(get_top_k, question, index_path, k=3, return_scores=True)
             
             # Format context for response
             context_sections = []
@@ -113,20 +117,18 @@ def web(
                 prompt += f"- {text}\n"
             prompt += "\nAnswer the question based on the provided context. If the context doesn't contain the answer, say so."
             
-            # Get answer
-            answer = get_response(
-                prompt,
-                system="You are a helpful assistant that answers questions based only on the provided context."
-            )
-            
-            # Return the results
-            return Div(
-                H3("Results"),
-                H4("Context Used:"),
-                *context_sections,
-                H4("Answer:"),
-                Div(answer, cls="answer")
-            )
+            # Send the context first, then the answer as it is generated
+            async def generate():
+                yield to_xml(Div(H3("Results"), H4("Context Used:"), *context_sections, H4("Answer:")))
+                yield '<div class="answer">'
+                async for token in astream_response(
+                    prompt,
+                    system="You are a helpful assistant that answers questions based only on the provided context."
+                ):
+                    yield html.escape(token)
+                yield '</div>'
+
+            return StreamingResponse(generate(), media_type="text/html; charset=utf-8")
         except Exception as e:
             log.exception(f"Error during question answering: {e}")
             return Div(f"Error: {str(e)}", style="color: red;")
@@ -163,10 +165,7 @@ def web(
                     Form(
                         Input(type="text", id="question", name="question", placeholder="Enter your question here"),
                         Button("Ask", type="submit"),
-                        hx_post="/ask",
-                        hx_target="#result",
-                        hx_swap="innerHTML",
-                        hx_trigger="submit"
+                        id="ask-form"
                     ),
                     id="queryForm"
                 ),
@@ -174,6 +173,34 @@ def web(
                 # Result area
                 Div(id="result"),
                 
+                # Stream the results into the page as the answer is generated
+                Script("""
+                    document.getElementById('ask-form').addEventListener('submit', async function(e) {
+                        e.preventDefault();
+                        const question = document.getElementById('question').value;
+                        if (!question) return;
+                        
+                        const result = document.getElementById('result');
+                        result.innerHTML = '';
+                        const response = await fetch('/ask', {
+                            method: 'POST',
+                            // HX-Request: errors come back as fragments, not whole pages
+                            headers: {'Content-Type': 'application/x-www-form-urlencoded', 'HX-Request': 'true'},
+                            body: `question=${encodeURIComponent(question)}`
+                        });
+                        
+                        const reader = response.body.getReader();
+                        const decoder = new TextDecoder();
+                        let html = '';
+                        while (true) {
+                            const { done, value } = await reader.read();
+                            if (done) break;
+                            html += decoder.decode(value, { stream: true });
+                            result.innerHTML = html;
+                        }
+                    });
+                """),
+                
                 # CSS styling
                 Style("""
                     body { font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }
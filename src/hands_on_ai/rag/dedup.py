@@ -0,0 +1,119 @@
+"""
+Near-duplicate chunk detection for RAG indexing.
+
+Each chunk gets a 64-bit SimHash over its word 3-grams: texts that share
+most of their shingles get signatures a few bits apart, whatever their
+case, punctuation or spacing. Signatures are split into max_distance + 1
+bands; two signatures within max_distance bits must agree exactly on at
+least one band, so each lookup only compares against chunks sharing a
+band instead of every chunk seen so far.
+"""
+
+from array import array
+from functools import lru_cache
+import hashlib
+import numpy as np
+from .bm25 import tokenize
+
+# Signature bits differing before two chunks count as near-duplicates
+DEFAULT_MAX_DISTANCE = 3
+
+SIGNATURE_BITS = 64
+SHINGLE_SIZE = 3
+
+# Odd multipliers that mix neighbouring token hashes into a shingle hash
+_SHINGLE_MIX = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64)
+_FINAL_MIX = np.uint64(0xFF51AFD7ED558CCD)
+_BIT_POSITIONS = np.arange(SIGNATURE_BITS, dtype=np.uint64)
+
+
+@lru_cache(maxsize=1 << 16)
+def _token_hash(token):
+    """Stable 64-bit hash of a token (the same in every process and run)."""
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash(text):
+    """
+    Compute the 64-bit SimHash signature of a text.
+
+    Args:
+        text: Chunk text
+
+    Returns:
+        int: Signature; near-identical texts differ in only a few bits
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return 0
+    hashes = np.array([_token_hash(token) for token in tokens], dtype=np.uint64)
+    if len(hashes) >= SHINGLE_SIZE:
+        n = len(hashes) - SHINGLE_SIZE + 1
+        shingles = hashes[:n] * _SHINGLE_MIX[0]
+        for offset in range(1, SHINGLE_SIZE):
+            shingles += hashes[offset:offset + n] * _SHINGLE_MIX[offset]
+        shingles ^= shingles >> np.uint64(33)
+        shingles *= _FINAL_MIX
+        shingles ^= shingles >> np.uint64(33)
+    else:
+        shingles = hashes
+    ones = ((shingles[:, None] >> _BIT_POSITIONS) & np.uint64(1)).sum(axis=0)
+    bits = (2 * ones > len(shingles)).astype(np.uint8)
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+class Deduplicator:
+    """
+    Remember kept chunks and find near-duplicates of new ones.
+
+    Chunk ids are the ids the kept chunks have in the index being built.
+    """
+
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE):
+        """
+        Args:
+            max_distance: Largest signature Hamming distance treated as a duplicate
+        """
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        width = SIGNATURE_BITS // bands
+        self._bands = [(i * width, SIGNATURE_BITS if i == bands - 1 else (i + 1) * width) for i in range(bands)]
+        self._tables = [{} for _ in self._bands]
+        self._signatures = {}
+        self._sources = {}
+        self._merged = set()
+
+    def _band_keys(self, signature):
+        return [(signature >> start) & ((1 << (end - start)) - 1) for start, end in self._bands]
+
+    def find(self, signature):
+        """Return the id of a kept chunk within max_distance of signature, or None."""
+        for table, key in zip(self._tables, self._band_keys(signature)):
+            for chunk_id in table.get(key, ()):
+                if bin(self._signatures[chunk_id] ^ signature).count("1") <= self.max_distance:
+                    return chunk_id
+        return None
+
+    def add(self, signature, chunk_id, source):
+        """Register a kept chunk and its source."""
+        self._signatures[chunk_id] = signature
+        self._sources[chunk_id] = source
+        for table, key in zip(self._tables, self._band_keys(signature)):
+            ids = table.get(key)
+            if ids is None:
+                table[key] = array("q", [chunk_id])
+            else:
+                ids.append(chunk_id)
+
+    def merge(self, chunk_id, source):
+        """
+        Record that a dropped duplicate came from source.
+
+        Returns:
+            bool: True if source is new for the kept chunk and should be
+            stored as an extra source
+        """
+        if source == self._sources.get(chunk_id) or (chunk_id, source) in self._merged:
+            return False
+        self._merged.add((chunk_id, source))
+        return True
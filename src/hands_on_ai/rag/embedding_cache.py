@@ -0,0 +1,195 @@
+"""
+Persistent embedding cache for the RAG module.
+
+Embeddings are stored in SQLite under the config directory, keyed by
+embedding model, server and a SHA-256 hash of the chunk text, so
+re-indexing unchanged documents doesn't call the embedding server again.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import numpy as np
+from ..config import CONFIG_DIR, load_config, log
+
+DEFAULT_CACHE_PATH = CONFIG_DIR / "embedding_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 200_000
+
+# SQLite limits the number of bound parameters per statement
+_SQL_BATCH = 500
+
+# Database path -> shared EmbeddingCache
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def text_hash(text):
+    """Hash chunk text for use as a cache key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _model_key(model, server):
+    """Key embeddings by server as well as model: the same model name can differ between servers."""
+    return model if not server else f"{model}@{server}"
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed store of embedding vectors with LRU eviction.
+
+    Hit and miss counts are kept for the lifetime of the object.
+    """
+
+    def __init__(self, path=None, max_entries=None):
+        """
+        Args:
+            path: SQLite database file (default: ~/.hands-on-ai/embedding_cache.sqlite3)
+            max_entries: Entries kept before least recently used are evicted
+        """
+        self.path = path or DEFAULT_CACHE_PATH
+        self.max_entries = max_entries or DEFAULT_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL, PRIMARY KEY (model, hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        # Kept up to date by put_many(), so storing doesn't have to count the table
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model, texts, server=None):
+        """
+        Look up cached embeddings.
+
+        Args:
+            model: Embedding model name
+            texts: List of chunk texts
+            server: Embedding server URL the vectors came from
+
+        Returns:
+            dict: Position in `texts` -> float32 vector, for cached texts only
+        """
+        model = _model_key(model, server)
+        hashes = [text_hash(text) for text in texts]
+        found = {}
+        with self._lock:
+            unique = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique), _SQL_BATCH):
+                batch = unique[start:start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                found.update((h, np.frombuffer(blob, dtype=np.float32)) for h, blob in rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+                    [(now, model, h) for h in found],
+                )
+                self._conn.commit()
+
+            result = {i: found[h] for i, h in enumerate(hashes) if h in found}
+            self.hits += len(result)
+            self.misses += len(texts) - len(result)
+        return result
+
+    def put_many(self, model, texts, vectors, server=None):
+        """
+        Store embeddings and evict the least recently used beyond max_entries.
+
+        Args:
+            model: Embedding model name
+            texts: List of chunk texts
+            vectors: Array with one embedding row per text
+            server: Embedding server URL the vectors came from
+        """
+        if len(texts) == 0:
+            return
+        model = _model_key(model, server)
+        now = time.time()
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rows = {text_hash(text): vector.tobytes() for text, vector in zip(texts, vectors)}
+        with self._lock:
+            # Only texts not stored yet add entries; the primary key makes this a cheap lookup
+            hashes = list(rows)
+            existing = 0
+            for start in range(0, len(hashes), _SQL_BATCH):
+                batch = hashes[start:start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                existing += self._conn.execute(
+                    f"SELECT COUNT(*) FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(model, h, blob, now) for h, blob in rows.items()],
+            )
+            self._count += len(rows) - existing
+            if self._count > self.max_entries:
+                excess = self._count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN"
+                    " (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self._count = self.max_entries
+                log.debug(f"Evicted {excess} embeddings from cache")
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counts and the number of stored entries."""
+        with self._lock:
+            # Other processes may share the database, so count for real here
+            entries = self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def clear(self):
+        """Remove every cached embedding."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._count = 0
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def get_embedding_cache():
+    """
+    Get the shared embedding cache, or None if disabled in config.
+
+    Controlled by the `embedding_cache` (on/off) and
+    `embedding_cache_max_entries` config keys.
+
+    Returns:
+        EmbeddingCache or None
+    """
+    config = load_config()
+    if not config.get("embedding_cache", True):
+        return None
+    max_entries = config.get("embedding_cache_max_entries", DEFAULT_MAX_ENTRIES)
+    with _caches_lock:
+        cache = _caches.get(DEFAULT_CACHE_PATH)
+        if cache is None:
+            try:
+                cache = EmbeddingCache(DEFAULT_CACHE_PATH, max_entries)
+            except sqlite3.Error as e:
+                log.warning(f"Embedding cache unavailable: {e}")
+                return None
+            _caches[DEFAULT_CACHE_PATH] = cache
+        cache.max_entries = max_entries
+        return cache
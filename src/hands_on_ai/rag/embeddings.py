@@ -0,0 +1,182 @@
+"""
+Embedding client for the RAG module.
+
+Sends text chunks to the embedding server in batches over a pooled HTTP
+session, with a bounded number of requests in flight and per-request retry.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from ..config import (
+    get_server_url, get_api_key, get_embedding_model, get_embedding_batch_size,
+    get_embedding_workers, get_embedding_retries, get_timeout, log
+)
+
+# Batch embedding APIs, tried in order: Ollama /api/embed, then OpenAI /v1/embeddings
+BATCH_EMBED_MODES = ("ollama", "openai")
+
+# (server URL, API key, workers) -> shared EmbeddingClient
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _is_unsupported(error):
+    """Whether an embedding error means the endpoint itself isn't available."""
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status is not None and 400 <= status < 500 and status not in (401, 403, 429)
+    return isinstance(error, (KeyError, IndexError, TypeError, ValueError))
+
+
+class EmbeddingClient:
+    """
+    Connection-pooled client for an embedding server.
+
+    Batches are embedded concurrently by up to `workers` threads sharing one
+    requests.Session; results are returned in input order. The batch API the
+    server supports is detected on first use and remembered.
+    """
+
+    def __init__(self, server_url=None, api_key=None, workers=None, retries=None, timeout=None):
+        """
+        Args:
+            server_url: Embedding server URL (default from config)
+            api_key: Bearer token for the server (default from config)
+            workers: Maximum concurrent requests (default from config)
+            retries: Retries per failed request (default from config)
+            timeout: Request timeout in seconds (default from config)
+        """
+        server_url = (server_url or get_server_url()).rstrip("/")
+        if server_url.endswith("/v1"):
+            server_url = server_url[:-3]
+        self.base_url = server_url
+        self.workers = max(int(workers or get_embedding_workers()), 1)
+        self.retries = max(int(get_embedding_retries() if retries is None else retries), 0)
+        self.timeout = timeout or get_timeout()
+        self.mode = None
+
+        if api_key is None:
+            api_key = get_api_key()
+        self.session = requests.Session()
+        self.session.headers["Content-Type"] = "application/json"
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(self, path, payload):
+        response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _embed_batch(self, batch, model, mode):
+        """Embed one batch with the given API mode ("ollama", "openai" or "single")."""
+        if mode == "ollama":
+            embeddings = self._post("/api/embed", {"model": model, "input": batch})["embeddings"]
+        elif mode == "openai":
+            data = self._post("/v1/embeddings", {"model": model, "input": batch})["data"]
+            embeddings = [item["embedding"] for item in sorted(data, key=lambda item: item.get("index", 0))]
+        else:
+            embeddings = [
+                self._post("/api/embeddings", {"model": model, "prompt": chunk})["embedding"]
+                for chunk in batch
+            ]
+
+        if len(embeddings) != len(batch):
+            raise ValueError(f"Expected {len(batch)} embeddings, got {len(embeddings)}")
+        return embeddings
+
+    def _detect_mode(self, batch, model):
+        """Embed a batch while finding the first API mode the server supports."""
+        for mode in BATCH_EMBED_MODES:
+            try:
+                embeddings = self._embed_batch(batch, model, mode)
+            except Exception as e:
+                if not _is_unsupported(e):
+                    raise
+                log.debug(f"Batch embedding via '{mode}' not supported by {self.base_url}: {e}")
+                continue
+            self.mode = mode
+            return embeddings
+
+        log.debug(f"Falling back to per-chunk embedding requests for {self.base_url}")
+        embeddings = self._embed_batch(batch, model, "single")
+        self.mode = "single"
+        return embeddings
+
+    def _embed_with_retry(self, batch, model):
+        """Embed a batch, retrying transient failures with exponential backoff."""
+        for attempt in range(self.retries + 1):
+            try:
+                if self.mode is None:
+                    return self._detect_mode(batch, model)
+                return self._embed_batch(batch, model, self.mode)
+            except Exception as e:
+                if attempt >= self.retries or _is_unsupported(e):
+                    raise
+                delay = 0.5 * 2 ** attempt
+                log.warning(f"Embedding request failed (attempt {attempt + 1}), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def embed(self, chunks, model=None, batch_size=None):
+        """
+        Get embeddings for text chunks.
+
+        Args:
+            chunks: List of text chunks
+            model: Embedding model to use (default from config)
+            batch_size: Chunks per request (default from config)
+
+        Returns:
+            ndarray: float32 array with one embedding row per chunk
+        """
+        if model is None:
+            model = get_embedding_model()
+        batch_size = max(int(batch_size or get_embedding_batch_size()), 1)
+        chunks = list(chunks)
+        batches = [chunks[i:i + batch_size] for i in range(0, len(chunks), batch_size)]
+        if not batches:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # The first batch runs alone so API detection happens only once
+        results = [self._embed_with_retry(batches[0], model)]
+        if len(batches) > 1:
+            if self.workers == 1:
+                results.extend(self._embed_with_retry(batch, model) for batch in batches[1:])
+            else:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    results.extend(pool.map(lambda batch: self._embed_with_retry(batch, model), batches[1:]))
+
+        return np.array([vector for batch in results for vector in batch], dtype=np.float32)
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
+
+def get_embedding_client(workers=None, server_url=None):
+    """
+    Get the shared embedding client for the configured server.
+
+    Args:
+        workers: Override the number of concurrent requests
+        server_url: Use this server instead of the configured one
+
+    Returns:
+        EmbeddingClient: Client reused across calls for the same server, key and workers
+    """
+    server_url = server_url or get_server_url()
+    api_key = get_api_key()
+    workers = max(int(workers or get_embedding_workers()), 1)
+    key = (server_url, api_key, workers)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = EmbeddingClient(server_url=server_url, api_key=api_key, workers=workers)
+            _clients[key] = client
+        return client
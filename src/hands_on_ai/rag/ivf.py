@@ -0,0 +1,124 @@
+"""
+Inverted-file (IVF) approximate nearest-neighbour search, in NumPy only.
+
+Vectors are grouped around k-means centroids at index time. A query scores
+the centroids, then only the vectors in the `nprobe` closest clusters, so
+search cost grows with cluster size rather than corpus size.
+"""
+
+import math
+import numpy as np
+from .vectors import normalize_vectors, top_k_indices
+
+# Rows scored per matrix product when assigning vectors to clusters
+ASSIGN_BLOCK_SIZE = 65536
+
+# Training vectors sampled per cluster; k-means needs far fewer than the corpus
+TRAIN_SAMPLES_PER_CLUSTER = 64
+
+
+def default_cluster_count(n_vectors):
+    """Suggest a cluster count for n_vectors (about 4 * sqrt(n))."""
+    return max(1, min(n_vectors, int(4 * math.sqrt(n_vectors))))
+
+
+def default_nprobe(n_clusters):
+    """Suggest how many clusters a query probes (about 10% of them)."""
+    return max(1, math.ceil(n_clusters / 10))
+
+
+def assign_clusters(vectors, centroids, block_size=ASSIGN_BLOCK_SIZE):
+    """
+    Find the nearest centroid for each vector.
+
+    Args:
+        vectors: Normalised vectors (may be memory-mapped)
+        centroids: Normalised centroid vectors
+
+    Returns:
+        ndarray: int32 cluster id per vector
+    """
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block_size):
+        block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def train_centroids(vectors, n_clusters, iterations=20, seed=0):
+    """
+    Train spherical k-means centroids on a sample of the vectors.
+
+    Args:
+        vectors: Normalised vectors (may be memory-mapped)
+        n_clusters: Number of centroids
+        iterations: k-means iterations
+        seed: Random seed, for reproducible indexes
+
+    Returns:
+        ndarray: float32 array of normalised centroids
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    n_clusters = max(1, min(n_clusters, n))
+    sample_size = min(n, n_clusters * TRAIN_SAMPLES_PER_CLUSTER)
+    sample = np.asarray(vectors[np.sort(rng.choice(n, size=sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, size=n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = assign_clusters(sample, centroids)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        order = np.argsort(assignments, kind="stable")
+        filled = counts > 0
+        starts = (np.cumsum(counts) - counts)[filled]
+        sums = np.zeros_like(centroids)
+        sums[filled] = np.add.reduceat(sample[order], starts, axis=0)
+        # Re-seed empty clusters from random sample points
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            sums[empty] = sample[rng.choice(sample_size, size=len(empty))]
+        centroids = normalize_vectors(sums)
+
+    return centroids
+
+
+def build_ivf(vectors, n_clusters=None, iterations=20, seed=0):
+    """
+    Build IVF posting lists for a set of vectors.
+
+    Args:
+        vectors: Normalised vectors (may be memory-mapped)
+        n_clusters: Number of clusters (default: default_cluster_count)
+        iterations: k-means iterations
+        seed: Random seed
+
+    Returns:
+        tuple: (centroids, order, offsets) where order lists vector ids grouped
+        by cluster and cluster c owns order[offsets[c]:offsets[c + 1]]
+    """
+    if n_clusters is None:
+        n_clusters = default_cluster_count(len(vectors))
+    centroids = train_centroids(vectors, n_clusters, iterations=iterations, seed=seed)
+    assignments = assign_clusters(vectors, centroids)
+    order = np.argsort(assignments, kind="stable").astype(np.int64)
+    counts = np.bincount(assignments, minlength=len(centroids))
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    return centroids, order, offsets
+
+
+def probe(query_vector, centroids, order, offsets, nprobe):
+    """
+    List the vector ids in the nprobe clusters closest to a query.
+
+    Args:
+        query_vector: Normalised query vector
+        centroids, order, offsets: Output of build_ivf
+        nprobe: Number of clusters to search
+
+    Returns:
+        ndarray: Sorted candidate vector ids
+    """
+    clusters = top_k_indices(centroids @ query_vector, nprobe)
+    candidates = np.concatenate([order[offsets[c]:offsets[c + 1]] for c in clusters])
+    candidates.sort()
+    return candidates
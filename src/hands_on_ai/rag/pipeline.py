@@ -0,0 +1,399 @@
+"""
+Streaming ingestion pipeline for building RAG indexes.
+
+Files flow through discover -> load -> chunk -> dedup -> embed -> write as
+generators joined by bounded queues, with parsing optionally fanned out
+over a process pool, so memory use depends on the queue and
+batch sizes rather than on the size of the corpus. The writer is
+checkpointed periodically, so an interrupted build can be resumed.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import numpy as np
+from ..config import get_dedup_max_distance, get_embedding_batch_size, get_embedding_workers, get_parse_workers, log
+from .dedup import Deduplicator, simhash
+from .utils import load_text_file, chunk_spans, file_fingerprint, manifest_key, get_embeddings
+
+# Documents loaded ahead of the embedding stage
+DEFAULT_QUEUE_SIZE = 8
+
+# Seconds between writer checkpoints
+DEFAULT_CHECKPOINT_INTERVAL = 30.0
+
+# Rows copied per block when carrying chunks over from an existing index
+COPY_BLOCK_SIZE = 4096
+
+_DONE = object()
+
+
+def parse_document(path, chunk_size, overlap=0, sentence_aware=False):
+    """
+    Load, fingerprint and chunk one file.
+
+    Runs in a worker process when parsing is parallel, so it must stay a
+    picklable top-level function and never raise.
+
+    Args:
+        path: File to parse
+        chunk_size: Words per chunk
+        overlap: Words shared by consecutive chunks
+        sentence_aware: Prefer to end chunks at sentence boundaries
+
+    Returns:
+        tuple: (path, chunks, spans, fingerprint, error, timings) where
+        timings is (parse_seconds, chunk_seconds); on failure chunks and
+        spans are empty, fingerprint is None and error is the exception
+    """
+    try:
+        start = time.perf_counter()
+        fingerprint = file_fingerprint(path)
+        text = load_text_file(path)
+        loaded = time.perf_counter()
+        spans = chunk_spans(text, chunk_size, overlap, sentence_aware)
+        chunks = [text[s:e] for s, e in spans]
+        return path, chunks, spans, fingerprint, None, (loaded - start, time.perf_counter() - loaded)
+    except Exception as e:
+        return path, [], [], None, e, (0.0, 0.0)
+
+
+def _parser_context():
+    """
+    Pick a process start method that is safe to use from a threaded program.
+
+    Forking a process that runs embedding threads can deadlock, so workers
+    come from a fork server (which imports this module once and forks
+    cheaply from there) where available, and are spawned otherwise.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _parse_in_processes(files, chunk_size, overlap, sentence_aware, workers):
+    """
+    Parse files in a process pool, yielding results in input order.
+
+    At most workers * 2 files are in flight, so results never pile up ahead
+    of the consumer. If a worker dies outright (e.g. a parser crash), the
+    file at the head of the queue is reported as failed and the pool is
+    restarted for the rest.
+    """
+    context = _parser_context()
+    options = (chunk_size, overlap, sentence_aware)
+    files = iter(files)
+    pending = deque()
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    try:
+        while True:
+            while len(pending) < workers * 2:
+                path = next(files, None)
+                if path is None:
+                    break
+                pending.append((path, executor.submit(parse_document, path, *options)))
+            if not pending:
+                return
+            path, future = pending.popleft()
+            try:
+                yield future.result()
+            except BrokenProcessPool as e:
+                yield path, [], [], None, e, (0.0, 0.0)
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+                pending = deque((p, executor.submit(parse_document, p, *options)) for p, _ in pending)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def load_documents(files, chunk_size, stats=None, workers=1, overlap=0, sentence_aware=False):
+    """
+    Load and chunk files, optionally across several processes.
+
+    Args:
+        files: Paths to load
+        chunk_size: Words per chunk
+        overlap: Words shared by consecutive chunks
+        sentence_aware: Prefer to end chunks at sentence boundaries
+        stats: Optional dict that collects per-stage timings
+        workers: Parser processes; 1 parses in the calling thread and 0
+            uses one process per CPU core
+
+    Yields:
+        tuple: (path, chunks, spans, fingerprint, error) for each file, in
+        input order; on failure chunks and spans are empty, fingerprint is
+        None and error is the exception
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers > 1:
+        results = _parse_in_processes(files, chunk_size, overlap, sentence_aware, workers)
+    else:
+        results = (parse_document(path, chunk_size, overlap, sentence_aware) for path in files)
+
+    for path, chunks, spans, fingerprint, error, (parse_seconds, chunk_seconds) in results:
+        if stats is not None and error is None:
+            stats["parse_seconds"] += parse_seconds
+            stats["chunk_seconds"] += chunk_seconds
+            stats["bytes"] += fingerprint["size"]
+        yield path, chunks, spans, fingerprint, error
+
+
+def prefetch(iterable, maxsize=DEFAULT_QUEUE_SIZE):
+    """
+    Run an iterable in a background thread, buffering at most maxsize items.
+
+    Exceptions raised by the iterable are re-raised in the consumer.
+
+    Args:
+        iterable: Items to produce
+        maxsize: Queue bound between producer and consumer
+
+    Yields:
+        Items from iterable, in order
+    """
+    items = queue.Queue(maxsize=max(maxsize, 1))
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                while not stop.is_set():
+                    try:
+                        items.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            items.put(_DONE)
+        except BaseException as e:
+            items.put(e)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def group_documents(documents, min_chunks):
+    """
+    Gather consecutive documents until they hold at least min_chunks chunks.
+
+    Args:
+        documents: Iterable of (path, chunks, spans, fingerprint, error) tuples
+        min_chunks: Chunks per group before it is released
+
+    Yields:
+        list: Groups of document tuples
+    """
+    group = []
+    count = 0
+    for document in documents:
+        group.append(document)
+        count += len(document[1])
+        if count >= min_chunks:
+            yield group
+            group, count = [], 0
+    if group:
+        yield group
+
+
+def copy_unchanged(store, writer, keep_sources):
+    """
+    Carry chunks from an existing index over into a new one.
+
+    A deduplicated chunk is kept while any of its sources is; if its own
+    source is dropped, the first kept duplicate source takes its place.
+
+    Args:
+        store: IndexStore of the existing index
+        writer: Index writer receiving the rows
+        keep_sources: Dict of manifest key -> fingerprint of the files to
+            carry over; a fingerprint's "source" is the name their chunks
+            are stored under (the key itself in older manifests)
+
+    Returns:
+        int: Number of chunks copied
+    """
+    keep_names = {fingerprint.get("source", key) for key, fingerprint in keep_sources.items()}
+    kept = np.array([name in keep_names for name in store.source_names], dtype=bool)
+    source_ids = np.asarray(store.source_ids)
+    duplicate_chunks = np.asarray(store.duplicate_chunks)
+    duplicate_sources = np.asarray(store.duplicate_sources)
+    extra = kept[duplicate_sources] if len(duplicate_sources) else np.zeros(0, dtype=bool)
+    duplicate_chunks, duplicate_sources = duplicate_chunks[extra], duplicate_sources[extra]
+
+    keep = kept[source_ids] if len(store) else np.zeros(0, dtype=bool)
+    keep[duplicate_chunks] = True
+    rows = np.flatnonzero(keep)
+    new_ids = np.full(len(store), -1, dtype=np.int64)
+    new_ids[rows] = writer.count + np.arange(len(rows))
+
+    # Promote the first kept duplicate source of each orphaned chunk
+    primary = {}
+    for chunk_id, source_id in zip(duplicate_chunks.tolist(), duplicate_sources.tolist()):
+        if not kept[source_ids[chunk_id]] and chunk_id not in primary:
+            primary[chunk_id] = source_id
+
+    for start in range(0, len(rows), COPY_BLOCK_SIZE):
+        block = rows[start:start + COPY_BLOCK_SIZE]
+        spans = None if store.spans is None else np.array(store.spans[block])
+        sources = []
+        for j, i in enumerate(block.tolist()):
+            if i in primary:
+                sources.append(store.source_names[primary[i]])
+                if spans is not None:
+                    # Spans point into the dropped source's text
+                    spans[j] = -1
+            else:
+                sources.append(store.source(i))
+        writer.add(np.asarray(store.vectors[block]), [store.chunk(i) for i in block], sources, spans=spans)
+
+    extras = [(new_ids[chunk_id], store.source_names[source_id])
+              for chunk_id, source_id in zip(duplicate_chunks.tolist(), duplicate_sources.tolist())
+              if primary.get(chunk_id) != source_id]
+    writer.add_duplicates([chunk_id for chunk_id, _ in extras], [source for _, source in extras])
+    writer.manifest.update(keep_sources)
+    writer.checkpoint()
+    return len(rows)
+
+
+def run_index_pipeline(files, writer, chunk_size, batch_size=None, workers=None, use_cache=True,
+                       model=None, parse_workers=None, overlap=0, sentence_aware=False, dedup=True,
+                       dedup_distance=None, server_url=None, queue_size=DEFAULT_QUEUE_SIZE,
+                       checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL, on_document=None):
+    """
+    Stream files into an index writer.
+
+    Documents are loaded and chunked in a background thread, embedded in
+    groups sized to keep every embedding worker busy, and appended to the
+    writer. A file is added to the writer's manifest once all its chunks
+    are written, and the writer is checkpointed every checkpoint_interval
+    seconds.
+
+    With dedup on, a chunk whose SimHash signature is within dedup_distance
+    bits of a chunk already in the writer is dropped before embedding, and
+    its file is recorded as a further source of the kept chunk.
+
+    Args:
+        files: Paths to index
+        writer: IndexWriter or NpzWriter to append to
+        chunk_size: Words per chunk
+        batch_size: Chunks per embedding request (default from config)
+        workers: Concurrent embedding requests (default from config)
+        use_cache: Whether to use the persistent embedding cache
+        model: Embedding model (default from config)
+        parse_workers: Document parser processes (default from config,
+            0 for one per CPU core)
+        overlap: Words shared by consecutive chunks
+        sentence_aware: Prefer to end chunks at sentence boundaries
+        dedup: Drop near-duplicate chunks instead of embedding them again
+        dedup_distance: Largest signature distance treated as a duplicate
+            (default from config)
+        server_url: Embedding server (default from config)
+        queue_size: Documents buffered between loading and embedding
+        checkpoint_interval: Seconds between checkpoints
+        on_document: Optional callback(position, path, n_chunks, error)
+            called for each file before its group is embedded
+
+    Returns:
+        dict: Counts and per-stage timings (parse, chunk, dedup, embed, write)
+    """
+    batch_size = batch_size or get_embedding_batch_size()
+    workers = workers or get_embedding_workers()
+    if parse_workers is None:
+        parse_workers = get_parse_workers()
+    stats = {
+        "files": 0, "failed": 0, "chunks": 0, "duplicates": 0, "bytes": 0,
+        "parse_seconds": 0.0, "chunk_seconds": 0.0, "dedup_seconds": 0.0,
+        "embed_seconds": 0.0, "write_seconds": 0.0,
+    }
+    deduplicator = None
+    if dedup:
+        start = time.perf_counter()
+        deduplicator = Deduplicator(get_dedup_max_distance() if dedup_distance is None else dedup_distance)
+        # Chunks carried over or resumed count as already seen
+        for chunk_id, (text, source) in enumerate(writer.iter_chunks()):
+            deduplicator.add(simhash(text), chunk_id, source)
+        stats["dedup_seconds"] += time.perf_counter() - start
+
+    documents = prefetch(
+        load_documents(files, chunk_size, stats, workers=parse_workers,
+                       overlap=overlap, sentence_aware=sentence_aware),
+        maxsize=queue_size,
+    )
+    last_checkpoint = time.monotonic()
+    position = 0
+
+    for group in group_documents(documents, min_chunks=batch_size * workers * 2):
+        chunks = []
+        sources = []
+        spans = []
+        duplicates = []
+        for path, file_chunks, file_spans, fingerprint, error in group:
+            position += 1
+            if on_document:
+                on_document(position, path, len(file_chunks), error)
+            if error is not None:
+                log.debug(f"Error processing {path}: {error}")
+                stats["failed"] += 1
+                continue
+            source = str(path)
+            if deduplicator is None:
+                chunks.extend(file_chunks)
+                sources.extend([source] * len(file_chunks))
+                spans.extend(file_spans)
+                continue
+            start = time.perf_counter()
+            for chunk, span in zip(file_chunks, file_spans):
+                signature = simhash(chunk)
+                match = deduplicator.find(signature)
+                if match is not None:
+                    stats["duplicates"] += 1
+                    if deduplicator.merge(match, source):
+                        duplicates.append((match, source))
+                    continue
+                deduplicator.add(signature, writer.count + len(chunks), source)
+                chunks.append(chunk)
+                sources.append(source)
+                spans.append(span)
+            stats["dedup_seconds"] += time.perf_counter() - start
+
+        if chunks:
+            start = time.perf_counter()
+            vectors = get_embeddings(chunks, model=model, batch_size=batch_size,
+                                     workers=workers, use_cache=use_cache, server_url=server_url)
+            embedded = time.perf_counter()
+            writer.add(vectors, chunks, sources, spans=spans)
+            stats["embed_seconds"] += embedded - start
+            stats["write_seconds"] += time.perf_counter() - embedded
+            stats["chunks"] += len(chunks)
+        writer.add_duplicates([chunk_id for chunk_id, _ in duplicates], [source for _, source in duplicates])
+
+        for path, _, _, fingerprint, error in group:
+            if error is None:
+                writer.manifest[manifest_key(path)] = dict(fingerprint, source=str(path))
+                stats["files"] += 1
+
+        if time.monotonic() - last_checkpoint >= checkpoint_interval:
+            writer.checkpoint()
+            last_checkpoint = time.monotonic()
+
+    writer.checkpoint()
+    return stats
@@ -0,0 +1,206 @@
+"""
+Vector quantisation for RAG indexes.
+
+Quantised codes are much smaller than float32 vectors, so a query scans
+them instead and only re-scores the best candidates against the exact
+(memory-mapped) vectors:
+
+- "sq8": int8 scalar quantisation with a per-dimension scale (4x smaller)
+- "pq":  product quantisation, one byte per subspace (dim / subspaces * 4x smaller)
+
+Both use asymmetric distance computation: the query stays in float32 and
+only the stored vectors are quantised.
+"""
+
+import numpy as np
+
+# Rows decoded or encoded at a time, to bound temporary memory
+BLOCK_SIZE = 65536
+
+# Vectors sampled to train product-quantisation codebooks
+PQ_TRAIN_SAMPLES = 32768
+
+# Centroids per product-quantisation subspace (codes fit in one byte)
+PQ_CENTROIDS = 256
+
+# Quantised candidates re-scored exactly per query, by default
+DEFAULT_RERANK = 100
+
+
+def default_subspaces(dim):
+    """Pick a PQ subspace count: 8 dimensions per subspace when possible."""
+    for size in (8, 4, 2, 1):
+        if dim % size == 0:
+            return dim // size
+    return dim
+
+
+class ScalarQuantizer:
+    """int8 codes with a symmetric per-dimension scale."""
+
+    kind = "sq8"
+    code_dtype = np.int8
+
+    def __init__(self, scale=None):
+        self.scale = scale
+
+    def train(self, vectors):
+        """Fit the per-dimension scale to the largest absolute value seen."""
+        peak = np.zeros(vectors.shape[1], dtype=np.float32)
+        for start in range(0, len(vectors), BLOCK_SIZE):
+            block = np.asarray(vectors[start:start + BLOCK_SIZE], dtype=np.float32)
+            np.maximum(peak, np.abs(block).max(axis=0), out=peak)
+        peak[peak == 0] = 1.0
+        self.scale = peak / 127.0
+        return self
+
+    def code_shape(self, dim):
+        return (dim,)
+
+    def encode(self, vectors):
+        """Quantise float vectors to int8 codes."""
+        codes = np.rint(np.asarray(vectors, dtype=np.float32) / self.scale)
+        return np.clip(codes, -127, 127).astype(np.int8)
+
+    def scores(self, query_vector, codes):
+        """Approximate dot products between a query and coded vectors."""
+        weighted = (query_vector * self.scale).astype(np.float32)
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), BLOCK_SIZE):
+            block = np.asarray(codes[start:start + BLOCK_SIZE], dtype=np.float32)
+            out[start:start + len(block)] = block @ weighted
+        return out
+
+    def save(self, path):
+        np.save(path / "sq8_scale.npy", self.scale)
+
+    @classmethod
+    def load(cls, path, info):
+        return cls(np.load(path / "sq8_scale.npy"))
+
+
+def _kmeans(data, k, iterations, rng):
+    """Plain (Euclidean) k-means returning float32 centroids."""
+    k = min(k, len(data))
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        # argmin ||x - c||^2 == argmax (x.c - ||c||^2 / 2)
+        assignments = np.argmax(data @ centroids.T - 0.5 * (centroids ** 2).sum(axis=1), axis=1)
+        counts = np.bincount(assignments, minlength=k)
+        sums = np.stack([np.bincount(assignments, weights=data[:, d], minlength=k)
+                         for d in range(data.shape[1])], axis=1)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), size=len(empty))]
+    return centroids
+
+
+class ProductQuantizer:
+    """One-byte codes per subspace against per-subspace k-means codebooks."""
+
+    kind = "pq"
+    code_dtype = np.uint8
+
+    def __init__(self, subspaces=None, codebooks=None):
+        self.subspaces = subspaces
+        self.codebooks = codebooks
+
+    def train(self, vectors, iterations=10, seed=0):
+        """Train one codebook per subspace on a sample of the vectors."""
+        rng = np.random.default_rng(seed)
+        n, dim = vectors.shape
+        if self.subspaces is None:
+            self.subspaces = default_subspaces(dim)
+        if dim % self.subspaces:
+            raise ValueError(f"PQ subspaces ({self.subspaces}) must divide the vector dimension ({dim})")
+        sample_size = min(n, PQ_TRAIN_SAMPLES)
+        sample = np.asarray(vectors[np.sort(rng.choice(n, size=sample_size, replace=False))], dtype=np.float32)
+        sub_dim = dim // self.subspaces
+        codebooks = np.zeros((self.subspaces, PQ_CENTROIDS, sub_dim), dtype=np.float32)
+        for m in range(self.subspaces):
+            centroids = _kmeans(sample[:, m * sub_dim:(m + 1) * sub_dim], PQ_CENTROIDS, iterations, rng)
+            codebooks[m, :len(centroids)] = centroids
+        self.codebooks = codebooks
+        return self
+
+    def code_shape(self, dim):
+        return (self.subspaces,)
+
+    def encode(self, vectors):
+        """Map each subvector to its nearest codebook entry."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        sub_dim = vectors.shape[1] // self.subspaces
+        codes = np.empty((len(vectors), self.subspaces), dtype=np.uint8)
+        for m, codebook in enumerate(self.codebooks):
+            sub = vectors[:, m * sub_dim:(m + 1) * sub_dim]
+            codes[:, m] = np.argmax(sub @ codebook.T - 0.5 * (codebook ** 2).sum(axis=1), axis=1)
+        return codes
+
+    def scores(self, query_vector, codes):
+        """Approximate dot products via per-subspace lookup tables."""
+        sub_dim = len(query_vector) // self.subspaces
+        tables = np.einsum("mcd,md->mc", self.codebooks, query_vector.reshape(self.subspaces, sub_dim))
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), BLOCK_SIZE):
+            block = np.asarray(codes[start:start + BLOCK_SIZE])
+            out[start:start + len(block)] = tables[np.arange(self.subspaces), block].sum(axis=1)
+        return out
+
+    def save(self, path):
+        np.save(path / "pq_codebooks.npy", self.codebooks)
+
+    @classmethod
+    def load(cls, path, info):
+        return cls(info["subspaces"], np.load(path / "pq_codebooks.npy"))
+
+
+QUANTIZERS = {cls.kind: cls for cls in (ScalarQuantizer, ProductQuantizer)}
+
+
+def check_quantization(kind, subspaces=None, dim=None):
+    """
+    Check quantisation settings before any work is done with them.
+
+    Args:
+        kind: "sq8", "pq" or None for no quantisation
+        subspaces: PQ subspace count, only valid with "pq"
+        dim: Vector dimension, if already known
+
+    Raises:
+        ValueError: If the settings can't be used
+    """
+    if kind is None:
+        if subspaces is not None:
+            raise ValueError("PQ subspaces are only used with 'pq' quantisation")
+        return
+    if kind not in QUANTIZERS:
+        raise ValueError(f"Unknown quantisation '{kind}'. Choose from: {', '.join(QUANTIZERS)}")
+    if subspaces is None:
+        return
+    if kind != "pq":
+        raise ValueError("PQ subspaces are only used with 'pq' quantisation")
+    if subspaces < 1:
+        raise ValueError("PQ subspaces must be at least 1")
+    if dim and dim % subspaces:
+        raise ValueError(f"PQ subspaces ({subspaces}) must divide the vector dimension ({dim})")
+
+
+def make_quantizer(kind, subspaces=None):
+    """
+    Create an untrained quantiser.
+
+    Args:
+        kind: "sq8" or "pq"
+        subspaces: PQ subspace count (default: one per 8 dimensions)
+    """
+    check_quantization(kind, subspaces)
+    if kind == "pq":
+        return ProductQuantizer(subspaces)
+    return ScalarQuantizer()
+
+
+def load_quantizer(path, info):
+    """Load the quantiser described by an index header's "quantization" entry."""
+    return QUANTIZERS[info["type"]].load(path, info)
@@ -0,0 +1,145 @@
+"""
+Query-embedding cache for the RAG retrieval path.
+
+Interactive sessions and the web UI see the same questions again and
+again. Query embeddings are kept in a bounded in-memory LRU, keyed by
+embedding model and normalised query text, so a repeated question skips
+the embedding server entirely. The cache can optionally persist to SQLite
+so repeats are also free across runs.
+"""
+
+from collections import OrderedDict
+import sqlite3
+import threading
+from ..config import CONFIG_DIR, load_config, log
+from .embedding_cache import EmbeddingCache
+
+DEFAULT_QUERY_CACHE_SIZE = 1024
+DEFAULT_QUERY_CACHE_PATH = CONFIG_DIR / "query_cache.sqlite3"
+
+_query_cache = None
+_query_cache_lock = threading.Lock()
+
+
+def normalize_query(query):
+    """Canonicalise query text so trivially different repeats share an entry."""
+    return " ".join(query.casefold().split())
+
+
+class QueryCache:
+    """
+    Bounded LRU of query embeddings, optionally backed by an EmbeddingCache.
+
+    Hits and misses are counted across both tiers: a query found on disk
+    counts as a hit and is promoted into memory.
+    """
+
+    def __init__(self, max_entries=DEFAULT_QUERY_CACHE_SIZE, persist_path=None):
+        """
+        Args:
+            max_entries: Query embeddings kept in memory
+            persist_path: Optional SQLite file to persist entries to
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = EmbeddingCache(persist_path, max_entries) if persist_path else None
+
+    def _remember(self, key, vector):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, model, queries):
+        """
+        Look up cached query embeddings.
+
+        Args:
+            model: Embedding model name
+            queries: List of query texts
+
+        Returns:
+            dict: Position in `queries` -> float32 vector, for cached queries only
+        """
+        keys = [normalize_query(query) for query in queries]
+        found = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._entries.get((model, key))
+                if vector is not None:
+                    self._entries.move_to_end((model, key))
+                    found[i] = vector
+        missing = [i for i in range(len(keys)) if i not in found]
+        if self._disk is not None and missing:
+            stored = self._disk.get_many(model, [keys[i] for i in missing])
+            with self._lock:
+                for j, vector in stored.items():
+                    found[missing[j]] = vector
+                    self._remember((model, keys[missing[j]]), vector)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model, queries, vectors):
+        """
+        Store query embeddings.
+
+        Args:
+            model: Embedding model name
+            queries: List of query texts
+            vectors: Array with one embedding row per query
+        """
+        keys = [normalize_query(query) for query in queries]
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember((model, key), vector)
+        if self._disk is not None:
+            self._disk.put_many(model, keys, vectors)
+
+    def stats(self):
+        """Return hit/miss counts, hit rate and the number of entries in memory."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def clear(self):
+        """Remove every cached query embedding, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+
+def get_query_cache():
+    """
+    Get the shared query-embedding cache, or None if disabled in config.
+
+    Controlled by the `query_cache_size` (0 disables) and
+    `query_cache_persist` config keys.
+
+    Returns:
+        QueryCache or None
+    """
+    global _query_cache
+    config = load_config()
+    size = config.get("query_cache_size", DEFAULT_QUERY_CACHE_SIZE)
+    if not size:
+        return None
+    with _query_cache_lock:
+        if _query_cache is None:
+            persist_path = DEFAULT_QUERY_CACHE_PATH if config.get("query_cache_persist", False) else None
+            try:
+                _query_cache = QueryCache(size, persist_path)
+            except sqlite3.Error as e:
+                log.warning(f"Persistent query cache unavailable: {e}")
+                _query_cache = QueryCache(size)
+        _query_cache.max_entries = size
+        return _query_cache
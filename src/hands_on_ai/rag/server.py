@@ -0,0 +1,399 @@
+"""
+Long-running retrieval daemon for the rag CLI.
+
+`rag serve` keeps indexes, the embedding client and the query cache
+resident in one process and answers retrieval requests over local HTTP,
+either on a TCP port or a Unix socket. While it runs, `rag ask` and
+`rag interactive` send their searches to it instead of opening the
+index and the embedding client themselves, so a query costs the
+embedding call plus a few milliseconds.
+
+The daemon advertises itself in ~/.hands-on-ai/rag-serve.json, readable
+only by its owner. The file holds its address and a random token that
+clients must send, so other local users cannot query it.
+
+Endpoints (JSON in and out):
+
+- GET  /health    status, version and the served index paths
+- POST /retrieve  {"query" or "queries", "index_path", "k", "mode", ...}
+- POST /ask       like /retrieve for one query, plus a generated "answer"
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import http.client
+import json
+import os
+import secrets
+import socket
+import socketserver
+import threading
+import time
+from .. import __version__
+from ..config import CONFIG_DIR, get_timeout, log
+from . import utils
+from .utils import _resolve_index_path, build_rag_prompt, get_top_k, get_top_k_many, load_index_cached, RAG_SYSTEM_PROMPT
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+STATE_PATH = CONFIG_DIR / "rag-serve.json"
+
+# Seconds a client waits for /health before deciding no daemon is running
+CONNECT_TIMEOUT = 1.0
+
+# Request fields passed through to get_top_k / get_top_k_many
+RETRIEVAL_OPTIONS = ("k", "nprobe", "rerank", "mode", "alpha", "include", "exclude")
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class RetrievalServerError(RuntimeError):
+    """A request to the retrieval daemon failed."""
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class RetrievalServer:
+    """
+    HTTP retrieval daemon serving a fixed set of indexes.
+
+    Only the indexes given at start-up are served; they are opened up front
+    and kept resident (and reopened automatically if rebuilt).
+    """
+
+    def __init__(self, index_paths, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, answers=True):
+        """
+        Args:
+            index_paths: Indexes to serve
+            host, port: TCP address to listen on (ignored with socket_path)
+            socket_path: Listen on this Unix socket instead of TCP
+            answers: Also serve /ask, which generates answers with the chat model
+        """
+        self.indexes = {}
+        for path in index_paths:
+            resolved = _resolve_index_path(path)
+            self.indexes[str(resolved)] = len(load_index_cached(resolved))
+        # Keep every served index resident in the shared index cache
+        utils.INDEX_CACHE_SIZE = max(utils.INDEX_CACHE_SIZE, len(self.indexes))
+        self.answers = answers
+        self.token = secrets.token_urlsafe(24)
+        self.started = time.time()
+        self.socket_path = socket_path
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self._server = _UnixHTTPServer(str(socket_path), self._handler())
+            os.chmod(socket_path, 0o600)
+        else:
+            self._server = ThreadingHTTPServer((host, port), self._handler())
+            self._server.daemon_threads = True
+
+    @property
+    def address(self):
+        """Where clients connect: an http:// URL or a unix: socket path."""
+        if self.socket_path:
+            return f"unix:{os.path.abspath(self.socket_path)}"
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def health(self):
+        return {
+            "status": "ok",
+            "version": __version__,
+            "pid": os.getpid(),
+            "indexes": list(self.indexes),
+            "answers": self.answers,
+            "uptime": time.time() - self.started,
+        }
+
+    def _index_path(self, request):
+        path = request.get("index_path")
+        resolved = str(_resolve_index_path(path)) if path else next(iter(self.indexes))
+        if resolved not in self.indexes:
+            raise LookupError(f"Index not served: {path}")
+        return resolved
+
+    def retrieve(self, request):
+        """Handle /retrieve: results for "query" or for each of "queries"."""
+        index_path = self._index_path(request)
+        options = {key: request[key] for key in RETRIEVAL_OPTIONS if request.get(key) is not None}
+        if "queries" in request:
+            batches = get_top_k_many(request["queries"], index_path, return_scores=True, **options)
+            return {"results": [_encode_results(results, scores) for results, scores in batches]}
+        results, scores = get_top_k(request["query"], index_path, return_scores=True, **options)
+        return {"results": _encode_results(results, scores)}
+
+    def ask(self, request):
+        """Handle /ask: retrieve context for "query" and answer it with the chat model."""
+        if not self.answers:
+            raise LookupError("Answers are disabled on this server")
+        from ..chat import get_response
+
+        index_path = self._index_path(request)
+        options = {key: request[key] for key in RETRIEVAL_OPTIONS if request.get(key) is not None}
+        results, scores = get_top_k(request["query"], index_path, return_scores=True, **options)
+        answer = get_response(build_rag_prompt(request["query"], results), system=RAG_SYSTEM_PROMPT,
+                              model=request.get("model"))
+        return {"results": _encode_results(results, scores), "answer": answer}
+
+    def _handler(self):
+        server = self
+        routes = {"/retrieve": self.retrieve, "/ask": self.ask}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; with Nagle's
+            # algorithm on, each response would wait ~40 ms for a delayed ACK
+            disable_nagle_algorithm = not server.socket_path
+
+            def log_message(self, format, *args):
+                log.debug("rag serve: " + format % args)
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _authorized(self):
+                if secrets.compare_digest(self.headers.get("Authorization", ""), f"Bearer {server.token}"):
+                    return True
+                self._send(401, {"error": "Missing or invalid token"})
+                return False
+
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                if self.path == "/health":
+                    self._send(200, server.health())
+                else:
+                    self._send(404, {"error": f"Unknown endpoint: {self.path}"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                if not self._authorized():
+                    return
+                route = routes.get(self.path)
+                if route is None:
+                    self._send(404, {"error": f"Unknown endpoint: {self.path}"})
+                    return
+                try:
+                    self._send(200, route(json.loads(body or b"{}")))
+                except KeyError as e:
+                    self._send(400, {"error": f"Missing field: {e}"})
+                except LookupError as e:
+                    self._send(404, {"error": str(e)})
+                except (ValueError, TypeError) as e:
+                    self._send(400, {"error": str(e)})
+                except Exception as e:
+                    log.exception("rag serve request failed")
+                    self._send(500, {"error": str(e)})
+
+        return Handler
+
+    def _write_state(self):
+        state = {"address": self.address, "token": self.token, "pid": os.getpid(),
+                 "indexes": list(self.indexes), "started": self.started}
+        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = STATE_PATH.with_name(f"{STATE_PATH.name}.tmp-{os.getpid()}")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, STATE_PATH)
+
+    def _remove_state(self):
+        state = _read_state()
+        if state and state.get("pid") == os.getpid():
+            STATE_PATH.unlink(missing_ok=True)
+
+    def serve_forever(self):
+        """Advertise the server and handle requests until shutdown() or Ctrl-C."""
+        self._write_state()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._remove_state()
+            self._server.server_close()
+            if self.socket_path and os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def shutdown(self):
+        """Stop serve_forever() (call from another thread)."""
+        self._server.shutdown()
+
+
+def _encode_results(results, scores):
+    return [{"chunk": chunk, "source": source, "score": score}
+            for (chunk, source), score in zip(results, scores)]
+
+
+def _decode_results(results, return_scores):
+    context = [(hit["chunk"], hit["source"]) for hit in results]
+    if return_scores:
+        return context, [hit["score"] for hit in results]
+    return context
+
+
+def _read_state():
+    try:
+        with open(STATE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP over a Unix domain socket."""
+
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class RetrievalClient:
+    """
+    Client for a running `rag serve` daemon.
+
+    Offers get_top_k / get_top_k_many with the same arguments and return
+    values as the functions in rag.utils. One keep-alive connection is
+    reused across calls. Raises ConnectionError if the daemon has gone
+    away and RetrievalServerError if it rejects a request.
+    """
+
+    def __init__(self, address, token, timeout=None):
+        """
+        Args:
+            address: http://host:port URL or unix:/path/to/socket
+            token: Token from the daemon's state file
+            timeout: Seconds to wait for a response (default from config)
+        """
+        self.address = address
+        self.token = token
+        self.timeout = timeout or get_timeout()
+        self.indexes = []
+        self.answers = False
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self, timeout):
+        if self.address.startswith("unix:"):
+            return _UnixHTTPConnection(self.address[len("unix:"):], timeout=timeout)
+        host_port = self.address.split("://", 1)[-1].rstrip("/")
+        return http.client.HTTPConnection(host_port, timeout=timeout)
+
+    def _request(self, method, path, payload=None, timeout=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
+        timeout = timeout or self.timeout
+        with self._lock:
+            while True:
+                reused = self._connection is not None
+                if not reused:
+                    self._connection = self._connect(timeout)
+                # The kept-alive socket was opened with an earlier call's timeout
+                self._connection.timeout = timeout
+                if self._connection.sock is not None:
+                    self._connection.sock.settimeout(timeout)
+                try:
+                    self._connection.request(method, path, body=body, headers=headers)
+                    response = self._connection.getresponse()
+                    data = json.loads(response.read() or b"{}")
+                    break
+                except TimeoutError as e:
+                    # The daemon may still be working on the request: never send it again
+                    self._drop_connection()
+                    raise TimeoutError(f"rag serve at {self.address} did not respond within {timeout}s") from e
+                except (OSError, http.client.HTTPException) as e:
+                    self._drop_connection()
+                    # Only a reused idle connection the daemon has since closed is
+                    # safe to retry: the request never reached it
+                    if not (reused and isinstance(e, (http.client.RemoteDisconnected, BrokenPipeError,
+                                                      ConnectionResetError))):
+                        raise ConnectionError(f"rag serve at {self.address} is not responding: {e}") from e
+        if response.status != 200:
+            raise RetrievalServerError(data.get("error", f"HTTP {response.status}"))
+        return data
+
+    def _drop_connection(self):
+        self._connection.close()
+        self._connection = None
+
+    def health(self, timeout=CONNECT_TIMEOUT):
+        """Check the daemon is up and remember which indexes it serves."""
+        data = self._request("GET", "/health", timeout=timeout)
+        self.indexes = data.get("indexes", [])
+        self.answers = data.get("answers", False)
+        return data
+
+    def serves(self, index_path):
+        """Check whether the daemon serves an index."""
+        return str(_resolve_index_path(index_path)) in self.indexes
+
+    def get_top_k(self, query, index_path, k=3, return_scores=False, **options):
+        """Retrieve the top k chunks for a query; see rag.utils.get_top_k."""
+        data = self._request("POST", "/retrieve", {"query": query, "index_path": str(index_path), "k": k, **options})
+        return _decode_results(data["results"], return_scores)
+
+    def get_top_k_many(self, queries, index_path, k=3, return_scores=False, **options):
+        """Retrieve the top k chunks for each query; see rag.utils.get_top_k_many."""
+        data = self._request("POST", "/retrieve",
+                             {"queries": list(queries), "index_path": str(index_path), "k": k, **options})
+        return [_decode_results(results, return_scores) for results in data["results"]]
+
+    def ask(self, query, index_path, model=None, **options):
+        """
+        Retrieve context and generate an answer on the daemon.
+
+        Returns:
+            tuple: (answer, [(chunk, source), ...], scores)
+        """
+        data = self._request("POST", "/ask", {"query": query, "index_path": str(index_path),
+                                              "model": model, **options})
+        context, scores = _decode_results(data["results"], True)
+        return data["answer"], context, scores
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def get_retrieval_client(index_path=None):
+    """
+    Get a client for the running `rag serve` daemon, if there is one.
+
+    Args:
+        index_path: Only return a client if the daemon serves this index
+
+    Returns:
+        RetrievalClient or None: None if no daemon is running or it does
+        not serve index_path
+    """
+    global _client
+    state = _read_state()
+    if not state:
+        return None
+    with _client_lock:
+        if _client is None or _client.token != state.get("token"):
+            client = RetrievalClient(state["address"], state["token"])
+            try:
+                client.health()
+            except (ConnectionError, RetrievalServerError) as e:
+                log.debug(str(e))
+                return None
+            _client = client
+        client = _client
+    if index_path is not None and not client.serves(index_path):
+        return None
+    return client
@@ -0,0 +1,282 @@
+"""
+Sharded RAG indexes.
+
+A sharded index is a directory holding shards.json and one ordinary index
+directory per shard under shards/. Each shard is built, memory-mapped and
+replaced on its own, so adding a course folder or rebuilding one shard
+never touches the others. Queries search every shard in a thread pool
+(NumPy releases the GIL during the matrix products) and merge the
+per-shard top-k lists with a heap.
+
+Chunk ids are global: shard s owns ids offsets[s]:offsets[s + 1].
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from .store import IndexStore, HYBRID_ALPHA, HYBRID_POOL, fuse_scores, _read_json
+from .bm25 import collection_stats
+from .vectors import top_k_indices
+
+SHARDS_FORMAT = "hands-on-ai-rag-shards"
+SHARDS_VERSION = 1
+
+SHARD_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def is_sharded(path):
+    """Check whether path is a sharded index directory."""
+    return (Path(path) / "shards.json").exists()
+
+
+def shard_path(path, name):
+    """
+    Get the directory a named shard of a sharded index lives in.
+
+    Raises:
+        ValueError: If name is not a valid shard name
+    """
+    if not SHARD_NAME.match(name):
+        raise ValueError(f"Invalid shard name '{name}': use letters, digits, '.', '_' and '-'")
+    return Path(path) / "shards" / name
+
+
+def read_shard_names(path):
+    """List the shards registered in a sharded index."""
+    data = _read_json(Path(path) / "shards.json", {})
+    return list(data.get("shards", []))
+
+
+def _write_shard_names(path, names):
+    """Atomically rewrite shards.json (its stat also marks the index as changed)."""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    tmp_path = path / f"shards.json.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"format": SHARDS_FORMAT, "version": SHARDS_VERSION,
+                   "shards": names, "updated": time.time()}, f)
+    os.replace(tmp_path, path / "shards.json")
+
+
+def register_shard(path, name):
+    """
+    Add a built shard to a sharded index, creating the index if needed.
+
+    Call this after writing the shard to shard_path(path, name); calling it
+    again for an existing shard marks the index as changed so cached
+    copies are reloaded.
+
+    Args:
+        path: Sharded index directory
+        name: Shard name
+
+    Raises:
+        ValueError: If path is an ordinary (unsharded) index
+    """
+    path = Path(path)
+    if (path / "header.json").exists():
+        raise ValueError(f"{path} is an unsharded index; choose another path for a sharded index")
+    names = read_shard_names(path)
+    if name not in names:
+        names.append(name)
+    _write_shard_names(path, names)
+
+
+def remove_shard(path, name):
+    """
+    Remove a shard from a sharded index and delete its files.
+
+    Args:
+        path: Sharded index directory
+        name: Shard name
+    """
+    names = read_shard_names(path)
+    if name in names:
+        names.remove(name)
+        _write_shard_names(path, names)
+    shutil.rmtree(shard_path(path, name), ignore_errors=True)
+
+
+def _get_executor():
+    """Shared thread pool for searching shards."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 4,
+                                           thread_name_prefix="rag-shard")
+        return _executor
+
+
+class ShardedIndex:
+    """
+    Read-only view over the shards of a sharded index.
+
+    Offers the same query interface as IndexStore, with global chunk ids.
+    """
+
+    def __init__(self, path, names, shards):
+        self.path = Path(path)
+        self.names = names
+        self.shards = shards
+        self.offsets = np.concatenate([[0], np.cumsum([len(s) for s in shards])]).astype(np.int64)
+        models = {s.model for s in shards if len(s)}
+        if len(models) > 1:
+            raise ValueError(f"Shards of {path} were embedded with different models: {', '.join(map(str, models))}")
+        self.header = {"count": int(self.offsets[-1]), "shards": names, "model": models.pop() if models else None}
+
+    @classmethod
+    def open(cls, path):
+        """Open every shard of a sharded index (each memory-mapped)."""
+        path = Path(path)
+        names = read_shard_names(path)
+        return cls(path, names, [IndexStore.open(shard_path(path, name)) for name in names])
+
+    @property
+    def model(self):
+        """Embedding model shared by the shards, if known."""
+        return self.header["model"]
+
+    @property
+    def manifest(self):
+        """Combined manifest of every shard, or None if none has one."""
+        manifests = [s.manifest for s in self.shards if s.manifest is not None]
+        if not manifests:
+            return None
+        return {path: fingerprint for manifest in manifests for path, fingerprint in manifest.items()}
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def _locate(self, i):
+        shard = int(np.searchsorted(self.offsets, i, side="right")) - 1
+        return self.shards[shard], int(i - self.offsets[shard])
+
+    def chunk(self, i):
+        """Get the text of chunk i."""
+        store, local = self._locate(i)
+        return store.chunk(local)
+
+    def source(self, i):
+        """Get the source name of chunk i."""
+        store, local = self._locate(i)
+        return store.source(local)
+
+    def sources_of(self, i):
+        """Get every source chunk i was found in (see IndexStore.sources_of)."""
+        store, local = self._locate(i)
+        return store.sources_of(local)
+
+    def span(self, i):
+        """Get the character offsets of chunk i in its source text, or None."""
+        store, local = self._locate(i)
+        return store.span(local)
+
+    def all_chunks(self):
+        """Get every chunk's text as a list."""
+        return [chunk for store in self.shards for chunk in store.all_chunks()]
+
+    @property
+    def vectors(self):
+        """All vectors concatenated in memory (prefer the search methods)."""
+        return np.concatenate([np.asarray(s.vectors) for s in self.shards]) if self.shards \
+            else np.zeros((0, 0), dtype=np.float32)
+
+    @property
+    def sources(self):
+        """Array with the source name of every chunk."""
+        return np.concatenate([s.sources for s in self.shards]) if self.shards else np.array([], dtype=str)
+
+    def source_mask(self, include=None, exclude=None):
+        """Per-shard chunk masks for source filters (see IndexStore.source_mask), or None."""
+        masks = [s.source_mask(include, exclude) for s in self.shards]
+        return None if all(m is None for m in masks) else masks
+
+    def _map(self, search, mask):
+        """Run search(shard, shard_mask) on every shard, in parallel when there are several."""
+        masks = mask if mask is not None else [None] * len(self.shards)
+        if len(self.shards) == 1:
+            return [search(self.shards[0], masks[0])]
+        return list(_get_executor().map(search, self.shards, masks))
+
+    def _merge(self, per_shard, k):
+        """Merge per-shard (indices, scores) lists, each best first, into the global top k."""
+        streams = [
+            zip(scores.tolist(), (indices + self.offsets[s]).tolist())
+            for s, (indices, scores) in enumerate(per_shard)
+        ]
+        best = list(itertools.islice(heapq.merge(*streams, key=lambda hit: -hit[0]), k))
+        return (np.array([i for _, i in best], dtype=np.intp),
+                np.array([score for score, _ in best], dtype=np.float32))
+
+    def search(self, query_vector, k, nprobe=None, rerank=None, mask=None):
+        """Dense search across shards; see IndexStore.search."""
+        return self._merge(self._map(
+            lambda store, m: store.search(query_vector, k, nprobe=nprobe, rerank=rerank, mask=m), mask), k)
+
+    def search_many(self, query_vectors, k, nprobe=None, rerank=None, mask=None):
+        """Batched dense search across shards; see IndexStore.search_many."""
+        per_shard = self._map(
+            lambda store, m: store.search_many(query_vectors, k, nprobe=nprobe, rerank=rerank, mask=m), mask)
+        return [self._merge([hits[q] for hits in per_shard], k) for q in range(len(query_vectors))]
+
+    def _collection(self, query):
+        """BM25 statistics of every non-empty shard together, for one query."""
+        return collection_stats([s.bm25 for s in self.shards if len(s)], query)
+
+    def lexical_search(self, query, k, mask=None):
+        """
+        BM25 search across shards; see IndexStore.lexical_search.
+
+        IDF and length normalisation use statistics over all shards, so
+        scores match those of one unsharded index of the same chunks.
+        """
+        collection = self._collection(query)
+        return self._merge(self._map(
+            lambda store, m: store.lexical_search(query, k, mask=m, collection=collection), mask), k)
+
+    def hybrid_search(self, query, query_vector, k, alpha=HYBRID_ALPHA, nprobe=None, rerank=None, mask=None):
+        """
+        Hybrid search across shards; see IndexStore.hybrid_search.
+
+        Each shard gathers its candidates with BM25 statistics over all
+        shards, and the candidates are fused together with BM25 scaled by
+        the best lexical score of any shard, so fused scores match those
+        of one unsharded index of the same chunks.
+        """
+        if not self.shards:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+        collection = self._collection(query)
+        per_shard = self._map(
+            lambda store, m: store.hybrid_candidates(query, query_vector, max(k, HYBRID_POOL), nprobe=nprobe,
+                                                     rerank=rerank, mask=m, collection=collection), mask)
+        candidates = np.concatenate([hits[0] + self.offsets[s] for s, hits in enumerate(per_shard)])
+        if len(candidates) == 0:
+            return candidates.astype(np.intp), np.empty(0, dtype=np.float32)
+        peak = max(hits[3] for hits in per_shard)
+        fused = fuse_scores(np.concatenate([hits[1] for hits in per_shard]),
+                            np.concatenate([hits[2] for hits in per_shard]), peak, alpha)
+        best = top_k_indices(fused, k)
+        return candidates[best].astype(np.intp), fused[best]
+
+
+def open_index(path):
+    """
+    Open an index directory, sharded index or legacy .npz file.
+
+    Returns:
+        IndexStore or ShardedIndex
+    """
+    if is_sharded(path):
+        return ShardedIndex.open(path)
+    return IndexStore.open(path)
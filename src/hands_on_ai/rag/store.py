@@ -0,0 +1,999 @@
+"""
+On-disk vector store for RAG indexes.
+
+An index is a directory holding:
+
+- header.json        format version, vector count and dimensions, embedding model
+- vectors.npy        L2-normalised float32 vectors, opened with mmap_mode="r"
+- chunks.bin         UTF-8 chunk text, concatenated
+- chunk_offsets.npy  byte offsets into chunks.bin (one more than the chunk count)
+- sources.json       distinct source names
+- source_ids.npy     int32 position in sources.json for each chunk
+- spans.npy          int64 (start, end) character offsets of each chunk in its
+                     source's extracted text, or (-1, -1) where unknown
+- duplicate_*.npy    (chunk id, source id) pairs recording further sources of
+                     chunks whose near-duplicates were dropped (see rag.dedup)
+- manifest.json      indexed files, for incremental updates
+- ivf_*.npy          optional IVF centroids and posting lists (see rag.ivf)
+- sq8_*.npy, pq_*.npy optional quantised codes and codebooks (see rag.quantize)
+- bm25_*              optional BM25 inverted index for lexical search (see rag.bm25)
+
+Nothing is unpickled and nothing but the header and source names is read on
+open; chunk text is read only for the chunks a query returns. Legacy
+single-file .npz indexes are still readable.
+"""
+
+from fnmatch import fnmatchcase
+import json
+import os
+import shutil
+import struct
+import time
+from pathlib import Path
+import numpy as np
+from .vectors import normalize_vectors, top_k_indices, top_k_rows
+from . import ivf, quantize
+from .bm25 import BM25Index
+
+FORMAT_NAME = "hands-on-ai-rag-index"
+FORMAT_VERSION = 1
+
+# Default weight of dense similarity in hybrid search (the rest is BM25)
+HYBRID_ALPHA = 0.5
+
+# Candidates taken from each of dense and lexical search before fusing
+HYBRID_POOL = 50
+
+# Bytes of query-by-chunk scores computed per block in search_many
+SEARCH_BLOCK_BYTES = 64 * 1024 * 1024
+
+# Source filters whose chunk masks are kept per open index
+MASK_CACHE_SIZE = 32
+
+# Fixed .npy header size, so headers can be rewritten in place as arrays grow
+_NPY_HEADER_SIZE = 128
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def _npy_header(dtype, shape):
+    """Build a .npy v1.0 header padded to _NPY_HEADER_SIZE bytes."""
+    header = repr({
+        "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+        "fortran_order": False,
+        "shape": tuple(shape),
+    })
+    length = _NPY_HEADER_SIZE - len(_NPY_MAGIC) - 2
+    header = header.ljust(length - 1) + "\n"
+    return _NPY_MAGIC + struct.pack("<H", length) + header.encode("latin1")
+
+
+class NpyAppender:
+    """
+    Write a .npy file row by row without knowing its final length.
+
+    The header is reserved up front and rewritten with the real shape on
+    close, so the file stays a standard .npy that np.load can memory-map.
+    """
+
+    def __init__(self, path, dtype, row_shape=(), resume_count=None):
+        """
+        Args:
+            path: File to write
+            dtype: Element type
+            row_shape: Shape of each row after the first axis
+            resume_count: Reopen an existing file, keeping only its first
+                resume_count rows
+        """
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        if resume_count is None:
+            self.count = 0
+            self._file = open(self.path, "wb")
+            self._file.write(_npy_header(self.dtype, (0, *self.row_shape)))
+        else:
+            self.count = resume_count
+            row_bytes = self.dtype.itemsize * int(np.prod(self.row_shape, dtype=np.int64))
+            self._file = open(self.path, "r+b")
+            self._file.truncate(_NPY_HEADER_SIZE + resume_count * row_bytes)
+            self._file.seek(0, os.SEEK_END)
+
+    def append(self, rows):
+        """Append rows (an array whose trailing shape matches row_shape)."""
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        if rows.shape[1:] != self.row_shape:
+            raise ValueError(f"Expected rows of shape {self.row_shape}, got {rows.shape[1:]}")
+        self._file.write(rows.tobytes())
+        self.count += len(rows)
+
+    def flush(self):
+        """Flush appended rows to disk."""
+        self._file.flush()
+
+    def close(self):
+        """Write the final shape into the header and close the file."""
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(_npy_header(self.dtype, (self.count, *self.row_shape)))
+        self._file.close()
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def _read_json(path, default=None):
+    if not path.exists():
+        return default
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_optional(path):
+    """Load a small .npy file fully, or return None if it does not exist."""
+    return np.load(path) if path.exists() else None
+
+
+def replace_path(tmp_path, path):
+    """
+    Move a freshly written file or directory over path.
+
+    The old copy is renamed aside before the new one is renamed into place,
+    so path never holds a mix of the two. It is briefly missing between the
+    renames; load_index_cached() retries across that gap, so its callers
+    get either the complete old index or the complete new one.
+    """
+    tmp_path, path = Path(tmp_path), Path(path)
+    if not path.exists():
+        os.replace(tmp_path, path)
+        return
+    old_path = path.with_name(f".{path.name}.old-{os.getpid()}")
+    os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    if old_path.is_dir():
+        shutil.rmtree(old_path, ignore_errors=True)
+    else:
+        old_path.unlink(missing_ok=True)
+
+
+def _span_rows(spans, count):
+    """Turn optional chunk spans into an int64 (count, 2) array, -1 where unknown."""
+    if spans is None:
+        return np.full((count, 2), -1, dtype=np.int64)
+    rows = np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+    if len(rows) != count:
+        raise ValueError("spans must have one (start, end) pair per chunk")
+    return rows
+
+
+class IndexWriter:
+    """
+    Build an index directory incrementally.
+
+    Everything is written into a temporary sibling directory and moved into
+    place by commit(). A plain writer discards its partial index if the
+    `with` block raises. A resumable writer instead keeps it, and
+    checkpoint() records a consistent state that a later writer for the
+    same path and settings picks up from.
+    """
+
+    def __init__(self, path, model=None, resumable=False, settings=None,
+                 quantization=None, pq_subspaces=None):
+        """
+        Args:
+            path: Index directory to create or replace
+            model: Embedding model the vectors came from (recorded in the header)
+            resumable: Keep partial work across runs (see checkpoint())
+            settings: Build settings; a checkpoint is only resumed if they match
+            quantization, pq_subspaces: Quantisation commit() will use; checked
+                against the vector dimension as soon as it is known, so a bad
+                subspace count fails before the corpus is embedded
+        """
+        quantize.check_quantization(quantization, pq_subspaces)
+        self.path = Path(path)
+        self.model = model
+        self.resumable = resumable
+        self.settings = settings or {}
+        self.quantization = quantization
+        self.pq_subspaces = pq_subspaces
+        if resumable:
+            self.tmp_path = self.path.with_name(f".{self.path.name}.partial")
+        else:
+            self.tmp_path = self.path.with_name(f".{self.path.name}.tmp-{os.getpid()}")
+
+        state = _read_json(self.tmp_path / "checkpoint.json") if resumable else None
+        if (state and state.get("settings") == self.settings and state.get("model") == model
+                and (self.tmp_path / "duplicate_chunks.npy").exists()):
+            self._resume(state)
+            return
+
+        if self.tmp_path.exists():
+            shutil.rmtree(self.tmp_path)
+        self.tmp_path.mkdir(parents=True)
+        self.resumed = False
+        self.count = 0
+        self.dim = None
+        self.sources = []
+        self.manifest = {}
+        self._source_index = {}
+        self._vectors = None
+        self._bytes_written = 0
+        self._chunks = open(self.tmp_path / "chunks.bin", "wb")
+        self._offsets = NpyAppender(self.tmp_path / "chunk_offsets.npy", np.int64)
+        self._offsets.append(np.zeros(1, dtype=np.int64))
+        self._source_ids = NpyAppender(self.tmp_path / "source_ids.npy", np.int32)
+        self._spans = NpyAppender(self.tmp_path / "spans.npy", np.int64, (2,))
+        self._duplicate_chunks = NpyAppender(self.tmp_path / "duplicate_chunks.npy", np.int64)
+        self._duplicate_sources = NpyAppender(self.tmp_path / "duplicate_sources.npy", np.int32)
+
+    def _resume(self, state):
+        """Reopen a partial index, dropping anything written after its last checkpoint."""
+        quantize.check_quantization(self.quantization, self.pq_subspaces, state["dim"])
+        self.resumed = True
+        self.count = state["count"]
+        self.dim = state["dim"]
+        self.sources = state["sources"]
+        self.manifest = state["manifest"]
+        self._source_index = {source: i for i, source in enumerate(self.sources)}
+        self._bytes_written = state["bytes"]
+        self._chunks = open(self.tmp_path / "chunks.bin", "r+b")
+        self._chunks.truncate(self._bytes_written)
+        self._chunks.seek(0, os.SEEK_END)
+        self._offsets = NpyAppender(self.tmp_path / "chunk_offsets.npy", np.int64, resume_count=self.count + 1)
+        self._source_ids = NpyAppender(self.tmp_path / "source_ids.npy", np.int32, resume_count=self.count)
+        self._spans = NpyAppender(self.tmp_path / "spans.npy", np.int64, (2,), resume_count=self.count)
+        self._duplicate_chunks = NpyAppender(self.tmp_path / "duplicate_chunks.npy", np.int64,
+                                             resume_count=state["duplicates"])
+        self._duplicate_sources = NpyAppender(self.tmp_path / "duplicate_sources.npy", np.int32,
+                                              resume_count=state["duplicates"])
+        self._vectors = None
+        if self.dim is not None:
+            self._vectors = NpyAppender(self.tmp_path / "vectors.npy", np.float32, (self.dim,),
+                                        resume_count=self.count)
+
+    def checkpoint(self):
+        """
+        Flush everything added so far and record it as a resume point.
+
+        Files listed in `manifest` at this moment are treated as complete
+        when the build is resumed.
+        """
+        self._chunks.flush()
+        for appender in self._appenders():
+            appender.flush()
+        state = {
+            "count": self.count,
+            "dim": self.dim,
+            "bytes": self._bytes_written,
+            "duplicates": self._duplicate_chunks.count,
+            "model": self.model,
+            "settings": self.settings,
+            "sources": self.sources,
+            "manifest": self.manifest,
+        }
+        tmp_state = self.tmp_path / "checkpoint.json.tmp"
+        _write_json(tmp_state, state)
+        os.replace(tmp_state, self.tmp_path / "checkpoint.json")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            if self.resumable:
+                self.close()
+            else:
+                self.abort()
+
+    def _appenders(self):
+        return [appender for appender in (self._vectors, self._offsets, self._source_ids, self._spans,
+                                          self._duplicate_chunks, self._duplicate_sources)
+                if appender is not None]
+
+    def source_id(self, source):
+        """Get the dictionary id for a source name, assigning one if new."""
+        source_id = self._source_index.get(source)
+        if source_id is None:
+            source_id = len(self.sources)
+            self._source_index[source] = source_id
+            self.sources.append(source)
+        return source_id
+
+    def add(self, vectors, chunks, sources, spans=None):
+        """
+        Append chunks with their embedding vectors and sources.
+
+        Args:
+            vectors: Embedding vectors, one row per chunk
+            chunks: Text chunks
+            sources: Source name for each chunk
+            spans: Optional (start, end) character offsets of each chunk in
+                its source text
+        """
+        if len(chunks) == 0:
+            return
+        vectors = normalize_vectors(vectors)
+        if not (len(vectors) == len(chunks) == len(sources)):
+            raise ValueError("vectors, chunks and sources must have the same length")
+        if self._vectors is None:
+            quantize.check_quantization(self.quantization, self.pq_subspaces, vectors.shape[1])
+            self.dim = vectors.shape[1]
+            self._vectors = NpyAppender(self.tmp_path / "vectors.npy", np.float32, (self.dim,))
+        self._vectors.append(vectors)
+
+        offsets = np.empty(len(chunks), dtype=np.int64)
+        for i, chunk in enumerate(chunks):
+            data = str(chunk).encode("utf-8")
+            self._chunks.write(data)
+            self._bytes_written += len(data)
+            offsets[i] = self._bytes_written
+        self._offsets.append(offsets)
+        self._source_ids.append(np.array([self.source_id(s) for s in sources], dtype=np.int32))
+        self._spans.append(_span_rows(spans, len(chunks)))
+        self.count += len(chunks)
+
+    def add_duplicates(self, chunk_ids, sources):
+        """
+        Record further sources of chunks already added.
+
+        Args:
+            chunk_ids: Ids of kept chunks whose near-duplicates were dropped
+            sources: Source name of each dropped duplicate
+        """
+        if len(chunk_ids) == 0:
+            return
+        self._duplicate_chunks.append(np.asarray(chunk_ids, dtype=np.int64))
+        self._duplicate_sources.append(np.array([self.source_id(s) for s in sources], dtype=np.int32))
+
+    def iter_chunks(self):
+        """
+        Read back the chunks added so far (also works after close()).
+
+        Yields:
+            tuple: (chunk text, source name) in chunk-id order
+        """
+        if not self._chunks.closed:
+            self._chunks.flush()
+            for appender in self._appenders():
+                appender.flush()
+        offsets = np.fromfile(self.tmp_path / "chunk_offsets.npy", dtype=np.int64,
+                              offset=_NPY_HEADER_SIZE, count=self.count + 1)
+        source_ids = np.fromfile(self.tmp_path / "source_ids.npy", dtype=np.int32,
+                                 offset=_NPY_HEADER_SIZE, count=self.count)
+        with open(self.tmp_path / "chunks.bin", "rb") as f:
+            for i in range(self.count):
+                yield f.read(int(offsets[i + 1] - offsets[i])).decode("utf-8"), self.sources[source_ids[i]]
+
+    def commit(self, manifest=None, ivf_clusters=None, nprobe=None,
+               quantization=None, pq_subspaces=None, rerank=None, bm25=True):
+        """
+        Finish the index and move it into place.
+
+        Args:
+            manifest: Dict of indexed file path -> file fingerprint
+                (default: the writer's own manifest, if any)
+            ivf_clusters: Build an IVF index with this many clusters
+                (0 picks a size from the vector count; None skips IVF)
+            nprobe: Default clusters probed per query when IVF is built
+            quantization: Also store quantised codes, "sq8" or "pq"
+                (default: the writer's own setting)
+            pq_subspaces: Subspaces for "pq" (default: the writer's own
+                setting, else one per 8 dimensions)
+            rerank: Default quantised candidates re-scored exactly per query
+            bm25: Also build a BM25 inverted index for lexical and hybrid search
+        """
+        if manifest is None:
+            manifest = self.manifest or None
+        if quantization is None:
+            quantization, pq_subspaces = self.quantization, pq_subspaces or self.pq_subspaces
+        if self._vectors is None:
+            self.dim = 0
+            self._vectors = NpyAppender(self.tmp_path / "vectors.npy", np.float32, (0,))
+        self.close()
+        _write_json(self.tmp_path / "sources.json", self.sources)
+        if manifest is not None:
+            _write_json(self.tmp_path / "manifest.json", manifest)
+        header = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "count": self.count,
+            "dim": self.dim,
+            "model": self.model,
+            "dtype": "float32",
+            "normalized": True,
+            "created": time.time(),
+        }
+        vectors = np.load(self.tmp_path / "vectors.npy", mmap_mode="r") if self.count else None
+        if quantization and self.count:
+            quantizer = quantize.make_quantizer(quantization, pq_subspaces).train(vectors)
+            quantizer.save(self.tmp_path)
+            codes = NpyAppender(self.tmp_path / f"{quantizer.kind}_codes.npy",
+                                quantizer.code_dtype, quantizer.code_shape(self.dim))
+            for start in range(0, self.count, quantize.BLOCK_SIZE):
+                codes.append(quantizer.encode(vectors[start:start + quantize.BLOCK_SIZE]))
+            codes.close()
+            header["quantization"] = {
+                "type": quantizer.kind,
+                "subspaces": getattr(quantizer, "subspaces", None),
+                "rerank": rerank or quantize.DEFAULT_RERANK,
+            }
+        if ivf_clusters is not None and self.count:
+            centroids, order, offsets = ivf.build_ivf(vectors, ivf_clusters or None)
+            np.save(self.tmp_path / "ivf_centroids.npy", centroids)
+            np.save(self.tmp_path / "ivf_order.npy", order)
+            np.save(self.tmp_path / "ivf_offsets.npy", offsets)
+            header["ivf"] = {
+                "clusters": len(centroids),
+                "nprobe": nprobe or ivf.default_nprobe(len(centroids)),
+            }
+        if bm25:
+            lexical = BM25Index.build(text for text, _ in self.iter_chunks())
+            lexical.save(self.tmp_path)
+            header["bm25"] = lexical.info()
+        del vectors
+        _write_json(self.tmp_path / "header.json", header)
+        # The checkpoint stays valid until the finished index is in place, so
+        # a failure while quantising or building IVF/BM25 can still resume
+        replace_path(self.tmp_path, self.path)
+        (self.path / "checkpoint.json").unlink(missing_ok=True)
+
+    def close(self):
+        """Close open files without finishing the index."""
+        for appender in self._appenders():
+            appender.close()
+        self._chunks.close()
+
+    def abort(self):
+        """Discard everything written so far, including any checkpoint."""
+        self.close()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+
+def _reject_npz_options(**options):
+    """Raise ValueError for IVF or quantisation settings given to a .npz index."""
+    given = [name for name, value in options.items() if value is not None]
+    if given:
+        raise ValueError(f"{', '.join(given)} can't be used with a .npz file; use an index directory")
+
+
+class NpzWriter:
+    """
+    Collect an index in memory and save it as a legacy single .npz file.
+
+    Offers the same add()/commit() interface as IndexWriter, without
+    resume support or IVF/quantisation.
+    """
+
+    resumable = False
+    resumed = False
+
+    def __init__(self, path, model=None):
+        self.path = Path(path)
+        self.model = model
+        self.manifest = {}
+        self.count = 0
+        self._vectors = []
+        self._chunks = []
+        self._sources = []
+        self._spans = []
+        self._duplicate_chunks = []
+        self._duplicate_sources = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+    def add(self, vectors, chunks, sources, spans=None):
+        """Append chunks with their embedding vectors, sources and optional spans."""
+        if len(chunks) == 0:
+            return
+        self._spans.append(_span_rows(spans, len(chunks)))
+        self._vectors.append(normalize_vectors(vectors))
+        self._chunks.extend(str(chunk) for chunk in chunks)
+        self._sources.extend(str(source) for source in sources)
+        self.count += len(chunks)
+
+    def add_duplicates(self, chunk_ids, sources):
+        """Record further sources of chunks already added."""
+        self._duplicate_chunks.extend(int(i) for i in chunk_ids)
+        self._duplicate_sources.extend(str(source) for source in sources)
+
+    def iter_chunks(self):
+        """Yield (chunk text, source name) for the chunks added so far."""
+        yield from zip(self._chunks, self._sources)
+
+    def checkpoint(self):
+        """Legacy indexes cannot be resumed; nothing to record."""
+
+    def commit(self, manifest=None, ivf_clusters=None, quantization=None, pq_subspaces=None, **options):
+        """
+        Write the .npz file under a temporary name and rename it into place.
+
+        Args:
+            manifest: Dict of indexed file path -> file fingerprint
+                (default: the writer's own manifest, if any)
+            ivf_clusters, quantization, pq_subspaces: Not supported by the
+                .npz format; anything but None raises ValueError
+
+        Other IndexWriter.commit() options are accepted and ignored.
+        """
+        _reject_npz_options(ivf_clusters=ivf_clusters, quantization=quantization, pq_subspaces=pq_subspaces)
+        if manifest is None:
+            manifest = self.manifest or None
+        arrays = {
+            "vectors": np.vstack(self._vectors) if self._vectors else np.zeros((0, 0), np.float32),
+            "chunks": np.array(self._chunks),
+            "sources": np.array(self._sources),
+            "spans": np.vstack(self._spans) if self._spans else np.zeros((0, 2), np.int64),
+            "normalized": np.array(True),
+        }
+        if self._duplicate_chunks:
+            arrays["duplicate_chunks"] = np.array(self._duplicate_chunks, dtype=np.int64)
+            arrays["duplicate_sources"] = np.array(self._duplicate_sources)
+        if manifest is not None:
+            arrays["manifest"] = np.array(json.dumps(manifest))
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **arrays)
+            replace_path(tmp_path, self.path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def abort(self):
+        """Discard everything added so far."""
+        self._vectors, self._chunks, self._sources, self._spans = [], [], [], []
+        self._duplicate_chunks, self._duplicate_sources = [], []
+        self.count = 0
+
+
+def open_writer(path, model=None, resumable=False, settings=None, quantization=None, pq_subspaces=None):
+    """
+    Create the right writer for an index path.
+
+    Args:
+        path: Index directory, or a file ending in .npz for the legacy format
+        model: Embedding model the vectors came from
+        resumable, settings: See IndexWriter (ignored for .npz)
+        quantization, pq_subspaces: See IndexWriter (ValueError for .npz)
+
+    Returns:
+        IndexWriter or NpzWriter
+    """
+    if Path(path).suffix == ".npz":
+        _reject_npz_options(quantization=quantization, pq_subspaces=pq_subspaces)
+        return NpzWriter(path, model=model)
+    return IndexWriter(path, model=model, resumable=resumable, settings=settings,
+                       quantization=quantization, pq_subspaces=pq_subspaces)
+
+
+class IndexStore:
+    """
+    Read-only view of a RAG index.
+
+    Vectors and per-chunk arrays are memory-mapped; chunk text is decoded
+    on demand. Legacy .npz indexes are loaded into memory instead.
+    """
+
+    def __init__(self, vectors, source_names, source_ids, chunk_text=None,
+                 chunk_offsets=None, header=None, manifest=None, path=None, spans=None,
+                 duplicate_chunks=None, duplicate_sources=None):
+        self.vectors = vectors
+        self.source_names = list(source_names)
+        self.source_ids = source_ids
+        self.spans = spans
+        # (chunk id, source id) pairs: further sources of deduplicated chunks
+        self.duplicate_chunks = duplicate_chunks if duplicate_chunks is not None else np.zeros(0, np.int64)
+        self.duplicate_sources = duplicate_sources if duplicate_sources is not None else np.zeros(0, np.int32)
+        self.header = header or {}
+        self.manifest = manifest
+        self.path = path
+        self._chunk_text = chunk_text
+        self._chunk_offsets = chunk_offsets
+        self._source_array = None
+        self.ivf = None
+        self.quantizer = None
+        self.codes = None
+        self._bm25 = None
+        self._masks = {}
+
+    @classmethod
+    def open(cls, path):
+        """
+        Open an index directory or legacy .npz file.
+
+        Args:
+            path: Path to the index
+
+        Returns:
+            IndexStore
+        """
+        path = Path(path)
+        if not path.is_dir():
+            return cls._open_npz(path)
+
+        header = _read_json(path / "header.json")
+        if header is None or header.get("format") != FORMAT_NAME:
+            raise ValueError(f"Not a RAG index directory: {path}")
+        if header.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(f"Index format version {header['version']} is newer than this version of hands-on-ai supports")
+
+        count = header["count"]
+        chunks_path = path / "chunks.bin"
+        chunk_text = np.memmap(chunks_path, dtype=np.uint8, mode="r") if chunks_path.stat().st_size else b""
+        store = cls(
+            vectors=np.load(path / "vectors.npy", mmap_mode="r") if count else np.zeros((0, header["dim"]), np.float32),
+            source_names=_read_json(path / "sources.json", []),
+            source_ids=np.load(path / "source_ids.npy", mmap_mode="r") if count else np.zeros(0, np.int32),
+            chunk_text=chunk_text,
+            chunk_offsets=np.load(path / "chunk_offsets.npy", mmap_mode="r"),
+            header=header,
+            manifest=_read_json(path / "manifest.json"),
+            path=path,
+            spans=np.load(path / "spans.npy", mmap_mode="r") if count and (path / "spans.npy").exists() else None,
+            duplicate_chunks=_load_optional(path / "duplicate_chunks.npy"),
+            duplicate_sources=_load_optional(path / "duplicate_sources.npy"),
+        )
+        if "ivf" in header:
+            store.ivf = (
+                np.load(path / "ivf_centroids.npy"),
+                np.load(path / "ivf_order.npy", mmap_mode="r"),
+                np.load(path / "ivf_offsets.npy"),
+            )
+        if "quantization" in header:
+            info = header["quantization"]
+            store.quantizer = quantize.load_quantizer(path, info)
+            store.codes = np.load(path / f"{info['type']}_codes.npy", mmap_mode="r")
+        if "bm25" in header:
+            store._bm25 = BM25Index.load(path, header["bm25"])
+        return store
+
+    @classmethod
+    def _open_npz(cls, path):
+        data = np.load(path, allow_pickle=True)
+        vectors = data["vectors"]
+        if "normalized" not in data.files:
+            vectors = normalize_vectors(vectors)
+        duplicate_names = data["duplicate_sources"].astype(str) if "duplicate_sources" in data.files \
+            else np.array([], dtype=str)
+        source_names, all_ids = np.unique(np.concatenate([data["sources"].astype(str), duplicate_names]),
+                                          return_inverse=True)
+        source_ids = all_ids[:len(all_ids) - len(duplicate_names)]
+        manifest = json.loads(str(data["manifest"])) if "manifest" in data.files else None
+        store = cls(
+            vectors=vectors,
+            source_names=source_names.tolist(),
+            source_ids=source_ids.astype(np.int32),
+            header={"count": len(vectors), "dim": vectors.shape[1] if vectors.ndim == 2 else 0},
+            manifest=manifest,
+            path=path,
+            spans=data["spans"] if "spans" in data.files else None,
+            duplicate_chunks=data["duplicate_chunks"] if "duplicate_chunks" in data.files else None,
+            duplicate_sources=all_ids[len(source_ids):].astype(np.int32),
+        )
+        store._chunks = data["chunks"].astype(str).tolist()
+        return store
+
+    @property
+    def model(self):
+        """Embedding model recorded when the index was built, if known."""
+        return self.header.get("model")
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def chunk(self, i):
+        """Get the text of chunk i."""
+        if self._chunk_offsets is None:
+            return self._chunks[i]
+        start, end = int(self._chunk_offsets[i]), int(self._chunk_offsets[i + 1])
+        return bytes(self._chunk_text[start:end]).decode("utf-8")
+
+    def source(self, i):
+        """Get the source name of chunk i."""
+        return self.source_names[int(self.source_ids[i])]
+
+    def span(self, i):
+        """Get the (start, end) character offsets of chunk i in its source text, or None if unknown."""
+        if self.spans is None or self.spans[i][0] < 0:
+            return None
+        return int(self.spans[i][0]), int(self.spans[i][1])
+
+    def sources_of(self, i):
+        """Get every source chunk i was found in: its own source, then any near-duplicates'."""
+        extra = np.asarray(self.duplicate_sources)[np.asarray(self.duplicate_chunks) == i]
+        return [self.source(i)] + [self.source_names[s] for s in extra]
+
+    def all_chunks(self):
+        """Get every chunk's text as a list."""
+        return [self.chunk(i) for i in range(len(self))]
+
+    @property
+    def sources(self):
+        """Array with the source name of every chunk."""
+        if self._source_array is None:
+            self._source_array = np.array(self.source_names, dtype=str)[np.asarray(self.source_ids)] \
+                if len(self) else np.array([], dtype=str)
+        return self._source_array
+
+    @property
+    def bm25(self):
+        """BM25 index of the chunks, built in memory if the index has none stored."""
+        if self._bm25 is None:
+            self._bm25 = BM25Index.build(self.chunk(i) for i in range(len(self)))
+        return self._bm25
+
+    def _match_sources(self, filters):
+        """Mark the source ids matched by a list of globs and/or integer ids."""
+        matched = np.zeros(len(self.source_names), dtype=bool)
+        for item in filters:
+            if isinstance(item, (int, np.integer)):
+                if 0 <= item < len(matched):
+                    matched[item] = True
+                continue
+            pattern = str(item)
+            # Relative patterns like "course1/*.pdf" match the end of a path
+            matched |= [fnmatchcase(name, pattern) or fnmatchcase(name, "*/" + pattern)
+                        for name in self.source_names]
+        return matched
+
+    def source_mask(self, include=None, exclude=None):
+        """
+        Build a boolean chunk mask from source filters.
+
+        Each filter is a glob matched against source paths (e.g. "*.pdf",
+        "course1/*") or an integer source id (a position in source_names).
+        The source filter is evaluated once per distinct source and then
+        expanded to chunks with a single gather over source_ids. A chunk
+        that stands in for dropped near-duplicates also matches through
+        their sources.
+
+        Args:
+            include: Glob, id, or list of them; only matching sources are kept
+            exclude: Glob, id, or list of them; matching sources are dropped
+
+        Returns:
+            ndarray or None: Boolean mask with one entry per chunk, or None
+            if there are no filters
+        """
+        include = [include] if isinstance(include, (str, int, np.integer)) else include
+        exclude = [exclude] if isinstance(exclude, (str, int, np.integer)) else exclude
+        if not include and not exclude:
+            return None
+        key = (tuple(include or ()), tuple(exclude or ()))
+        mask = self._masks.get(key)
+        if mask is None:
+            allowed = self._match_sources(include) if include else np.ones(len(self.source_names), dtype=bool)
+            if exclude:
+                allowed &= ~self._match_sources(exclude)
+            mask = allowed[np.asarray(self.source_ids)] if len(self) else np.zeros(0, dtype=bool)
+            if len(self.duplicate_chunks):
+                mask[np.asarray(self.duplicate_chunks)[allowed[np.asarray(self.duplicate_sources)]]] = True
+            if len(self._masks) >= MASK_CACHE_SIZE:
+                self._masks.pop(next(iter(self._masks)))
+            self._masks[key] = mask
+        return mask
+
+    def candidates(self, query_vector, nprobe=None):
+        """
+        Pick the vector ids worth scoring for a query.
+
+        Args:
+            query_vector: L2-normalised float32 query embedding
+            nprobe: IVF clusters to probe (None: the index default; 0: all)
+
+        Returns:
+            ndarray or None: Candidate ids, or None to score every vector
+        """
+        if self.ivf is None or nprobe == 0:
+            return None
+        if nprobe is None:
+            nprobe = self.header["ivf"]["nprobe"]
+        if nprobe >= len(self.ivf[0]):
+            return None
+        return ivf.probe(query_vector, *self.ivf, nprobe)
+
+    def search(self, query_vector, k, nprobe=None, rerank=None, mask=None):
+        """
+        Find the chunks most similar to a normalised query vector.
+
+        With quantised codes, candidates are ranked on the codes first and
+        only the best `rerank` are scored against the exact vectors.
+
+        Args:
+            query_vector: L2-normalised float32 query embedding
+            k: Number of results
+            nprobe: IVF clusters to probe (None: the index default; 0: exhaustive)
+            rerank: Quantised candidates re-scored exactly (None: index default)
+            mask: Optional boolean array (see source_mask()); only chunks
+                where it is True are returned
+
+        Returns:
+            tuple: (indices, scores) best first
+        """
+        if len(self) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+        candidates = self.candidates(query_vector, nprobe)
+        if candidates is not None:
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            # Too few (matching) vectors in the probed clusters: search everything instead
+            if len(candidates) < k:
+                candidates = None
+
+        if self.quantizer is not None:
+            codes = self.codes if candidates is None else self.codes[candidates]
+            approx = self.quantizer.scores(query_vector, codes)
+            if mask is not None and candidates is None:
+                approx[~mask] = -np.inf
+            rerank = max(k, rerank or self.header["quantization"]["rerank"])
+            shortlist = top_k_indices(approx, rerank)
+            shortlist = shortlist[np.isfinite(approx[shortlist])]
+            candidates = np.sort(shortlist if candidates is None else candidates[shortlist])
+
+        if candidates is None:
+            scores = self.vectors @ query_vector
+            if mask is not None:
+                scores[~mask] = -np.inf
+            indices = top_k_indices(scores, k)
+            indices = indices[np.isfinite(scores[indices])]
+            return indices, scores[indices]
+        scores = self.vectors[candidates] @ query_vector
+        best = top_k_indices(scores, k)
+        return candidates[best], scores[best]
+
+    def search_many(self, query_vectors, k, nprobe=None, rerank=None, mask=None):
+        """
+        Find the most similar chunks for many normalised query vectors.
+
+        Exhaustive searches score a block of queries against every vector
+        with one matrix-matrix product; IVF and quantised indexes search
+        query by query, since each query probes different candidates.
+
+        Args:
+            query_vectors: (queries, dim) L2-normalised float32 embeddings
+            k: Number of results per query
+            nprobe, rerank, mask: As for search()
+
+        Returns:
+            list: (indices, scores) per query, best first
+        """
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        exhaustive = self.quantizer is None and (self.ivf is None or nprobe == 0)
+        if len(self) == 0 or not exhaustive:
+            return [self.search(q, k, nprobe=nprobe, rerank=rerank, mask=mask) for q in query_vectors]
+
+        results = []
+        block = max(1, SEARCH_BLOCK_BYTES // (4 * len(self)))
+        for start in range(0, len(query_vectors), block):
+            scores = query_vectors[start:start + block] @ self.vectors.T
+            if mask is not None:
+                scores[:, ~mask] = -np.inf
+            best = top_k_rows(scores, k)
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            for indices, row_scores in zip(best, best_scores):
+                keep = np.isfinite(row_scores)
+                results.append((indices[keep], row_scores[keep]))
+        return results
+
+    def lexical_search(self, query, k, mask=None, collection=None):
+        """
+        Find the chunks that best match a query's words, by BM25.
+
+        Args:
+            query: Query text
+            k: Number of results
+            mask: Optional boolean chunk mask, as for search()
+            collection: Optional BM25 statistics of a larger collection this
+                index is part of (see bm25.collection_stats)
+
+        Returns:
+            tuple: (indices, scores) best first; chunks sharing no word with
+            the query are left out
+        """
+        if len(self) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+        scores = self.bm25.scores(query, collection)
+        if mask is not None:
+            scores[~mask] = 0
+        indices = top_k_indices(scores, k)
+        indices = indices[scores[indices] > 0]
+        return indices, scores[indices]
+
+    def hybrid_candidates(self, query, query_vector, pool, nprobe=None, rerank=None, mask=None, collection=None):
+        """
+        Gather the unfused candidates of a hybrid search.
+
+        Args:
+            query, query_vector, nprobe, rerank, mask, collection: As for
+                hybrid_search() and lexical_search()
+            pool: Candidates taken from each method
+
+        Returns:
+            tuple: (candidate indices, cosine scores, raw BM25 scores, best
+            BM25 score over all unmasked chunks)
+        """
+        empty = np.empty(0, dtype=np.float32)
+        if len(self) == 0:
+            return np.empty(0, dtype=np.intp), empty, empty, 0.0
+        dense, _ = self.search(query_vector, pool, nprobe=nprobe, rerank=rerank, mask=mask)
+        lexical_scores = self.bm25.scores(query, collection)
+        if mask is not None:
+            lexical_scores[~mask] = 0
+        lexical = top_k_indices(lexical_scores, pool)
+        candidates = np.union1d(dense, lexical[lexical_scores[lexical] > 0])
+        if len(candidates) == 0:
+            return candidates, empty, empty, 0.0
+        return (candidates, self.vectors[candidates] @ query_vector, lexical_scores[candidates],
+                float(lexical_scores.max()))
+
+    def hybrid_search(self, query, query_vector, k, alpha=HYBRID_ALPHA, nprobe=None, rerank=None, mask=None):
+        """
+        Rank chunks by a blend of dense similarity and BM25.
+
+        The best HYBRID_POOL candidates from each method are pooled and
+        re-scored as alpha * cosine + (1 - alpha) * BM25, with BM25 scaled
+        to [0, 1] by the query's best lexical score.
+
+        Args:
+            query: Query text
+            query_vector: L2-normalised float32 query embedding
+            k: Number of results
+            alpha: Weight of the dense score, from 0 (lexical only) to 1
+            nprobe, rerank: Passed to search() for the dense candidates
+            mask: Optional boolean chunk mask, as for search()
+
+        Returns:
+            tuple: (indices, fused scores) best first
+        """
+        candidates, dense, lexical, peak = self.hybrid_candidates(
+            query, query_vector, max(k, HYBRID_POOL), nprobe=nprobe, rerank=rerank, mask=mask)
+        if len(candidates) == 0:
+            return candidates, dense
+        fused = fuse_scores(dense, lexical, peak, alpha)
+        best = top_k_indices(fused, k)
+        return candidates[best], fused[best]
+
+
+def fuse_scores(dense, lexical, peak, alpha=HYBRID_ALPHA):
+    """
+    Blend cosine and BM25 scores as alpha * cosine + (1 - alpha) * BM25 / peak.
+
+    Returns:
+        ndarray: float32 fused scores
+    """
+    return (alpha * dense + (1 - alpha) * lexical / max(peak, 1e-9)).astype(np.float32)
+
+
+def read_manifest(path):
+    """
+    Read the indexed-file manifest of an index without loading it.
+
+    Args:
+        path: Index directory or legacy .npz file
+
+    Returns:
+        dict or None: File path -> fingerprint, or None if the index has none
+    """
+    path = Path(path)
+    if path.is_dir():
+        return _read_json(path / "manifest.json")
+    data = np.load(path, allow_pickle=False)
+    if "manifest" not in data.files:
+        return None
+    return json.loads(str(data["manifest"]))
+
+
+def index_stamp_path(path):
+    """File whose stat changes whenever the index at path is rewritten."""
+    path = Path(path)
+    if not path.is_dir():
+        return path
+    # Sharded indexes (see rag.shards) rewrite shards.json whenever a shard changes
+    if (path / "shards.json").exists():
+        return path / "shards.json"
+    return path / "header.json"
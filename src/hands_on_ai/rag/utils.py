@@ -2,13 +2,39 @@
 Core RAG utilities for document loading, chunking, embedding, and retrieval.
 """
 
+from collections import OrderedDict
 from pathlib import Path
+import hashlib
 import shutil
+import threading
+import time
 import importlib.resources
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-import requests
-from ..config import get_server_url, get_embedding_model, get_chunk_size, get_api_key
+from ..config import CONFIG_DIR, get_chunk_size, get_chunk_overlap, get_embedding_model, get_retrieval_mode, log
+from .embeddings import get_embedding_client
+from .embedding_cache import get_embedding_cache
+from .query_cache import get_query_cache
+from .vectors import normalize_vectors
+from .chunking import iter_chunk_spans
+from .store import open_writer, read_manifest, index_stamp_path, HYBRID_ALPHA
+from .shards import open_index, is_sharded
+
+# Ways get_top_k can rank chunks
+RETRIEVAL_MODES = ("dense", "hybrid", "lexical")
+
+# System prompt for answering from retrieved chunks
+RAG_SYSTEM_PROMPT = "You are a helpful assistant that answers questions based only on the provided context."
+
+# Maximum number of indexes kept resident by load_index_cached
+INDEX_CACHE_SIZE = 4
+
+# Attempts to open an index that is missing, as it briefly is while
+# store.replace_path() swaps in a rebuilt copy
+INDEX_OPEN_ATTEMPTS = 5
+
+# Resolved index path -> ((inode, mtime_ns, size), IndexStore), in LRU order
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
 
 
 def load_text_file(path: Path) -> str:
@@ -50,31 +76,61 @@ def load_text_file(path: Path) -> str:
         raise ValueError(f"❌ Unsupported file type: {ext}. Supported: .txt, .md, .docx, .pdf")
 
 
-def chunk_text(text, chunk_size=None):
+def chunk_spans(text, chunk_size=None, overlap=None, sentence_aware=False):
     """
-    Split text into chunks of approximately equal size.
+    Find chunk boundaries as character offsets into the text.
     
     Args:
         text: Text to chunk
         chunk_size: Words per chunk (default from config)
+        overlap: Words shared by consecutive chunks (default from config)
+        sentence_aware: Prefer to end chunks at sentence boundaries
         
     Returns:
-        list: List of text chunks
+        list: (start, end) offsets of each chunk
     """
     if chunk_size is None:
         chunk_size = get_chunk_size()
+    if overlap is None:
+        overlap = get_chunk_overlap()
+    return list(iter_chunk_spans(text, chunk_size, overlap, sentence_aware))
+
+
+def chunk_text(text, chunk_size=None, overlap=None, sentence_aware=False):
+    """
+    Split text into chunks of approximately equal size.
+    
+    Chunks are slices of the original text, so they keep its line breaks.
+    
+    Args:
+        text: Text to chunk
+        chunk_size: Words per chunk (default from config)
+        overlap: Words shared by consecutive chunks (default from config)
+        sentence_aware: Prefer to end chunks at sentence boundaries
         
-    words = text.split()
-    return [" ".join(words[i:i+chunk_size]) for i in range(0, len(words), chunk_size)]
+    Returns:
+        list: List of text chunks
+    """
+    return [text[start:end] for start, end in chunk_spans(text, chunk_size, overlap, sentence_aware)]
 
 
-def get_embeddings(chunks, model=None):
+def get_embeddings(chunks, model=None, batch_size=None, workers=None, use_cache=True, server_url=None):
     """
-    Get embeddings for text chunks using Ollama API.
+    Get embeddings for text chunks using the embedding API.
+    
+    Chunks already in the persistent embedding cache are served from it;
+    the rest are sent in batches through Ollama's /api/embed or the
+    OpenAI-compatible /v1/embeddings endpoint, with up to `workers`
+    requests in flight on a shared connection pool. Servers that support
+    neither batch API are queried one chunk at a time via /api/embeddings.
     
     Args:
         chunks: List of text chunks
         model: Embedding model to use (default from config)
+        batch_size: Chunks per request (default from config)
+        workers: Concurrent requests (default from config)
+        use_cache: Whether to consult and fill the embedding cache
+        server_url: Embedding server to use (default from config)
         
     Returns:
         ndarray: Array of embedding vectors
@@ -84,78 +140,381 @@ def get_embeddings(chunks, model=None):
     """
     if model is None:
         model = get_embedding_model()
+    client = get_embedding_client(workers, server_url=server_url)
+    cache = get_embedding_cache() if use_cache else None
+    if cache is None:
+        return client.embed(chunks, model=model, batch_size=batch_size)
+
+    chunks = list(chunks)
+    cached = cache.get_many(model, chunks, server=client.base_url)
+    missing = [i for i in range(len(chunks)) if i not in cached]
+    log.debug(f"Embedding cache: {len(cached)} hits, {len(missing)} misses")
+    if not missing:
+        return np.array([cached[i] for i in range(len(chunks))], dtype=np.float32)
+
+    new_vectors = client.embed([chunks[i] for i in missing], model=model, batch_size=batch_size)
+    cache.put_many(model, [chunks[i] for i in missing], new_vectors, server=client.base_url)
+    if not cached:
+        return new_vectors
+
+    vectors = np.empty((len(chunks), new_vectors.shape[1]), dtype=np.float32)
+    vectors[missing] = new_vectors
+    for i, vector in cached.items():
+        vectors[i] = vector
+    return vectors
+
+
+def embed_queries(queries, model=None, batch_size=None, workers=None):
+    """
+    Embed search queries, reusing cached embeddings for repeated queries.
+    
+    Queries are looked up in the query-embedding cache by model and
+    normalised text (see rag.query_cache); only unseen queries are sent
+    to the embedding server.
+    
+    Args:
+        queries: List of query texts
+        model: Embedding model to use (default from config)
+        batch_size: Queries per embedding request (default from config)
+        workers: Concurrent embedding requests (default from config)
+        
+    Returns:
+        ndarray: float32 array with one embedding row per query
+    """
+    if model is None:
+        model = get_embedding_model()
+    cache = get_query_cache()
+    if cache is None:
+        return get_embeddings(queries, model=model, batch_size=batch_size, workers=workers, use_cache=False)
+
+    cached = cache.get_many(model, queries)
+    missing = [i for i in range(len(queries)) if i not in cached]
+    if missing:
+        computed = get_embeddings([queries[i] for i in missing], model=model, batch_size=batch_size,
+                                  workers=workers, use_cache=False)
+        cache.put_many(model, [queries[i] for i in missing], computed)
+        cached.update(zip(missing, computed))
+    return np.array([cached[i] for i in range(len(queries))], dtype=np.float32)
+
+
+def file_fingerprint(path, content_hash=True):
+    """
+    Describe a source file for the index manifest.
+    
+    Args:
+        path: Path to file
+        content_hash: Whether to include a SHA-256 of the file contents
         
-    url = f"{get_server_url()}/api/embeddings"
-    headers = {"Content-Type": "application/json"}
-    api_key = get_api_key()
-    if api_key:
-        headers["Authorization"] = f"Bearer {api_key}"
-    vectors = []
+    Returns:
+        dict: size, mtime and (optionally) sha256 of the file
+    """
+    path = Path(path)
+    stat = path.stat()
+    info = {"size": stat.st_size, "mtime": stat.st_mtime}
+    if content_hash:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        info["sha256"] = digest.hexdigest()
+    return info
+
 
-    for chunk in chunks:
-        response = requests.post(
-            url, 
-            headers=headers, 
-            json={"model": model, "prompt": chunk}
-        )
-        response.raise_for_status()
-        vectors.append(response.json()["embedding"])
+def manifest_key(path):
+    """
+    Get the index manifest key of a source file.
+
+    Keys are absolute, so an update run from another directory still
+    recognises the files it indexed before.
+
+    Args:
+        path: Path to file
 
-    return np.array(vectors)
+    Returns:
+        str: The resolved path
+    """
+    return str(Path(path).resolve())
 
 
-def save_index_with_sources(vectors, chunks, sources, path):
+def default_index_path():
+    """
+    Get the default index location.
+    
+    Returns:
+        Path: ~/.hands-on-ai/index, or the legacy ~/.hands-on-ai/index.npz
+        if only that exists
+    """
+    path = CONFIG_DIR / "index"
+    legacy_path = CONFIG_DIR / "index.npz"
+    if not path.exists() and legacy_path.exists():
+        return legacy_path
+    return path
+
+
+def save_index_with_sources(vectors, chunks, sources, path, manifest=None, model=None,
+                            ivf_clusters=None, nprobe=None, quantization=None, pq_subspaces=None,
+                            spans=None):
     """
     Save RAG index with source tracking.
     
+    Vectors are stored L2-normalised as float32 so queries need only a
+    single dot product. Paths ending in .npz are written as a legacy
+    single-file index; anything else becomes an index directory whose
+    vectors can be memory-mapped (see rag.store). Either way the index is
+    written under a temporary name and renamed into place.
+    
     Args:
         vectors: Embedding vectors
         chunks: Text chunks
         sources: Source information for each chunk
-        path: Path to save index file
+        path: Path to save index (directory, or file ending in .npz)
+        manifest: Optional dict of indexed file path -> file_fingerprint()
+        model: Embedding model used (default from config)
+        ivf_clusters: Also build an IVF approximate-search index with this
+            many clusters (0 for an automatic size; index directories only)
+        nprobe: Default IVF clusters searched per query
+        quantization: Also store "sq8" or "pq" quantised codes, which
+            queries scan before re-scoring the best exactly (index
+            directories only)
+        pq_subspaces: Subspaces for "pq" (default: one per 8 dimensions)
+        spans: Optional (start, end) character offsets of each chunk in
+            its source text, as returned by chunk_spans()
     """
-    np.savez(path, vectors=vectors, chunks=np.array(chunks), sources=np.array(sources))
+    if model is None:
+        model = get_embedding_model()
+    with open_writer(path, model=model) as writer:
+        writer.add(vectors, chunks, sources, spans=spans)
+        writer.commit(manifest=manifest, ivf_clusters=ivf_clusters, nprobe=nprobe,
+                      quantization=quantization, pq_subspaces=pq_subspaces)
+    clear_index_cache(path)
 
 
 def load_index_with_sources(path):
     """
     Load RAG index with source tracking.
     
+    Indexes written before vectors were stored pre-normalised are
+    normalised on load. This reads every chunk into memory; use
+    load_index_cached() to open an index lazily.
+    
+    Args:
+        path: Path to index directory, sharded index or .npz file
+        
+    Returns:
+        tuple: (vectors, chunks, sources) with unit-length float32 vectors
+    """
+    store = open_index(path)
+    return store.vectors, np.array(store.all_chunks(), dtype=str), store.sources
+
+
+def load_index_manifest(path):
+    """
+    Load the manifest of indexed files stored with an index.
+    
+    Args:
+        path: Path to index directory or .npz file
+        
+    Returns:
+        dict or None: File path -> file_fingerprint(), or None for indexes
+        built without a manifest
+    """
+    if is_sharded(path):
+        return open_index(path).manifest
+    return read_manifest(path)
+
+
+def _resolve_index_path(path):
+    """Resolve an index path, allowing the .npz suffix to be omitted."""
+    path = Path(path)
+    if not path.exists() and path.suffix != ".npz":
+        path = path.with_name(path.name + ".npz")
+    return path.resolve()
+
+
+def load_index_cached(path):
+    """
+    Open a RAG index, reusing a process-resident copy when possible.
+    
+    Indexes are cached by resolved path and revalidated against the
+    index's mtime and size on every call, so a rebuilt index is picked up
+    automatically. Opening is retried briefly if the index is missing
+    while a rebuild moves it into place. At most INDEX_CACHE_SIZE indexes
+    are kept, least recently used first out.
+    
     Args:
-        path: Path to index file
+        path: Path to index directory, sharded index or .npz file
         
     Returns:
-        tuple: (vectors, chunks, sources)
+        IndexStore or ShardedIndex: The opened index
+    """
+    for attempt in range(INDEX_OPEN_ATTEMPTS):
+        try:
+            return _load_index_cached(path)
+        except FileNotFoundError:
+            if attempt == INDEX_OPEN_ATTEMPTS - 1:
+                raise
+            # Probably caught mid-swap by a rebuild: wait for the new copy
+            time.sleep(0.01 * 2 ** attempt)
+
+
+def _load_index_cached(path):
+    """Open or reuse a cached index once; see load_index_cached()."""
+    path = _resolve_index_path(path)
+    stat = index_stamp_path(path).stat()
+    stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    key = str(path)
+
+    with _index_cache_lock:
+        entry = _index_cache.get(key)
+        if entry and entry[0] == stamp:
+            _index_cache.move_to_end(key)
+            return entry[1]
+
+    log.debug(f"Opening index: {path}")
+    store = open_index(path)
+
+    with _index_cache_lock:
+        _index_cache[key] = (stamp, store)
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > max(INDEX_CACHE_SIZE, 1):
+            _index_cache.popitem(last=False)
+    return store
+
+
+def clear_index_cache(path=None):
     """
-    data = np.load(path, allow_pickle=True)
-    return data["vectors"], data["chunks"], data["sources"]
+    Drop cached indexes so the next query reloads them from disk.
+    
+    Args:
+        path: Index to invalidate (default: all cached indexes)
+    """
+    with _index_cache_lock:
+        if path is None:
+            _index_cache.clear()
+        else:
+            _index_cache.pop(str(_resolve_index_path(path)), None)
 
 
-def get_top_k(query, index_path, k=3, return_scores=False):
+def get_top_k(query, index_path, k=3, return_scores=False, nprobe=None, rerank=None,
+              mode=None, alpha=HYBRID_ALPHA, include=None, exclude=None):
     """
     Retrieve top k similar chunks for a query.
     
+    In "dense" mode the query is embedded with the model recorded in the
+    index (falling back to the configured embedding model for older
+    indexes) and compared with the chunk vectors. "lexical" mode ranks
+    chunks by BM25 keyword matching and needs no embedding server.
+    "hybrid" mode blends both scores.
+    
     Args:
         query: Search query
-        index_path: Path to index file
+        index_path: Path to index directory or .npz file
         k: Number of results to return
         return_scores: Whether to include similarity scores
+        nprobe: For IVF indexes, clusters to search; higher improves recall
+            at the cost of latency (None: index default, 0: exhaustive)
+        rerank: For quantised indexes, candidates re-scored with the exact
+            vectors (None: index default)
+        mode: "dense", "hybrid" or "lexical" (default from config)
+        alpha: In hybrid mode, weight of the dense score (0 to 1)
+        include: Only search sources matching these globs (e.g. "*.pdf",
+            "course1/*") or integer source ids
+        exclude: Skip sources matching these globs or ids
         
     Returns:
         list: List of (chunk, source) tuples, optionally with scores
+        
+    Raises:
+        ValueError: If mode is not a known retrieval mode
     """
-    vectors, chunks, sources = load_index_with_sources(index_path)
-    query_vector = get_embeddings([query])[0].reshape(1, -1)
-    sims = cosine_similarity(query_vector, vectors)[0]
-    top_indices = sims.argsort()[-k:][::-1]
-
-    top_chunks = [chunks[i] for i in top_indices]
-    top_sources = [sources[i] for i in top_indices]
-    top_scores = [sims[i] for i in top_indices]
+    mode = mode or get_retrieval_mode()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}'. Choose from: {', '.join(RETRIEVAL_MODES)}")
+    store = load_index_cached(index_path)
+    mask = store.source_mask(include, exclude)
+    if mode == "lexical":
+        top_indices, top_scores = store.lexical_search(query, k, mask=mask)
+    else:
+        query_vector = normalize_vectors(embed_queries([query], model=store.model))[0]
+        if mode == "hybrid":
+            top_indices, top_scores = store.hybrid_search(query, query_vector, k, alpha=alpha,
+                                                          nprobe=nprobe, rerank=rerank, mask=mask)
+        else:
+            top_indices, top_scores = store.search(query_vector, k, nprobe=nprobe, rerank=rerank, mask=mask)
 
+    results = [(store.chunk(i), store.source(i)) for i in top_indices]
     if return_scores:
-        return list(zip(top_chunks, top_sources)), top_scores
-    return list(zip(top_chunks, top_sources))
+        return results, top_scores.tolist()
+    return results
+
+
+def get_top_k_many(queries, index_path, k=3, return_scores=False, nprobe=None, rerank=None,
+                   mode=None, alpha=HYBRID_ALPHA, include=None, exclude=None,
+                   batch_size=None, workers=None):
+    """
+    Retrieve the top k chunks for each of many queries.
+    
+    Much faster than calling get_top_k in a loop: the index is opened
+    once, queries are embedded in batched requests and, for exhaustive
+    dense search, scored together with one matrix-matrix product.
+    
+    Args:
+        queries: List of search queries
+        index_path: Path to index directory or .npz file
+        k: Number of results per query
+        return_scores: Whether to include similarity scores
+        nprobe, rerank, mode, alpha, include, exclude: As for get_top_k
+        batch_size: Queries per embedding request (default from config)
+        workers: Concurrent embedding requests (default from config)
+        
+    Returns:
+        list: For each query, a list of (chunk, source) tuples; with
+        return_scores, a (results, scores) pair per query instead
+        
+    Raises:
+        ValueError: If mode is not a known retrieval mode
+    """
+    mode = mode or get_retrieval_mode()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}'. Choose from: {', '.join(RETRIEVAL_MODES)}")
+    queries = list(queries)
+    store = load_index_cached(index_path)
+    mask = store.source_mask(include, exclude)
+    if mode == "lexical":
+        hits = [store.lexical_search(query, k, mask=mask) for query in queries]
+    else:
+        query_vectors = normalize_vectors(embed_queries(queries, model=store.model, batch_size=batch_size,
+                                                        workers=workers)) \
+            if queries else np.zeros((0, 0), dtype=np.float32)
+        if mode == "hybrid":
+            hits = [store.hybrid_search(query, vector, k, alpha=alpha, nprobe=nprobe, rerank=rerank, mask=mask)
+                    for query, vector in zip(queries, query_vectors)]
+        else:
+            hits = store.search_many(query_vectors, k, nprobe=nprobe, rerank=rerank, mask=mask)
+
+    output = []
+    for indices, scores in hits:
+        results = [(store.chunk(i), store.source(i)) for i in indices]
+        output.append((results, scores.tolist()) if return_scores else results)
+    return output
+
+
+def build_rag_prompt(query, context):
+    """
+    Build the LLM prompt for answering a question from retrieved chunks.
+
+    Args:
+        query: The user's question
+        context: List of (chunk, source) tuples from get_top_k
+
+    Returns:
+        str: Prompt to send with RAG_SYSTEM_PROMPT
+    """
+    prompt = f"Question: {query}\n\nContext:\n"
+    for chunk, source in context:
+        prompt += f"- {chunk}\n"
+    prompt += "\nAnswer the question based on the provided context. If the context doesn't contain the answer, say so."
+    return prompt
 
 
 def get_sample_docs_path():
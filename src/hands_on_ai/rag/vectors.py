@@ -0,0 +1,70 @@
+"""
+Vector helpers shared by the RAG index and search code.
+"""
+
+import numpy as np
+
+
+def normalize_vectors(vectors):
+    """
+    L2-normalise embedding vectors so cosine similarity becomes a dot product.
+
+    Args:
+        vectors: Array of embedding vectors (one per row)
+
+    Returns:
+        ndarray: float32 array of unit-length rows (all-zero rows stay zero)
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_indices(scores, k):
+    """
+    Return the indices of the k highest scores, best first.
+
+    Uses argpartition so selection is O(n) rather than a full sort.
+
+    Args:
+        scores: 1-D array of similarity scores
+        k: Number of indices to return
+
+    Returns:
+        ndarray: Indices of the top k scores in descending score order
+    """
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        candidates = np.argpartition(scores, n - k)[n - k:]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def top_k_rows(scores, k):
+    """
+    Return the indices of the k highest scores in each row, best first.
+
+    Args:
+        scores: 2-D array with one row of scores per query
+        k: Number of indices per row
+
+    Returns:
+        ndarray: (rows, min(k, columns)) array of column indices
+    """
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype=np.intp)
+    if k < n:
+        candidates = np.argpartition(scores, n - k, axis=1)[:, n - k:]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    order = np.argsort(np.take_along_axis(scores, candidates, axis=1), axis=1)[:, ::-1]
+    return np.take_along_axis(candidates, order, axis=1)
@@ -0,0 +1,74 @@
+"""
+Tests for BM25 lexical scoring and hybrid retrieval.
+"""
+
+import math
+import numpy as np
+import pytest
+from hands_on_ai.rag.bm25 import BM25Index, tokenize, K1, B
+from hands_on_ai.rag.utils import save_index_with_sources
+from hands_on_ai.rag.store import IndexStore
+
+CHUNKS = [
+    "The mitochondria is the powerhouse of the cell",
+    "Cell walls protect plant cells",
+    "Error E1234: connection refused by the server",
+    "The server restarted after the error",
+    "Photosynthesis happens in the chloroplast",
+]
+
+
+def bm25(term_counts, length, avg_length, n, df):
+    """Reference BM25 score of one chunk for a single-term query."""
+    idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+    return idf * term_counts * (K1 + 1) / (term_counts + K1 * (1 - B + B * length / avg_length))
+
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Error E1234: Connection refused!") == ["error", "e1234", "connection", "refused"]
+
+
+def test_bm25_matches_reference_formula():
+    index = BM25Index.build(CHUNKS)
+    lengths = [len(tokenize(chunk)) for chunk in CHUNKS]
+    avg_length = sum(lengths) / len(lengths)
+
+    scores = index.scores("server")
+    for i, chunk in enumerate(CHUNKS):
+        count = tokenize(chunk).count("server")
+        expected = bm25(count, lengths[i], avg_length, len(CHUNKS), df=2) if count else 0.0
+        assert scores[i] == pytest.approx(expected, rel=1e-5)
+
+
+def test_bm25_ranks_rare_exact_terms_first():
+    index = BM25Index.build(CHUNKS)
+    scores = index.scores("e1234 error")
+    assert np.argmax(scores) == 2
+    # "e1234" occurs in one chunk, "the" in most, so it weighs more
+    assert index.scores("e1234")[2] > index.scores("the")[2]
+    assert not index.scores("nonexistent words").any()
+
+
+def test_bm25_save_load_round_trip(tmp_path):
+    index = BM25Index.build(CHUNKS)
+    index.save(tmp_path)
+    loaded = BM25Index.load(tmp_path, index.info())
+    np.testing.assert_array_equal(loaded.scores("the cell server"), index.scores("the cell server"))
+
+
+def test_lexical_and_hybrid_search_on_an_index(tmp_path):
+    vectors = np.random.default_rng(0).normal(size=(len(CHUNKS), 8)).astype(np.float32)
+    save_index_with_sources(vectors, CHUNKS, [f"{i}.txt" for i in range(len(CHUNKS))],
+                            tmp_path / "index", model="test")
+    store = IndexStore.open(tmp_path / "index")
+
+    indices, scores = store.lexical_search("connection refused", 3)
+    assert list(indices) == [2]
+    assert scores[0] > 0
+
+    query_vector = vectors[4] / np.linalg.norm(vectors[4])
+    # alpha=1 is dense only, alpha=0 lexical only
+    assert store.hybrid_search("server error", query_vector, 1, alpha=1.0)[0][0] == 4
+    assert store.hybrid_search("server error", query_vector, 1, alpha=0.0)[0][0] in (2, 3)
+    _, fused = store.hybrid_search("server error", query_vector, 5)
+    assert np.all(np.diff(fused) <= 0)
@@ -0,0 +1,54 @@
+"""
+Tests for streaming bot responses.
+"""
+
+import asyncio
+import importlib
+import pytest
+from hands_on_ai.chat import get_response
+from hands_on_ai.chat.bots import stream_bot, astream_bot
+
+# The package re-exports get_response(), hiding the module of the same name
+get_response_module = importlib.import_module("hands_on_ai.chat.get_response")
+
+
+@pytest.fixture
+def fake_stream(monkeypatch):
+    """Make every get_response() call stream a fixed reply."""
+    def stream_response(prompt, **kwargs):
+        yield from [" hello", " there "]
+
+    monkeypatch.setattr(get_response_module, "stream_response", stream_response)
+
+
+def collect(bot, prompt):
+    async def run():
+        return [token async for token in astream_bot(bot, prompt)]
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("stream", [stream_bot, collect])
+def test_bot_post_processing_runs_once(fake_stream, stream):
+    """A bot that post-processes its reply runs once and still streams."""
+    history = []
+
+    def shouting_bot(prompt):
+        reply = get_response(prompt)
+        history.append(reply)
+        return reply.strip().upper()
+
+    assert list(stream(shouting_bot, "Hi")) == [" hello", " there "]
+    assert history == [" hello there "]
+
+
+@pytest.mark.parametrize("stream", [stream_bot, collect])
+def test_bot_without_get_response_yields_whole_reply(stream):
+    assert list(stream(lambda prompt: prompt[::-1], "abc")) == ["cba"]
+
+
+@pytest.mark.parametrize("stream", [stream_bot, collect])
+def test_bot_errors_are_yielded(stream):
+    def broken_bot(prompt):
+        raise RuntimeError("boom")
+
+    assert list(stream(broken_bot, "Hi")) == ["❌ Error: boom"]
@@ -0,0 +1,67 @@
+"""
+Tests for sending batches of prompts with get_responses() and `chat batch`.
+"""
+
+import asyncio
+import json
+import pytest
+from typer.testing import CliRunner
+from hands_on_ai.chat import batch
+from hands_on_ai.chat.batch import get_responses, aget_responses
+from hands_on_ai.chat.cli import app
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    """Answer every prompt without a server, recording the models warmed up."""
+    warmed = []
+
+    def complete(client, prompt, model, system, personality, retries, quiet=False, temperature=None):
+        return f"{model}: {prompt}"
+
+    async def acomplete(*args, **kwargs):
+        return complete(*args, **kwargs)
+
+    async def awarm_up(model):
+        warmed.append(model)
+        return model
+
+    monkeypatch.setattr(batch, "get_openai_client", lambda: None)
+    monkeypatch.setattr(batch, "get_async_openai_client", lambda: None)
+    monkeypatch.setattr(batch, "_complete", complete)
+    monkeypatch.setattr(batch, "_acomplete", acomplete)
+    monkeypatch.setattr(batch, "_warm_up", lambda model: warmed.append(model) or model)
+    monkeypatch.setattr(batch, "_awarm_up", awarm_up)
+    return warmed
+
+
+def test_get_responses_warms_up_each_model_once(fake_server):
+    prompts = ["a", {"prompt": "b", "model": "other"}, "c", {"prompt": "d", "model": "other"}]
+    results = get_responses(prompts, model="main", cache=False)
+    assert [r.response for r in results] == ["main: a", "other: b", "main: c", "other: d"]
+    assert sorted(fake_server) == ["main", "other"]
+
+
+def test_aget_responses_warms_up_each_model_once(fake_server):
+    prompts = ["a", {"prompt": "b", "model": "other"}, "c"]
+    results = asyncio.run(aget_responses(prompts, model="main", cache=False))
+    assert [r.response for r in results] == ["main: a", "other: b", "main: c"]
+    assert sorted(fake_server) == ["main", "other"]
+
+
+def test_batch_rejects_fewer_than_one_retry(fake_server, tmp_path):
+    with pytest.raises(ValueError):
+        get_responses(["a"], retries=0)
+    prompts = tmp_path / "prompts.jsonl"
+    prompts.write_text(json.dumps("a") + "\n", encoding="utf-8")
+    result = CliRunner().invoke(app, ["batch", "--retries", "0", str(prompts)])
+    assert result.exit_code == 1
+    assert "--retries must be at least 1" in result.stderr
+    assert result.stdout == ""
+
+
+def test_batch_reports_unreadable_input_on_stderr(tmp_path):
+    result = CliRunner().invoke(app, ["batch", str(tmp_path / "missing.jsonl")])
+    assert result.exit_code == 1
+    assert "Could not read" in result.stderr
+    assert result.stdout == ""
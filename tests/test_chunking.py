@@ -0,0 +1,62 @@
+"""
+Tests for offset-based chunking and stored chunk spans.
+"""
+
+import numpy as np
+import pytest
+from hands_on_ai.rag.utils import chunk_spans, chunk_text, save_index_with_sources
+from hands_on_ai.rag.store import IndexStore
+
+TEXT = (
+    "Photosynthesis converts light energy into chemical energy. Plants absorb "
+    "carbon dioxide and release oxygen. Chlorophyll gives leaves their green "
+    "colour and captures light. The Calvin cycle builds sugars from carbon. "
+    "Respiration later releases the stored energy for growth and repair."
+)
+
+
+def test_chunk_spans_slice_source_text():
+    """Every span is the chunk's exact slice of the source text."""
+    spans = chunk_spans(TEXT, chunk_size=10, overlap=3)
+    assert len(spans) > 2
+    words = []
+    for start, end in spans:
+        chunk = TEXT[start:end]
+        assert chunk == chunk.strip()
+        words.append(chunk.split())
+    # Consecutive chunks share `overlap` words
+    for previous, current in zip(words, words[1:]):
+        assert previous[-3:] == current[:3]
+    assert spans[0][0] == 0
+    assert spans[-1][1] == len(TEXT.rstrip())
+    assert chunk_text(TEXT, chunk_size=10, overlap=3) == [TEXT[start:end] for start, end in spans]
+
+
+def test_chunks_without_overlap_cover_every_word_once():
+    chunks = chunk_text(TEXT, chunk_size=7, overlap=0)
+    assert all(len(chunk.split()) <= 7 for chunk in chunks)
+    assert " ".join(chunks).split() == TEXT.split()
+
+
+def test_chunk_spans_reject_bad_sizes():
+    with pytest.raises(ValueError):
+        chunk_spans(TEXT, chunk_size=0, overlap=0)
+    with pytest.raises(ValueError):
+        chunk_spans(TEXT, chunk_size=5, overlap=5)
+
+
+def test_spans_survive_save_and_load(tmp_path):
+    """Stored spans point back into the source text; unknown spans are None."""
+    spans = chunk_spans(TEXT, chunk_size=10, overlap=0)
+    chunks = [TEXT[start:end] for start, end in spans]
+    vectors = np.random.default_rng(0).normal(size=(len(chunks), 8)).astype(np.float32)
+    path = tmp_path / "index"
+    save_index_with_sources(vectors, chunks, ["bio.txt"] * len(chunks), path, model="test", spans=spans)
+
+    store = IndexStore.open(path)
+    for i, chunk in enumerate(chunks):
+        start, end = store.span(i)
+        assert TEXT[start:end] == chunk
+
+    save_index_with_sources(vectors, chunks, ["bio.txt"] * len(chunks), path, model="test")
+    assert IndexStore.open(path).span(0) is None
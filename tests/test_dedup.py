@@ -0,0 +1,62 @@
+"""
+Tests for SimHash near-duplicate detection.
+"""
+
+from hands_on_ai.rag.dedup import Deduplicator, simhash, DEFAULT_MAX_DISTANCE
+
+TEXT = (
+    "Students should submit the assignment through the learning portal before "
+    "Friday at five pm. Late submissions lose ten percent per day unless an "
+    "extension was approved by the unit coordinator in advance of the deadline. "
+    "Group work must list every member and their contribution. Reports are "
+    "marked against the published rubric, and feedback is returned within two "
+    "weeks of the due date."
+)
+
+# The same words with different case, punctuation and line breaks
+REFORMATTED = TEXT.upper().replace(". ", ";\n\n").replace(",", "")
+
+UNRELATED = (
+    "The mitochondria is the powerhouse of the cell. It turns glucose and oxygen "
+    "into usable energy, and cells that need a lot of energy such as muscle "
+    "fibres contain thousands of them."
+)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def test_simhash_ignores_formatting():
+    assert simhash(TEXT) == simhash(TEXT)
+    assert simhash(TEXT) == simhash(REFORMATTED)
+    assert simhash("") == 0
+
+
+def test_simhash_distance_tracks_similarity():
+    edited = hamming(simhash(TEXT), simhash(TEXT.replace("Friday", "Thursday")))
+    unrelated = hamming(simhash(TEXT), simhash(UNRELATED))
+    assert 0 < edited <= 8
+    assert unrelated > 16
+
+
+def test_deduplicator_finds_and_merges_duplicates():
+    dedup = Deduplicator()
+    dedup.add(simhash(TEXT), 0, "unit-a.txt")
+    dedup.add(simhash(UNRELATED), 1, "biology.txt")
+
+    assert dedup.find(simhash(REFORMATTED)) == 0
+    assert dedup.find(simhash(UNRELATED.upper())) == 1
+    assert dedup.find(simhash("Jazz grew out of blues and ragtime in New Orleans.")) is None
+    # A further copy from a new file is recorded once; copies from the same file are not
+    assert dedup.merge(0, "unit-b.txt")
+    assert not dedup.merge(0, "unit-b.txt")
+    assert not dedup.merge(0, "unit-a.txt")
+
+
+def test_deduplicator_distance_threshold():
+    signature = simhash(TEXT)
+    dedup = Deduplicator(max_distance=DEFAULT_MAX_DISTANCE)
+    dedup.add(signature, 0, "a.txt")
+    assert dedup.find(signature ^ ((1 << DEFAULT_MAX_DISTANCE) - 1)) == 0
+    assert dedup.find(signature ^ ((1 << (DEFAULT_MAX_DISTANCE + 1)) - 1)) is None
@@ -0,0 +1,68 @@
+"""
+Tests for the persistent embedding cache.
+"""
+
+import itertools
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from hands_on_ai.rag import embedding_cache
+from hands_on_ai.rag.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Give the cache a clock that ticks on every read, so LRU order is strict."""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(embedding_cache, "time", SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def vectors(n, dim=4, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_embedding_cache_hits_and_misses(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite3")
+    stored = vectors(2)
+    cache.put_many("model-a", ["first", "second"], stored)
+
+    found = cache.get_many("model-a", ["second", "unknown", "first", "second"])
+    assert sorted(found) == [0, 2, 3]
+    np.testing.assert_array_equal(found[0], stored[1])
+    np.testing.assert_array_equal(found[2], stored[0])
+    # Entries are per model
+    assert cache.get_many("model-b", ["first"]) == {}
+    assert cache.stats() == {"hits": 3, "misses": 2, "entries": 2}
+
+    # Entries persist in the database file
+    cache.close()
+    reopened = EmbeddingCache(tmp_path / "embeddings.sqlite3")
+    np.testing.assert_array_equal(reopened.get_many("model-a", ["first"])[0], stored[0])
+
+
+def test_embedding_cache_evicts_least_recently_used(tmp_path, clock):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite3", max_entries=2)
+    cache.put_many("m", ["old"], vectors(1))
+    cache.put_many("m", ["used"], vectors(1))
+    cache.get_many("m", ["old"])
+    cache.put_many("m", ["new"], vectors(1))
+
+    assert sorted(cache.get_many("m", ["old", "used", "new"])) == [0, 2]
+    assert cache.stats()["entries"] == 2
+
+
+def test_embedding_cache_keys_by_server(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite3")
+    cache.put_many("m", ["text"], vectors(1), server="http://gpu-1:11434")
+    assert 0 in cache.get_many("m", ["text"], server="http://gpu-1:11434")
+    assert cache.get_many("m", ["text"], server="http://gpu-2:11434") == {}
+    assert cache.get_many("m", ["text"]) == {}
+
+
+def test_embedding_cache_count_ignores_replaced_entries(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite3", max_entries=3)
+    cache.put_many("m", ["a", "b"], vectors(2))
+    cache.put_many("m", ["a", "b", "b"], vectors(3))
+    cache.put_many("m", ["c"], vectors(1))
+    assert sorted(cache.get_many("m", ["a", "b", "c"])) == [0, 1, 2]
+    assert cache.stats()["entries"] == 3
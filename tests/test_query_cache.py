@@ -0,0 +1,36 @@
+"""
+Tests for the query-embedding cache.
+"""
+
+import numpy as np
+from hands_on_ai.rag.query_cache import QueryCache
+
+
+def vectors(n, dim=4, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_query_cache_normalises_queries_and_evicts():
+    cache = QueryCache(max_entries=2)
+    cache.put_many("m", ["What is  RAG?", "second"], vectors(2))
+
+    found = cache.get_many("m", ["what is rag?"])
+    assert list(found) == [0]
+    cache.put_many("m", ["third"], vectors(1))
+
+    # "second" was least recently used
+    assert sorted(cache.get_many("m", ["what is rag?", "second", "third"])) == [0, 2]
+    assert cache.get_many("other-model", ["third"]) == {}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (3, 2, 2)
+
+
+def test_query_cache_persists_to_disk(tmp_path):
+    path = tmp_path / "queries.sqlite3"
+    stored = vectors(1)
+    QueryCache(persist_path=path).put_many("m", ["Persisted query"], stored)
+
+    cache = QueryCache(persist_path=path)
+    found = cache.get_many("m", ["persisted QUERY"])
+    np.testing.assert_array_equal(found[0], stored[0])
+    assert cache.stats()["entries"] == 1
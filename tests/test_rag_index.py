@@ -0,0 +1,225 @@
+"""
+Tests for building RAG indexes with `rag index`.
+
+Embeddings come from a deterministic bag-of-words stand-in, so no
+embedding server is needed.
+"""
+
+import zlib
+import numpy as np
+import pytest
+from typer.testing import CliRunner
+from hands_on_ai.config import get_embedding_model
+from hands_on_ai.rag import pipeline
+from hands_on_ai.rag.cli import app
+from hands_on_ai.rag.pipeline import run_index_pipeline
+from hands_on_ai.rag.store import IndexStore, IndexWriter
+from hands_on_ai.rag.utils import manifest_key
+
+DIM = 32
+CHUNK_SIZE = 20
+
+WORDS = (
+    "river mountain forest desert ocean island valley canyon glacier meadow volcano "
+    "prairie tundra swamp delta plateau lagoon reef marsh dune cliff harbor"
+).split()
+
+
+def fake_embeddings(chunks, **kwargs):
+    """Hash each word into one of DIM buckets."""
+    vectors = np.full((len(chunks), DIM), 0.01, dtype=np.float32)
+    for i, chunk in enumerate(chunks):
+        for word in chunk.lower().split():
+            vectors[i, zlib.crc32(word.encode()) % DIM] += 1
+    return vectors
+
+
+@pytest.fixture(autouse=True)
+def offline_embeddings(monkeypatch):
+    monkeypatch.setattr(pipeline, "get_embeddings", fake_embeddings)
+
+
+def write_doc(path, seed, words=60):
+    """Write a document of pseudo-random words, distinct per seed."""
+    rng = np.random.default_rng(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(" ".join(f"{rng.choice(WORDS)}{seed}" for _ in range(words)), encoding="utf-8")
+    return path
+
+
+def run_index(*args):
+    """Run `rag index` offline with small chunks, failing the test on errors."""
+    result = CliRunner().invoke(app, [
+        "index", "--chunk-size", str(CHUNK_SIZE), "--overlap", "0", "--no-cache",
+        "--workers", "1", "--batch-size", "1", "--embed-workers", "1", *map(str, args),
+    ])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def chunks_by_source(store):
+    result = {}
+    for i in range(len(store)):
+        result.setdefault(store.source(i), []).append(store.chunk(i))
+    return result
+
+
+def test_update_handles_added_changed_and_deleted_files(tmp_path):
+    docs = tmp_path / "docs"
+    for seed, name in enumerate(["a.txt", "b.txt", "c.txt"]):
+        write_doc(docs / name, seed)
+    index = tmp_path / "index"
+    run_index("--output-file", index, docs)
+    before = IndexStore.open(index)
+    kept_vectors = np.asarray(before.vectors)[before.sources == str(docs / "a.txt")]
+
+    write_doc(docs / "b.txt", 10)
+    (docs / "c.txt").unlink()
+    write_doc(docs / "d.txt", 11)
+    output = run_index("--update", "--output-file", index, docs)
+    assert "2 added or changed, 1 unchanged, 1 deleted" in output
+
+    after = IndexStore.open(index)
+    chunks = chunks_by_source(after)
+    assert set(chunks) == {str(docs / name) for name in ("a.txt", "b.txt", "d.txt")}
+    assert " ".join(chunks[str(docs / "b.txt")]) == (docs / "b.txt").read_text()
+    np.testing.assert_array_equal(np.asarray(after.vectors)[after.sources == str(docs / "a.txt")], kept_vectors)
+    assert set(after.manifest) == {manifest_key(docs / name) for name in ("a.txt", "b.txt", "d.txt")}
+
+    assert "already up to date" in run_index("--update", "--output-file", index, docs)
+
+
+def test_update_with_every_file_deleted_removes_index(tmp_path):
+    docs = tmp_path / "docs"
+    write_doc(docs / "a.txt", 0)
+    write_doc(docs / "b.txt", 1)
+    index = tmp_path / "index"
+    run_index("--output-file", index, docs)
+
+    (docs / "a.txt").unlink()
+    (docs / "b.txt").unlink()
+    output = run_index("--update", "--output-file", index, docs)
+    assert "0 added or changed, 0 unchanged, 2 deleted" in output
+    assert not index.exists()
+
+
+def test_update_from_another_directory_sees_no_changes(tmp_path, monkeypatch):
+    """Manifest keys don't depend on the directory the index was built from."""
+    write_doc(tmp_path / "docs" / "a.txt", 0)
+    write_doc(tmp_path / "docs" / "b.txt", 1)
+    monkeypatch.chdir(tmp_path)
+    run_index("--output-file", tmp_path / "index", "docs")
+
+    monkeypatch.chdir(tmp_path / "docs")
+    assert "already up to date" in run_index("--update", "--output-file", tmp_path / "index", ".")
+
+
+@pytest.mark.parametrize("option", [["--ivf"], ["--ivf-clusters", "0"], ["--quantize", "sq8"],
+                                    ["--quantize", "pq", "--pq-subspaces", "4"]])
+def test_npz_output_rejects_ivf_and_quantization(tmp_path, option):
+    write_doc(tmp_path / "docs" / "a.txt", 0)
+    result = CliRunner().invoke(app, ["index", "--output-file", str(tmp_path / "index.npz"), *option,
+                                      str(tmp_path / "docs")])
+    assert result.exit_code == 1
+    assert "can't be used with a .npz file" in result.output
+    assert not (tmp_path / "index.npz").exists()
+
+
+def test_resumed_build_matches_clean_build(tmp_path, monkeypatch):
+    files = [write_doc(tmp_path / "docs" / f"{n}.txt", n) for n in range(5)]
+    options = dict(batch_size=1, workers=1, use_cache=False, model="fake", parse_workers=1)
+
+    with IndexWriter(tmp_path / "clean", model="fake") as writer:
+        run_index_pipeline(files, writer, CHUNK_SIZE, **options)
+        writer.commit()
+
+    calls = 0
+
+    def flaky_embeddings(chunks, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise ConnectionError("embedding server went away")
+        return fake_embeddings(chunks)
+
+    monkeypatch.setattr(pipeline, "get_embeddings", flaky_embeddings)
+    settings = {"chunk_size": CHUNK_SIZE}
+    path = tmp_path / "resumed"
+    with pytest.raises(ConnectionError):
+        with IndexWriter(path, model="fake", resumable=True, settings=settings) as writer:
+            run_index_pipeline(files, writer, CHUNK_SIZE, checkpoint_interval=0, **options)
+    assert not path.exists()
+
+    monkeypatch.setattr(pipeline, "get_embeddings", fake_embeddings)
+    with IndexWriter(path, model="fake", resumable=True, settings=settings) as writer:
+        assert writer.resumed
+        assert 0 < len(writer.manifest) < len(files)
+        pending = [f for f in files if manifest_key(f) not in writer.manifest]
+        run_index_pipeline(pending, writer, CHUNK_SIZE, **options)
+        writer.commit()
+
+    clean, resumed = IndexStore.open(tmp_path / "clean"), IndexStore.open(path)
+    assert resumed.all_chunks() == clean.all_chunks()
+    assert list(resumed.sources) == list(clean.sources)
+    np.testing.assert_array_equal(np.asarray(resumed.vectors), np.asarray(clean.vectors))
+    assert [resumed.span(i) for i in range(len(resumed))] == [clean.span(i) for i in range(len(clean))]
+    assert set(resumed.manifest) == set(clean.manifest)
+    assert not (path / "checkpoint.json").exists()
+
+
+def test_resume_re_embeds_files_changed_since_checkpoint(tmp_path):
+    docs = tmp_path / "docs"
+    files = [write_doc(docs / f"{n}.txt", n) for n in range(3)]
+    index = tmp_path / "index"
+    # The checkpoint an interrupted `rag index` run would have left behind
+    settings = {"input": str(docs.resolve()), "chunk_size": CHUNK_SIZE, "overlap": 0,
+                "sentences": False, "dedup": True, "update": False}
+    writer = IndexWriter(index, model=get_embedding_model(), resumable=True, settings=settings)
+    run_index_pipeline(files[:2], writer, CHUNK_SIZE, batch_size=1, workers=1, use_cache=False,
+                       model="fake", parse_workers=1)
+    writer.close()
+
+    write_doc(files[0], 10)
+    output = run_index("--output-file", index, docs)
+    assert "1 files changed since the interrupted build" in output
+    chunks = chunks_by_source(IndexStore.open(index))
+    assert {source: " ".join(texts) for source, texts in chunks.items()} == {
+        str(path): path.read_text() for path in files
+    }
+
+
+def test_failed_commit_keeps_checkpoint(tmp_path, monkeypatch):
+    """A build that fails while finishing the index can still be resumed."""
+    path = tmp_path / "index"
+    writer = IndexWriter(path, model="fake", resumable=True)
+    writer.add(fake_embeddings(["alpha beta", "gamma"]), ["alpha beta", "gamma"], ["s", "s"])
+    writer.manifest["s"] = {"size": 1}
+    writer.checkpoint()
+
+    def broken_build(chunks):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr("hands_on_ai.rag.store.BM25Index.build", broken_build)
+    with pytest.raises(RuntimeError):
+        writer.commit()
+    monkeypatch.undo()
+
+    writer = IndexWriter(path, model="fake", resumable=True)
+    assert writer.resumed and writer.count == 2
+    writer.commit()
+    assert IndexStore.open(path).all_chunks() == ["alpha beta", "gamma"]
+
+
+def test_duplicate_files_are_embedded_once(tmp_path):
+    original = write_doc(tmp_path / "docs" / "notes.txt", 0)
+    copy = tmp_path / "docs" / "copy.txt"
+    copy.write_text(original.read_text(), encoding="utf-8")
+
+    with IndexWriter(tmp_path / "index", model="fake") as writer:
+        stats = run_index_pipeline([original, copy], writer, CHUNK_SIZE, batch_size=1, workers=1,
+                                   use_cache=False, model="fake", parse_workers=1)
+        writer.commit()
+
+    store = IndexStore.open(tmp_path / "index")
+    assert stats["duplicates"] == len(store) == 3
+    assert all(store.sources_of(i) == [str(original), str(copy)] for i in range(len(store)))
@@ -0,0 +1,127 @@
+"""
+Tests for RAG index storage: save/load round trips, IVF and quantisation.
+"""
+
+import numpy as np
+import pytest
+from hands_on_ai.rag import utils
+from hands_on_ai.rag.utils import save_index_with_sources, load_index_with_sources, load_index_cached
+from hands_on_ai.rag.store import IndexStore, IndexWriter
+from hands_on_ai.rag.quantize import check_quantization
+
+
+def random_index(n, dim=16, seed=0):
+    """Random vectors with matching chunk texts and sources."""
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    chunks = [f"chunk {i} about topic{i % 5} and word{i % 3}" for i in range(n)]
+    sources = [f"doc{i % 4}.txt" for i in range(n)]
+    return vectors, chunks, sources
+
+
+@pytest.mark.parametrize("name", ["index", "index.npz"])
+def test_save_load_round_trip(tmp_path, name):
+    """Vectors come back unit length, with chunks and sources in order."""
+    vectors, chunks, sources = random_index(20)
+    path = tmp_path / name
+    save_index_with_sources(vectors, chunks, sources, path, manifest={"a.txt": {"size": 1}}, model="test")
+
+    loaded_vectors, loaded_chunks, loaded_sources = load_index_with_sources(path)
+    expected = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    assert loaded_vectors.dtype == np.float32
+    np.testing.assert_allclose(loaded_vectors, expected, rtol=1e-6)
+    assert list(loaded_chunks) == chunks
+    assert list(loaded_sources) == sources
+
+    store = IndexStore.open(path)
+    if name == "index":
+        # The legacy .npz format has no header to record the model in
+        assert store.model == "test"
+    assert store.manifest == {"a.txt": {"size": 1}}
+
+
+def test_index_directory_is_memory_mapped(tmp_path):
+    """Vectors of an index directory are read lazily from disk."""
+    vectors, chunks, sources = random_index(10)
+    save_index_with_sources(vectors, chunks, sources, tmp_path / "index", model="test")
+    store = IndexStore.open(tmp_path / "index")
+    assert isinstance(store.vectors, np.memmap)
+    assert store.chunk(3) == chunks[3]
+    assert store.source(9) == sources[9]
+
+
+def test_load_index_cached_retries_while_index_is_swapped(tmp_path, monkeypatch):
+    """An index caught missing mid-rebuild is opened once it is back."""
+    vectors, chunks, sources = random_index(10)
+    save_index_with_sources(vectors, chunks, sources, tmp_path / "index", model="test")
+    moved = tmp_path / ".index.old"
+    (tmp_path / "index").rename(moved)
+    sleep = utils.time.sleep
+
+    def swap_back(seconds):
+        if moved.exists():
+            moved.rename(tmp_path / "index")
+        sleep(seconds)
+
+    monkeypatch.setattr(utils.time, "sleep", swap_back)
+    assert len(load_index_cached(tmp_path / "index")) == 10
+
+
+def test_ivf_search_finds_each_vector(tmp_path):
+    """Probing every cluster finds each stored vector as its own best match."""
+    vectors, chunks, sources = random_index(200, dim=32)
+    save_index_with_sources(vectors, chunks, sources, tmp_path / "index", model="test", ivf_clusters=0)
+    store = IndexStore.open(tmp_path / "index")
+    clusters = store.header["ivf"]["clusters"]
+    assert 1 < clusters < 200
+
+    for q in (0, 7, 199):
+        query = vectors[q] / np.linalg.norm(vectors[q])
+        indices, _ = store.search(query, 3, nprobe=clusters)
+        assert indices[0] == q
+
+
+def test_ivf_search_returns_k_results_when_probed_clusters_are_small(tmp_path):
+    """Asking for more chunks than the probed clusters hold searches everything."""
+    vectors, chunks, sources = random_index(200, dim=32)
+    save_index_with_sources(vectors, chunks, sources, tmp_path / "index", model="test", ivf_clusters=0)
+    store = IndexStore.open(tmp_path / "index")
+
+    query = vectors[0] / np.linalg.norm(vectors[0])
+    indices, scores = store.search(query, 150, nprobe=1)
+    exact = store.vectors @ query
+    assert len(indices) == 150
+    np.testing.assert_allclose(scores, np.sort(exact)[::-1][:150], rtol=1e-5)
+
+
+@pytest.mark.parametrize("kind, subspaces", [("sq8", None), ("pq", 8)])
+def test_quantised_search_finds_each_vector(tmp_path, kind, subspaces):
+    """Quantised candidates re-scored exactly still rank each vector first."""
+    vectors, chunks, sources = random_index(200, dim=32)
+    save_index_with_sources(vectors, chunks, sources, tmp_path / "index", model="test",
+                            quantization=kind, pq_subspaces=subspaces)
+    store = IndexStore.open(tmp_path / "index")
+    assert store.header["quantization"]["type"] == kind
+
+    for q in (0, 7, 199):
+        query = vectors[q] / np.linalg.norm(vectors[q])
+        indices, scores = store.search(query, 3)
+        assert indices[0] == q
+        assert scores[0] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_check_quantization_rejects_bad_settings():
+    check_quantization(None)
+    check_quantization("pq", 4, dim=32)
+    for kind, subspaces, dim in [("int4", None, None), ("sq8", 4, None), (None, 4, None),
+                                 ("pq", 0, None), ("pq", 5, 32)]:
+        with pytest.raises(ValueError):
+            check_quantization(kind, subspaces, dim)
+
+
+def test_writer_rejects_pq_subspaces_not_dividing_dim(tmp_path):
+    """A bad subspace count fails on the first vectors, not at commit."""
+    with IndexWriter(tmp_path / "index", quantization="pq", pq_subspaces=5) as writer:
+        with pytest.raises(ValueError, match="must divide"):
+            writer.add(np.ones((2, 16), dtype=np.float32), ["a", "b"], ["s", "s"])
+        writer.abort()
@@ -0,0 +1,91 @@
+"""
+Tests for the persistent LLM response cache.
+"""
+
+import importlib
+from types import SimpleNamespace
+import pytest
+from hands_on_ai.chat import get_response, response_cache
+from hands_on_ai.chat.response_cache import ResponseCache, request_key, is_deterministic
+
+
+class Clock:
+    """Stand-in for the time module whose time() only moves when told to."""
+
+    def __init__(self, start=1000.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(response_cache, "time", fake)
+    return fake
+
+
+def test_response_cache_hit_and_expiry(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "responses.sqlite3", ttl=60)
+    key = request_key("llama3", [{"role": "user", "content": "Hi"}], {"temperature": 0.0})
+    assert cache.get(key) is None
+    cache.put(key, "Hello!")
+
+    clock.now += 59
+    assert cache.get(key) == "Hello!"
+    clock.now += 2
+    assert cache.get(key) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "entries": 0}
+
+
+def test_response_cache_without_ttl_never_expires(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "responses.sqlite3", ttl=0)
+    cache.put("key", "kept")
+    clock.now += 10 ** 9
+    assert cache.get("key") == "kept"
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "responses.sqlite3", max_entries=2)
+    cache.put("a", "A")
+    clock.now += 1
+    cache.put("b", "B")
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.put("c", "C")
+
+    assert [cache.get(key) for key in "abc"] == ["A", None, "C"]
+
+
+def test_request_key_covers_model_messages_and_params():
+    messages = [{"role": "user", "content": "Hi"}]
+    key = request_key("llama3", messages, {"temperature": 0.0})
+    assert key == request_key("llama3", [dict(messages[0])], {"temperature": 0.0})
+    assert key != request_key("mistral", messages, {"temperature": 0.0})
+    assert key != request_key("llama3", [{"role": "user", "content": "Hi!"}], {"temperature": 0.0})
+    assert key != request_key("llama3", messages, {"temperature": 0.5})
+    assert is_deterministic(0) and is_deterministic(0.0)
+    assert not is_deterministic(None) and not is_deterministic(0.7)
+
+
+def test_config_temperature_makes_get_response_cacheable(tmp_path, monkeypatch):
+    """With the temperature config key at 0, calls without one are cached."""
+    module = importlib.import_module("hands_on_ai.chat.get_response")
+    calls = []
+
+    def complete(client, prompt, model, system, personality, retries, temperature=None):
+        calls.append(temperature)
+        return f"Reply to {prompt}"
+
+    cache = ResponseCache(tmp_path / "responses.sqlite3")
+    monkeypatch.setattr(module, "get_temperature", lambda: 0)
+    monkeypatch.setattr(module, "get_response_cache", lambda enabled, config: cache)
+    monkeypatch.setattr(module, "_warm_up", lambda model: model or "llama3")
+    monkeypatch.setattr(module, "get_openai_client", lambda: SimpleNamespace(base_url="http://test"))
+    monkeypatch.setattr(module, "_complete", complete)
+
+    assert get_response("Hi", model="llama3") == "Reply to Hi"
+    assert get_response("Hi", model="llama3") == "Reply to Hi"
+    assert calls == [0]
@@ -0,0 +1,105 @@
+"""
+Tests for sharded indexes: global ids, merged search and shard-wide BM25.
+"""
+
+import numpy as np
+from hands_on_ai.rag.bm25 import BM25Index, collection_stats
+from hands_on_ai.rag.utils import save_index_with_sources
+from hands_on_ai.rag.store import IndexStore, IndexWriter
+from hands_on_ai.rag.shards import ShardedIndex, register_shard, remove_shard, shard_path
+
+
+def random_index(n, dim=16, seed=0):
+    """Random vectors with matching chunk texts and sources."""
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    chunks = [f"chunk {i} about topic{i % 5} and word{i % 3}" for i in range(n)]
+    sources = [f"doc{i % 4}.txt" for i in range(n)]
+    return vectors, chunks, sources
+
+
+def build_shards(root, vectors, chunks, sources, cuts):
+    """Write vectors[cuts[s]:cuts[s + 1]] as shard s of a sharded index."""
+    for s, (start, end) in enumerate(zip(cuts, cuts[1:])):
+        with IndexWriter(shard_path(root, f"part{s}"), model="test") as writer:
+            writer.add(vectors[start:end], chunks[start:end], sources[start:end])
+            writer.commit()
+        register_shard(root, f"part{s}")
+    return ShardedIndex.open(root)
+
+
+def single_index(path, vectors, chunks, sources):
+    save_index_with_sources(vectors, chunks, sources, path, model="test")
+    return IndexStore.open(path)
+
+
+def test_shard_merge_matches_single_index(tmp_path):
+    """Searching shards and merging gives the same global hits as one index."""
+    vectors, chunks, sources = random_index(120)
+    single = single_index(tmp_path / "single", vectors, chunks, sources)
+    sharded = build_shards(tmp_path / "sharded", vectors, chunks, sources, [0, 30, 31, 120])
+
+    assert len(sharded) == len(single)
+    assert sharded.all_chunks() == single.all_chunks()
+    assert [sharded.source(i) for i in (0, 30, 31, 119)] == [single.source(i) for i in (0, 30, 31, 119)]
+
+    for q in (0, 30, 77):
+        query = vectors[q] / np.linalg.norm(vectors[q])
+        expected_indices, expected_scores = single.search(query, 10)
+        indices, scores = sharded.search(query, 10)
+        assert list(indices) == list(expected_indices)
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+
+        batched = sharded.search_many(query[None, :], 10)[0]
+        assert list(batched[0]) == list(expected_indices)
+
+
+def test_collection_stats_reproduce_whole_index_scores():
+    """Scoring parts with combined statistics equals scoring the whole."""
+    _, chunks, _ = random_index(30)
+    whole = BM25Index.build(chunks)
+    parts = [BM25Index.build(chunks[:4]), BM25Index.build(chunks[4:])]
+    query = "topic1 word2 chunk"
+    collection = collection_stats(parts, query)
+    combined = np.concatenate([part.scores(query, collection) for part in parts])
+    np.testing.assert_allclose(combined, whole.scores(query), rtol=1e-5)
+
+
+def test_shard_lexical_and_hybrid_scores_match_single_index(tmp_path):
+    """BM25 statistics and scaling are global, so shard scores equal unsharded ones."""
+    vectors, chunks, sources = random_index(120)
+    single = single_index(tmp_path / "single", vectors, chunks, sources)
+    sharded = build_shards(tmp_path / "sharded", vectors, chunks, sources, [0, 10, 120])
+
+    query_vector = vectors[3] / np.linalg.norm(vectors[3])
+    for query in ("topic1 word2", "chunk 7", "missing"):
+        _, expected = single.lexical_search(query, 10)
+        _, scores = sharded.lexical_search(query, 10)
+        np.testing.assert_allclose(scores, expected, rtol=1e-5)
+
+        expected_indices, expected = single.hybrid_search(query, query_vector, 10)
+        indices, scores = sharded.hybrid_search(query, query_vector, 10)
+        np.testing.assert_allclose(scores, expected, rtol=1e-5)
+        assert set(indices) == set(expected_indices)
+
+
+def test_removed_shard_leaves_the_others(tmp_path):
+    vectors, chunks, sources = random_index(20)
+    build_shards(tmp_path / "sharded", vectors, chunks, sources, [0, 5, 20])
+    remove_shard(tmp_path / "sharded", "part0")
+    sharded = ShardedIndex.open(tmp_path / "sharded")
+    assert sharded.names == ["part1"]
+    assert sharded.all_chunks() == chunks[5:]
+
+
+def test_sharded_index_without_shards_finds_nothing(tmp_path):
+    vectors, chunks, sources = random_index(5)
+    build_shards(tmp_path / "sharded", vectors, chunks, sources, [0, 5])
+    remove_shard(tmp_path / "sharded", "part0")
+    sharded = ShardedIndex.open(tmp_path / "sharded")
+    assert len(sharded) == 0
+
+    query = vectors[0] / np.linalg.norm(vectors[0])
+    for indices, scores in (sharded.search(query, 3), sharded.lexical_search("topic0", 3),
+                            sharded.hybrid_search("topic0", query, 3)):
+        assert len(indices) == 0 and len(scores) == 0